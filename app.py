@@ -1,27 +1,62 @@
 import os
-from dotenv import load_dotenv
-from docx import Document
-from docxtpl import DocxTemplate
-try:
-    from PyPDF2 import PdfReader
-except Exception:
-    PdfReader = None
+import io
 import json
+import contextlib
+import logging
+import multiprocessing
+import zipfile
+import hashlib
+import shutil
+import tempfile
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from types import SimpleNamespace
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from concurrent.futures.process import BrokenProcessPool
+import extract_worker
+import layout_worker
 from crewai import Crew, Agent, Task
-from flask import Flask, request, render_template, send_file, Response
+from crewai.tasks.task_output import TaskOutput
+from flask import Flask, Request, request, render_template, send_file, Response, url_for, stream_with_context
 from markdown import markdown
 import re
 
-
-# Load environment variables
-load_dotenv()
+from config import (
+    BATCH_EXTENSIONS, BATCH_MAX_FILES, BATCH_WORKERS, CONTEXT_SCHEMA, CREW_VERBOSE, DEFAULT_LAYOUT, DOCX_MIMETYPE,
+    DOCX_WAIT, EVENT_STREAM_SECONDS, EXTRACT_MAX_CHARS, EXTRACT_MAX_PAGES, EXTRACT_TIMEOUT, EXTRACT_WORKERS,
+    JOB_DB_PATH, JOB_HEARTBEAT_SECONDS, JOB_HISTORY_RETENTION, JOB_MAX_ATTEMPTS, JOB_POSTING_MAX_CHARS,
+    JOB_QUEUE_SIZE, JOB_STALE_SECONDS, JOB_WORKERS, KEYWORD_SHORTLIST_MIN, LAYOUTS_PATH, LAYOUT_QUEUE_SIZE,
+    LAYOUT_TIMEOUT, LAYOUT_WORKERS, LOG_LEVEL, MAX_BATCH_UPLOAD_BYTES, MAX_UPLOAD_BYTES, MODEL_ROUTES, OUTPUT_DIR,
+    OUTPUT_RETENTION, OUTPUT_SWEEP_INTERVAL, PASSWORD, PDF_CACHE_SIZE, PDF_MIMETYPE, PDF_QUEUE_SIZE, PDF_TIMEOUT,
+    PDF_WORKERS, PIPELINE_MODE, PIPELINE_MODES, RENDER_WORKERS, RULES_MIN_CONFIDENCE, SECTION_CACHE_PATH,
+    SECTION_CACHE_SIZE, SECTION_CACHE_TTL, SECTION_DEADLINE, SECTION_KEYS, SECTION_ORDER, SECTION_REASKS,
+    SECTION_SCHEMAS, SECTION_WORKERS, TEMPLATE_DIR, UPLOAD_SPOOL_BYTES, USERNAME, VARIANT_MAX, VARIANT_WORKERS,
+    ZIP_MIMETYPE,
+)
+from metrics import PipelineUsage, metrics, record_llm_call, timed_stage
+from jobs import JOB_DONE, JOB_FAILED, JOB_QUEUED, JobQueue, MemoryJobStore, SQLiteJobStore
+from cache import SectionCache, section_cache_key
+from json_repair import parse_section_output, schema_problems
+from json_patch import apply_json_patch
+from rendering import TemplateCache, render_pdf
+from llm_transport import build_llm, section_deadline
+from rules import RULE_EXTRACTORS
+from preprocess import prepare_resume_text, resume_slice
+from keywords import format_shortlist, keyword_index
+from extract_worker import sniff_resume_type
+from prompts import (
+    AGENT_DEFINITIONS, EXTRACTION_SECTIONS, INDEPENDENT_SECTIONS, KEYWORD_GUIDANCE, POSITIONING_SECTIONS,
+    SECTION_PROMPTS, SECTION_SORT_ORDER, TAILORED_SECTION_PROMPTS, TARGET_ROLE_GUIDANCE,
+)
+
+
+logging.basicConfig(level=LOG_LEVEL, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+logger = logging.getLogger(__name__)
 
 app = Flask(__name__)
 
-# Load credentials from .env
-USERNAME = os.getenv('AUTH_USERNAME')
-PASSWORD = os.getenv('AUTH_PASSWORD')
-
 # Authentication function
 def check_auth(username, password):
     """Check if a username/password combination is valid."""
@@ -41,197 +76,866 @@ def require_auth():
     auth = request.authorization
     if not auth or not check_auth(auth.username, auth.password):
         return authenticate()
+
+
+class UploadRequest(Request):
+    """Request that keeps each uploaded file in memory only up to UPLOAD_SPOOL_BYTES, then on disk."""
+
+    def _get_file_stream(self, total_content_length, content_type, filename=None, content_length=None):
+        return tempfile.SpooledTemporaryFile(max_size=UPLOAD_SPOOL_BYTES, mode="rb+")
+
+
+app.request_class = UploadRequest
+app.config['MAX_CONTENT_LENGTH'] = MAX_UPLOAD_BYTES
+
+
+@app.before_request
+def allow_batch_uploads():
+    """A batch may be much larger than a single resume."""
+    if request.endpoint == 'process_batch_upload':
+        request.max_content_length = MAX_BATCH_UPLOAD_BYTES
+
+
+@app.errorhandler(413)
+def upload_too_large(error):
+    """Refuse an oversized upload with the limit that applies to it."""
+    metrics.inc("upload_rejections_total", reason="too_large")
+    message = f"The upload is too large. The limit is {request.max_content_length // (1024 * 1024)} MB."
+    if request.endpoint == 'process_batch_upload':
+        return {"error": message}, 413
+    return message, 413
     
 
-def extract_text_from_docx(file):
-    document = Document(file)
-    full_text = []
+class WorkerPool:
+    """A spawned process pool that starts on first use and can be thrown away.
 
-    # Extract text from regular paragraphs
-    for para in document.paragraphs:
-        if para.text.strip():
-            full_text.append(para.text.strip())
+    The workers are spawned, not forked from this threaded process, so they
+    start from a fresh interpreter and load only the worker module they run.
+    A pool whose process died or whose task ran past its timeout is discarded
+    and the next request starts a new one.
+    """
+
+    def __init__(self, workers):
+        self._workers = workers
+        self._executor = None
+        self._lock = threading.Lock()
+
+    def _pool(self):
+        with self._lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(self._workers, multiprocessing.get_context("spawn"))
+            return self._executor
+
+    def _discard(self, executor, stop_workers=False):
+        with self._lock:
+            if self._executor is executor:
+                self._executor = None
+        if stop_workers:
+            # A task past its timeout would otherwise keep its worker busy after its slot is freed
+            for process in list((getattr(executor, "_processes", None) or {}).values()):
+                process.kill()
+        executor.shutdown(wait=False, cancel_futures=True)
+
+
+class TextExtractor(WorkerPool):
+    """Extract resume text on worker processes, killing a parse after a timeout.
+
+    The workers run extract_worker, which loads PyPDF2 and ElementTree only, so
+    a pathological file can only cost a worker process, never a web worker.
+    At most one parse per worker is handed to the pool at a time, so the
+    timeout covers the parse itself and not time spent waiting behind others.
+    With a timeout of 0 the text is extracted inline.
+    """
 
-    # Extract text from tables
-    for table in document.tables:
-        for row in table.rows:
-            for cell in row.cells:
-                cell_text = cell.text.strip()
-                if cell_text:
-                    full_text.append(cell_text)
+    def __init__(self, workers, timeout):
+        super().__init__(workers)
+        self._timeout = timeout
+        self._slots = threading.Semaphore(workers)
+
+    def extract(self, data, filename):
+        """Return the text of a DOCX or PDF given as bytes; parse errors are raised as RuntimeError."""
+        args = (extract_worker.extract_text, data, filename, EXTRACT_MAX_PAGES, EXTRACT_MAX_CHARS)
+        if self._timeout <= 0:
+            return args[0](*args[1:])
+        with self._slots:
+            executor = self._pool()
+            try:
+                future = executor.submit(*args)
+            except (BrokenProcessPool, RuntimeError):
+                # A worker died or the pool was discarded after the last parse; start a fresh pool for this one
+                self._discard(executor)
+                executor = self._pool()
+                future = executor.submit(*args)
+            try:
+                return future.result(self._timeout)
+            except FutureTimeoutError:
+                self._discard(executor, stop_workers=True)
+                raise RuntimeError(f"Text extraction took longer than {self._timeout:g} seconds")
+            except BrokenProcessPool:
+                self._discard(executor)
+                raise RuntimeError("Text extraction process exited unexpectedly")
 
-    return "\n".join(full_text)
 
+text_extractor = TextExtractor(EXTRACT_WORKERS, EXTRACT_TIMEOUT)
+
+
+def extract_resume_text(file, filename):
+    """Extract resume text on text_extractor's worker processes.
+
+    file is the upload's bytes or a file, such as a spooled upload, which is
+    read from its current position and sent to the worker as bytes.
+    """
+    data = file if isinstance(file, bytes) else file.read()
+    return text_extractor.extract(data, filename)
 
-def extract_text_from_pdf(file):
-    """Extract text from a PDF file-like object using PyPDF2."""
-    if PdfReader is None:
-        raise RuntimeError("PyPDF2 is not installed. Please add PyPDF2 to requirements.txt and reinstall.")
 
-    # PdfReader accepts a file-like object
+def section_data(task):
+    """Return a finished task's output as a dict, parsing it only the first time.
+
+    The parsed object is kept in the output's json_dict, so every later stage
+    reads the same dict instead of parsing the raw text again.
+    """
+    output = getattr(task, "output", None)
+    if output is None:
+        return {}
+    if output.json_dict is None:
+        output.json_dict, _ = parse_section_output(getattr(task.agent, "role", ""), output.raw)
+    return output.json_dict
+
+def run_section(agent, task, cache_key=None, usage=None, on_done=None):
+    """Run a single agent/task pair in its own Crew; the output is attached to the task.
+
+    When a cache key is given and the section is cached, the Crew call is skipped.
+    Output that is not valid for the role's schema is asked for again, up to
+    SECTION_REASKS times, and if the agent's model fails or stays invalid the
+    role's fallback models from MODEL_ROUTES are tried in turn. The parsed result
+    is kept on task.output.json_dict.
+    Latency, tokens and cost of the call go to the metrics and the usage trace,
+    and on_done(task) is called once the output is available.
+    """
+    role = agent.role
+    if cache_key:
+        cached = section_cache.get(cache_key)
+        metrics.inc("section_cache_requests_total", role=role, result="miss" if cached is None else "hit")
+        if cached is not None:
+            task.output = TaskOutput(
+                description=task.description, raw=json.dumps(cached), agent=agent.role, json_dict=cached
+            )
+            if usage is not None:
+                usage.span("cache", time.time(), 0.0, role=role)
+            if on_done is not None:
+                on_done(task)
+            return task
+
+    started = time.time()
+    best, error = None, None
+    for index, model in enumerate(section_models(agent)):
+        attempt_agent, attempt_task = agent, task
+        if index:
+            metrics.inc("section_fallbacks_total", role=role, model=model)
+            print(f"Falling back to {model} for {role}")
+            attempt_agent = build_agent(role, model)
+            attempt_task = Task(
+                description=task.description, agent=attempt_agent, expected_output=task.expected_output
+            )
+        try:
+            answer = ask_section(attempt_agent, attempt_task, usage)
+        except Exception as e:
+            print(f"Error running {role} on {model}: {e}")
+            error = e
+            continue
+        if best is None or answer_rank(answer) < answer_rank(best):
+            best = answer
+        if not best[1]:
+            break
+    if best is None:
+        raise error
+
+    data, problems, task.output = best
+    task.output.json_dict = data
+    if cache_key and not problems:
+        section_cache.set(cache_key, data, time.time() - started)
+    if on_done is not None:
+        on_done(task)
+    return task
+
+
+def section_models(agent):
+    """The agent's own model followed by the fallbacks MODEL_ROUTES lists for its role."""
+    model = getattr(agent.llm, "model", "") or ""
+    return [model] + [fallback for fallback in MODEL_ROUTES.get(agent.role, []) if fallback != model]
+
+
+def answer_rank(answer):
+    """Sort key for (data, problems, output): output that parsed at all, then fewest problems."""
+    return not answer[0], len(answer[1])
+
+
+def ask_section(agent, task, usage=None):
+    """Run one section on the agent's model, asking again while its output is invalid.
+
+    Returns (data, problems, output) for the best answer. Raises if the first call
+    fails. All requests must finish within SECTION_DEADLINE seconds.
+    """
+    role = agent.role
+    model = getattr(agent.llm, "model", "") or ""
+    deadline = section_deadline.set(time.time() + SECTION_DEADLINE)
+    attempt_task, best = task, None
     try:
-        reader = PdfReader(file)
-        pages = []
-        for page in reader.pages:
+        for attempt in range(SECTION_REASKS + 1):
+            call_started = time.time()
             try:
-                text = page.extract_text() or ""
-                if text.strip():
-                    pages.append(text.strip())
+                result = Crew(agents=[agent], tasks=[attempt_task], verbose=CREW_VERBOSE).kickoff()
             except Exception:
-                # skip problematic pages
-                continue
-        return "\n\n".join(pages)
-    except Exception as e:
-        raise RuntimeError(f"Failed to read PDF: {e}")
+                metrics.inc("llm_requests_total", role=role, model=model, outcome="error")
+                if best is None:
+                    raise
+                print(f"Keeping the earlier {role} output after a failed re-ask")
+                break
+            record_llm_call(role, model, call_started, time.time() - call_started, result, usage)
+
+            data, problems = parse_section_output(role, attempt_task.output.raw)
+            if best is None or answer_rank((data, problems)) < answer_rank(best):
+                best = (data, problems, attempt_task.output)
+            if not problems:
+                break
+            print(f"⚠️ {role} output from {model} is not valid: {'; '.join(problems[:5])}")
+            if attempt == SECTION_REASKS:
+                metrics.inc("section_invalid_total", role=role)
+                break
+            # Ask again for this section only, saying what was wrong with the last answer
+            metrics.inc("section_reasks_total", role=role)
+            attempt_task = Task(
+                description=(
+                    f"{task.description}\n\nYour previous answer could not be used: {'; '.join(problems[:10])}. "
+                    "Return only the corrected, valid JSON in the required format."
+                ),
+                agent=agent,
+                expected_output=task.expected_output
+            )
+    finally:
+        section_deadline.reset(deadline)
+    return best
 
 
-def clean_json_block(text: str) -> str:
-    """
-    Clean triple-backtick-wrapped JSON content and remove control characters.
+template_cache = TemplateCache(TEMPLATE_DIR)
+
+
+def load_layouts(path):
+    """Read the layout registry: each layout's DOCX template and the context keys it reads.
+
+    "keys" lists every context key the template uses; a context without one of
+    the "required" keys is not rendered. Layouts whose template is missing are left out.
     """
-    text = text.strip()
-    if text.startswith("```json"):
-        text = text[7:].strip("` \n")
-    elif text.startswith("```"):
-        text = text.strip("` \n")
-    # Remove control characters except for \n, \r, \t
-    text = re.sub(r'[\x00-\x08\x0b\x0c\x0e-\x1f\x7f]', '', text)
-    return text
+    with open(path, encoding="utf-8") as f:
+        registry = json.load(f)
+    found = {}
+    for name, layout in registry.items():
+        if not os.path.exists(os.path.join(TEMPLATE_DIR, layout["file"])):
+            print(f"⚠️ Template {layout['file']} of layout {name} not found; leaving it out")
+            continue
+        found[name] = {
+            "name": name,
+            "title": layout.get("title", name),
+            "description": layout.get("description", ""),
+            "file": layout["file"],
+            "keys": layout.get("keys", []),
+            "required": layout.get("required", []),
+        }
+    return found
+
+
+layouts = load_layouts(LAYOUTS_PATH)
+if DEFAULT_LAYOUT not in layouts:
+    print(f"⚠️ DEFAULT_LAYOUT {DEFAULT_LAYOUT} is not in {LAYOUTS_PATH}; using {next(iter(layouts))}")
+    DEFAULT_LAYOUT = next(iter(layouts))
 
-def pad_list(lst, length, filler=""):
-    """Pad or truncate list to the desired length."""
-    return lst + [filler] * (length - len(lst)) if len(lst) < length else lst[:length]
 
+def missing_layout_keys(layout, context):
+    """Return the keys a layout requires that the context lacks."""
+    return [key for key in layouts[layout]["required"] if key not in context]
 
-def render_new_format(context, template_filename="TraditionalFormat.docx", output_path="Final_Resume.docx"):
+
+def render_new_format(context, output_path, layout=DEFAULT_LAYOUT):
+    """Render context into the DOCX template of a layout from the registry.
+
+    output_path is either a file path or a writable file-like object such as BytesIO.
+    """
     try:
-        # Get absolute paths
-        base_dir = os.path.dirname(os.path.abspath(__file__))
-        template_path = os.path.join(base_dir, 'templates', template_filename)
-        output_path = os.path.join(base_dir, output_path)
-        
-        print(f"Template path: {template_path}")
-        print(f"Output path: {output_path}")
-        
-        doc = DocxTemplate(template_path)
+        doc = template_cache.get(layouts[layout]["file"])
         doc.render(context)
-        doc.save(output_path)
+        if isinstance(output_path, str):
+            logger.debug("Output path: %s", output_path)
+            # Save under a temporary name first so a half-written file is never downloaded
+            os.makedirs(os.path.dirname(output_path), exist_ok=True)
+            tmp_path = f"{output_path}.tmp"
+            doc.save(tmp_path)
+            os.replace(tmp_path, output_path)
+        else:
+            doc.save(output_path)
         return True
     except Exception as e:
         print(f"Error in render_new_format: {e}")
         return False
 
-# Add this function after your existing imports
-def format_resume_markdown(tasks):
-    """Convert AI output to formatted markdown"""
-    markdown_text = ""
-    title = ""
 
-    # First, extract the title from Job Description Writer
-    for task in tasks:
-        if hasattr(task, 'output') and getattr(task.agent, "role", "") == "Job Description Writer":
+class PdfExporter:
+    """Convert resume contexts to PDF on a small worker pool with a bounded queue.
+
+    Finished PDFs are kept by the hash of their context, so downloading the
+    same resume again is not converted twice, and a conversion already running
+    for that context is shared rather than repeated.
+    """
+
+    def __init__(self, workers, queue_size, cache_size):
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="resume-pdf")
+        # Running plus waiting conversions; anything beyond this is turned away
+        self._slots = threading.BoundedSemaphore(workers + queue_size)
+        self._cache = OrderedDict()
+        self._cache_size = cache_size
+        self._running = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def context_key(context):
+        return hashlib.sha256(json.dumps(context, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+
+    def submit(self, context):
+        """Return a future for the context's PDF bytes, or None if the queue is full."""
+        key = self.context_key(context)
+        with self._lock:
+            pdf = self._cache.get(key)
+            if pdf is not None:
+                self._cache.move_to_end(key)
+                metrics.inc("pdf_exports_total", result="cached")
+                future = Future()
+                future.set_result(pdf)
+                return future
+            future = self._running.get(key)
+            if future is not None:
+                metrics.inc("pdf_exports_total", result="shared")
+                return future
+            if not self._slots.acquire(blocking=False):
+                metrics.inc("pdf_exports_total", result="rejected")
+                return None
+            future = self._running[key] = self._executor.submit(self._convert, key, context)
+        return future
+
+    def _convert(self, key, context):
+        try:
+            with timed_stage("render_pdf"):
+                pdf = render_pdf(context)
+            metrics.inc("pdf_exports_total", result="rendered")
+            with self._lock:
+                if self._cache_size:
+                    self._cache[key] = pdf
+                    while len(self._cache) > self._cache_size:
+                        self._cache.popitem(last=False)
+            return pdf
+        except Exception:
+            metrics.inc("pdf_exports_total", result="failed")
+            raise
+        finally:
+            with self._lock:
+                self._running.pop(key, None)
+            self._slots.release()
+
+
+pdf_exporter = PdfExporter(PDF_WORKERS, PDF_QUEUE_SIZE, PDF_CACHE_SIZE)
+
+
+class LayoutRenderer(WorkerPool):
+    """Render one context into several layouts at once on a pool of worker processes.
+
+    Each layout renders in its own process, so a set of layouts neither queues
+    behind one another nor competes with the web workers for the GIL. The
+    workers run layout_worker, which loads docxtpl only.
+    """
+
+    def __init__(self, workers, queue_size):
+        super().__init__(workers)
+        # Running plus waiting requests; anything beyond this is turned away
+        self._slots = threading.BoundedSemaphore(workers + queue_size)
+
+    @staticmethod
+    def _submit(executor, context, outputs):
+        return {
+            layout: executor.submit(
+                layout_worker.render_layout, os.path.join(TEMPLATE_DIR, layouts[layout]["file"]), context, path
+            )
+            for layout, path in outputs.items()
+        }
+
+    def render(self, context, outputs, timeout):
+        """Render context to {layout: output_path} and return {layout: error or None}.
+
+        Returns None if too many requests are already rendering.
+        """
+        if not self._slots.acquire(blocking=False):
+            metrics.inc("layout_renders_total", layout="all", result="rejected")
+            return None
+        try:
+            executor = self._pool()
             try:
-                raw = (getattr(task.output, 'raw_output', None) 
-                       or getattr(task.output, 'value', None) 
-                       or str(task.output))
-                cleaned = clean_json_block(raw)
-                data = json.loads(cleaned)
-                if isinstance(data, dict) and "experience" in data and data["experience"]:
-                    title = data["experience"][0].get("title", "")
-            except Exception as e:
-                print(f"Error extracting title: {e}")
+                futures = self._submit(executor, context, outputs)
+            except BrokenProcessPool:
+                # A worker died after the last request; start a fresh pool for this one
+                self._discard(executor)
+                executor = self._pool()
+                futures = self._submit(executor, context, outputs)
+            deadline = time.time() + timeout
+            errors = {}
+            for layout, future in futures.items():
+                try:
+                    future.result(max(0.0, deadline - time.time()))
+                    errors[layout] = None
+                except BrokenProcessPool:
+                    self._discard(executor)
+                    errors[layout] = "The render process stopped unexpectedly"
+                except FutureTimeoutError:
+                    self._discard(executor, stop_workers=True)
+                    errors[layout] = f"Rendering took longer than {timeout:g} seconds"
+                except Exception as e:
+                    print(f"Error rendering the {layout} layout: {e}")
+                    errors[layout] = "The resume could not be rendered"
+                metrics.inc("layout_renders_total", layout=layout, result="failed" if errors[layout] else "rendered")
+            return errors
+        finally:
+            self._slots.release()
+
+
+layout_renderer = LayoutRenderer(LAYOUT_WORKERS, LAYOUT_QUEUE_SIZE)
 
-    # Now, build the markdown
+
+def format_section_markdown(role, data, title=""):
+    """Convert one section's parsed output to markdown"""
+    markdown_text = ""
+    if role == "Name Generator":
+        markdown_text += (
+            f"# {data.get('full_name', '')}\n"
+            f"{data.get('location', '')} • {data.get('phone', '')} • "
+            f"[{data.get('email', '')}](mailto:{data.get('email', '')}) • "
+            f"{data.get('LinkedIn', '')}\n\n"
+        )
+        # Insert the title right after the name block
+        if title:
+            markdown_text += f"## {title}\n\n"
+    
+    elif role == "Keyword Generator":
+        markdown_text += "\n"
+        t_keywords = data.get('top_keywords', [])
+        markdown_text += " • ".join(t_keywords) + "\n\n"
+    
+    elif role == "Summary Writer":
+        markdown_text += "## Professional Summary\n"
+        for summary in data.get('summaries', []):
+            markdown_text += f"{summary}\n\n"
+    
+    elif role == "Areas of Expertise Writer":
+        markdown_text += "## Areas of Expertise\n"
+        keywords = data.get('expertise_keywords', [])
+        # Create 3x3 grid
+        for i in range(0, 9, 3):
+            row = keywords[i:i+3]
+            markdown_text += " • ".join(row) + "\n"
+        markdown_text += "\n"
+    
+    elif role == "Achievements Writer":
+        markdown_text += "## Notable Achievements\n"
+        achievements = data.get('notable_achievements', [])
+        for achievement in achievements:
+            label = achievement.get('label', '')
+            text = achievement.get('text', '')
+            markdown_text += f"- {label}{text}\n"
+        markdown_text += "\n"
+    
+    elif role == "Job Description Writer":
+        markdown_text += "## Professional Experience\n"
+        for job in data.get('experience', []):
+            markdown_text += f"### {job.get('company')} – {job.get('location')}\n"
+            markdown_text += f"**{job.get('title')}** • {job.get('dates')}\n"
+            markdown_text += f"\n{job.get('description')}\n\n"
+            for achievement in job.get('achievements', []):
+                markdown_text += f"* **{achievement.get('label')}:** {achievement.get('text')}\n"
+            markdown_text += "\n"
+    
+    elif role == "Additional Experience Writer":
+        markdown_text += "## Additional Experience\n"
+        for job in data.get('earlier_experience', []):
+            markdown_text += (f"**{job.get('company')}** – {job.get('location')}\n"
+                            f"*{job.get('title')}* • {job.get('dates')}\n\n")
+    
+    elif role == "Education Writer":
+        markdown_text += "## Education\n"
+        for edu in data.get('education', []):
+            markdown_text += (f"**{edu.get('institution')}** • {edu.get('credential')}\n")
+                         #   f"{edu.get('credential')}\n\n")
+    
+    elif role == "Certifications Writer":
+        markdown_text += "## Certifications\n"
+        for cert in data.get('certifications', []):
+            markdown_text += f"* {cert.get('credential')} – {cert.get('institution')}\n"
+        markdown_text += "\n"
+
+    return markdown_text
+
+
+def build_context(tasks):
+    """Merge the parsed output of every finished section into one template context."""
+    context = {}
     for task in tasks:
-        if not hasattr(task, 'output'):
-            continue
+        if getattr(task, 'output', None):
+            parsed = section_data(task)
+            if parsed:
+                context.update(parsed)
+            else:
+                print(f"❌ Could not parse output from {task.agent.role}:\n{task.output.raw[:300]}")
+
+    # Optional sections
+    for key in ["earlier_experience", "education", "certifications"]:
+        context[key] = context.get(key, [])
+    return context
 
+
+def format_resume_markdown(context):
+    """Convert a resume's template context to formatted markdown, section by section."""
+    title = ""
+    experience = context.get("experience")
+    if experience and isinstance(experience[0], dict):
+        title = experience[0].get("title", "")
+
+    parts = []
+    for role in sorted(SECTION_KEYS, key=lambda role: SECTION_SORT_ORDER.get(role, 99)):
+        data = {key: context[key] for key in SECTION_KEYS[role] if context.get(key)}
+        if not data:
+            continue
         try:
-            raw = (getattr(task.output, 'raw_output', None) 
-                   or getattr(task.output, 'value', None) 
-                   or str(task.output))
-            cleaned = clean_json_block(raw)
-            data = json.loads(cleaned)
-
-
-            if task.agent.role == "Name Generator":
-                markdown_text += (
-                    f"# {data.get('full_name', '')}\n"
-                    f"{data.get('location', '')} • {data.get('phone', '')} • "
-                    f"[{data.get('email', '')}](mailto:{data.get('email', '')}) • "
-                    f"{data.get('LinkedIn', '')}\n\n"
-                )
-                # Insert the title right after the name block
-                if title:
-                    markdown_text += f"## {title}\n\n"
-            
-            elif task.agent.role == "Keyword Generator":
-                markdown_text += "\n"
-                t_keywords = data.get('top_keywords', [])
-                markdown_text += " • ".join(t_keywords) + "\n\n"
-            
-            elif task.agent.role == "Summary Writer":
-                markdown_text += "## Professional Summary\n"
-                for summary in data.get('summaries', []):
-                    markdown_text += f"{summary}\n\n"
-            
-            elif task.agent.role == "Areas of Expertise Writer":
-                markdown_text += "## Areas of Expertise\n"
-                keywords = data.get('expertise_keywords', [])
-                # Create 3x3 grid
-                for i in range(0, 9, 3):
-                    row = keywords[i:i+3]
-                    markdown_text += " • ".join(row) + "\n"
-                markdown_text += "\n"
-            
-            elif task.agent.role == "Achievements Writer":
-                markdown_text += "## Notable Achievements\n"
-                achievements = data.get('notable_achievements', [])
-                for achievement in achievements:
-                    label = achievement.get('label', '')
-                    text = achievement.get('text', '')
-                    markdown_text += f"- {label}{text}\n"
-                markdown_text += "\n"
-            
-            elif task.agent.role == "Job Description Writer":
-                markdown_text += "## Professional Experience\n"
-                for job in data.get('experience', []):
-                    markdown_text += f"### {job.get('company')} – {job.get('location')}\n"
-                    markdown_text += f"**{job.get('title')}** • {job.get('dates')}\n"
-                    markdown_text += f"\n{job.get('description')}\n\n"
-                    for achievement in job.get('achievements', []):
-                        markdown_text += f"* **{achievement.get('label')}:** {achievement.get('text')}\n"
-                    markdown_text += "\n"
-            
-            elif task.agent.role == "Additional Experience Writer":
-                markdown_text += "## Additional Experience\n"
-                for job in data.get('earlier_experience', []):
-                    markdown_text += (f"**{job.get('company')}** – {job.get('location')}\n"
-                                    f"*{job.get('title')}* • {job.get('dates')}\n\n")
-            
-            elif task.agent.role == "Education Writer":
-                markdown_text += "## Education\n"
-                for edu in data.get('education', []):
-                    markdown_text += (f"**{edu.get('institution')}** • {edu.get('credential')}\n")
-                                 #   f"{edu.get('credential')}\n\n")
-            
-            elif task.agent.role == "Certifications Writer":
-                markdown_text += "## Certifications\n"
-                for cert in data.get('certifications', []):
-                    markdown_text += f"* {cert.get('credential')} – {cert.get('institution')}\n"
-                markdown_text += "\n"
-                
+            parts.append(format_section_markdown(role, data, title))
         except Exception as e:
-            print(f"Error formatting {task.agent.role} output: {e}")
-            
-    return markdown_text
+            print(f"Error formatting {role} output: {e}")
+    return "".join(parts)
+
+
+job_queue = JobQueue(
+    SQLiteJobStore(JOB_DB_PATH) if JOB_DB_PATH else MemoryJobStore(),
+    JOB_WORKERS,
+    JOB_QUEUE_SIZE
+)
+
+
+section_cache = SectionCache(SECTION_CACHE_SIZE, SECTION_CACHE_TTL, SECTION_CACHE_PATH)
+
+
+class JobTraces:
+    """Usage traces of recent jobs, read by /jobs/<id>/trace and expired with their outputs."""
+
+    def __init__(self):
+        self._jobs = {}
+        self._lock = threading.Lock()
+
+    def start(self, job_id):
+        usage = PipelineUsage(job_id)
+        with self._lock:
+            self._jobs[job_id] = usage
+        return usage
+
+    def get(self, job_id):
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def discard_older_than(self, cutoff):
+        with self._lock:
+            for job_id in [job_id for job_id, usage in self._jobs.items() if usage.started < cutoff]:
+                del self._jobs[job_id]
+
+
+job_traces = JobTraces()
+
+
+class PipelineReport:
+    """Running totals per pipeline mode, used to compare multi-agent and single-pass runs."""
+
+    def __init__(self):
+        self._modes = {}
+        self._lock = threading.Lock()
+
+    def record(self, mode, seconds, usage):
+        with self._lock:
+            totals = self._modes.setdefault(mode, {
+                "runs": 0, "seconds": 0.0, "llm_calls": 0, "prompt_tokens": 0, "completion_tokens": 0,
+                "cost_usd": 0.0,
+            })
+            totals["runs"] += 1
+            totals["seconds"] += seconds
+            totals["llm_calls"] += usage.llm_calls
+            totals["prompt_tokens"] += usage.prompt_tokens
+            totals["completion_tokens"] += usage.completion_tokens
+            totals["cost_usd"] += usage.cost_usd
+
+    def summary(self):
+        with self._lock:
+            return {
+                mode: {
+                    "runs": totals["runs"],
+                    "avg_seconds": round(totals["seconds"] / totals["runs"], 2),
+                    "avg_llm_calls": round(totals["llm_calls"] / totals["runs"], 2),
+                    "avg_prompt_tokens": round(totals["prompt_tokens"] / totals["runs"]),
+                    "avg_completion_tokens": round(totals["completion_tokens"] / totals["runs"]),
+                    "avg_cost_usd": round(totals["cost_usd"] / totals["runs"], 6),
+                }
+                for mode, totals in self._modes.items()
+            }
+
+
+pipeline_report = PipelineReport()
+
+
+class JobEvents:
+    """In-process log of progress events per job, read by the /jobs/<id>/events stream."""
+
+    def __init__(self):
+        self._jobs = {}
+        self._changed = threading.Condition()
+
+    def publish(self, job_id, event, data):
+        with self._changed:
+            self._jobs.setdefault(job_id, (time.time(), []))[1].append((event, data))
+            self._changed.notify_all()
+
+    def wait(self, job_id, start, timeout):
+        """Return the job's events from index start on, waiting up to timeout seconds for one."""
+        with self._changed:
+            if len(self._jobs.get(job_id, (0, []))[1]) <= start and timeout:
+                self._changed.wait(timeout)
+            return list(self._jobs.get(job_id, (0, []))[1][start:])
+
+    def discard_older_than(self, cutoff):
+        with self._changed:
+            for job_id in [job_id for job_id, (created, _) in self._jobs.items() if created < cutoff]:
+                del self._jobs[job_id]
+
+
+job_events = JobEvents()
+
+
+class DocxRenders:
+    """DOCX renders running on a background pool, by job, so routes can wait for them."""
+
+    def __init__(self, workers):
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="resume-render")
+        self._renders = {}
+        self._lock = threading.Lock()
+
+    def submit(self, job_id, func, *args):
+        """Run func(*args) in the background as the job's render; it returns True on success.
+
+        A job's renders write the same file, so one submitted while another is
+        still running starts when it finishes, without holding a worker meanwhile.
+        """
+        with self._lock:
+            previous = self._renders.get(job_id)
+            if previous is None or previous[1].done():
+                future = self._executor.submit(func, *args)
+            else:
+                future = Future()
+                previous[1].add_done_callback(lambda _: self._start(future, func, args))
+            self._renders[job_id] = (time.time(), future)
+        return future
+
+    def _start(self, future, func, args):
+        def finish(render):
+            if render.exception() is not None:
+                future.set_exception(render.exception())
+            else:
+                future.set_result(render.result())
+
+        try:
+            self._executor.submit(func, *args).add_done_callback(finish)
+        except RuntimeError as e:
+            # The pool is shutting down, so the render can no longer start
+            future.set_exception(e)
+
+    def state(self, job_id):
+        """"pending", "ready" or "failed" for a render started by this process, else None."""
+        with self._lock:
+            render = self._renders.get(job_id)
+        if render is None:
+            return None
+        future = render[1]
+        if not future.done():
+            return "pending"
+        return "ready" if future.exception() is None and future.result() else "failed"
+
+    def wait(self, job_id, timeout=None):
+        """Wait up to timeout seconds for the job's render; True if it produced the DOCX."""
+        with self._lock:
+            render = self._renders.get(job_id)
+        if render is None:
+            return False
+        try:
+            return bool(render[1].result(timeout))
+        except Exception:
+            return False
+
+    def discard_older_than(self, cutoff):
+        with self._lock:
+            for job_id in [job_id for job_id, (started, _) in self._renders.items() if started < cutoff]:
+                del self._renders[job_id]
+
+
+docx_renders = DocxRenders(RENDER_WORKERS)
+
+
+def docx_status(job_id):
+    """"ready", "pending", "failed" or "missing" (never rendered or expired) for a job's DOCX."""
+    state = docx_renders.state(job_id)
+    if state == "pending":
+        return state
+    if os.path.exists(job_output_path(job_id)):
+        return "ready"
+    return "failed" if state == "failed" else "missing"
+
+
+def publish_section(job_id, task):
+    """Push a finished section, rendered like the result page, to the job's event stream."""
+    role = task.agent.role
+    data = section_data(task)
+    if not data:
+        print(f"Error streaming {role} output: nothing could be parsed")
+        return
+    job_events.publish(job_id, "section", {"role": role, "html": markdown(format_section_markdown(role, data))})
+    # The title shown under the name comes from the most recent job
+    if role == "Job Description Writer" and data.get("experience"):
+        title = data["experience"][0].get("title", "")
+        if title:
+            job_events.publish(job_id, "section", {"role": "Job Title", "html": markdown(f"## {title}")})
+
+
+def checkpoint_section(job_id, task):
+    """Save a finished section's parsed output with its job, so a rerun of the job can skip it."""
+    role = task.agent.role
+    data = section_data(task)
+    if not data:
+        return
+    try:
+        job_queue.store.save_section(job_id, role, data)
+        metrics.inc("section_checkpoints_total", role=role, event="saved")
+    except Exception as e:
+        print(f"Could not checkpoint {role} for job {job_id}: {e}")
+
+
+def job_output_path(job_id, extension="docx"):
+    """Return the output path for a job, or None if the job ID is malformed."""
+    if not re.fullmatch(r'[0-9a-f]{32}', job_id or ""):
+        return None
+    return os.path.join(OUTPUT_DIR, f"{job_id}.{extension}")
+
+
+def save_job_context(job_id, context):
+    """Keep a job's template context next to its outputs, so they can be rendered again later."""
+    path = job_output_path(job_id, "json")
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(context, f)
+    os.replace(tmp_path, path)
+
+
+def load_job_context(job_id):
+    """Return a job's saved template context, or None if it is unknown or expired."""
+    path = job_output_path(job_id, "json")
+    if not path or not os.path.exists(path):
+        return None
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def sweep_outputs():
+    """Delete rendered resumes older than OUTPUT_RETENTION seconds."""
+    if not os.path.isdir(OUTPUT_DIR):
+        return
+    cutoff = time.time() - OUTPUT_RETENTION
+    for entry in os.scandir(OUTPUT_DIR):
+        try:
+            if entry.is_file() and entry.stat().st_mtime < cutoff:
+                os.remove(entry.path)
+        except OSError as e:
+            print(f"Could not remove expired output {entry.path}: {e}")
+
+
+def run_output_sweeper():
+    while True:
+        sweep_outputs()
+        job_events.discard_older_than(time.time() - OUTPUT_RETENTION)
+        job_traces.discard_older_than(time.time() - OUTPUT_RETENTION)
+        docx_renders.discard_older_than(time.time() - OUTPUT_RETENTION)
+        time.sleep(OUTPUT_SWEEP_INTERVAL)
 
 
+# Not in a spawned worker process that imported this module as its main script
+if multiprocessing.current_process().name == "MainProcess":
+    threading.Thread(target=run_output_sweeper, name="output-sweeper", daemon=True).start()
+
+
+def rule_section(role, resume_text, usage=None):
+    """Fill a section from the resume text without an LLM call.
+
+    Returns a finished section result when the extractor is confident enough
+    and its output fits the role's schema, or None to run the agent instead.
+    """
+    started = time.time()
+    try:
+        data, confidence = RULE_EXTRACTORS[role](resume_text)
+    except Exception as e:
+        print(f"Error extracting {role} with rules: {e}")
+        data, confidence = {}, 0.0
+    used = confidence >= RULES_MIN_CONFIDENCE and not schema_problems(data, SECTION_SCHEMAS[role], "")
+    metrics.inc("section_rules_total", role=role, result="used" if used else "fallback")
+    if usage is not None:
+        usage.span("rules", started, time.time() - started, role=role, confidence=round(confidence, 2), used=used)
+    return section_result(role, data) if used else None
+
+
+def build_agent(role, model):
+    """Create the agent for one section role running on the given model."""
+    return Agent(
+        role=role, verbose=CREW_VERBOSE, allow_delegation=False, llm=build_llm(model), **AGENT_DEFINITIONS[role]
+    )
+
+
+def build_section(role, prompts=SECTION_PROMPTS, guidance="", **values):
+    """Create the agent and task for one section, binding values into its prompt."""
+    agent = build_agent(role, MODEL_ROUTES[role][0])
+    prompt = prompts[role]
+    return Task(
+        description=prompt["description"].render(**values) + guidance,
+        agent=agent,
+        expected_output=prompt["expected_output"]
+    )
+
+
+def build_resume_section(role, resume_text, shortlist=(), target_role="", **values):
+    """Create one section's task from its slice of the resume; with a keyword shortlist, the keyword
+    sections choose from it, and with a target role the positioning sections are written for that role."""
+    guidance = ""
+    if target_role and role in POSITIONING_SECTIONS:
+        guidance = TARGET_ROLE_GUIDANCE.render(target_role=target_role)
+    if shortlist and role in TAILORED_SECTION_PROMPTS:
+        return build_section(role, TAILORED_SECTION_PROMPTS, guidance, keyword_shortlist=format_shortlist(shortlist))
+    return build_section(role, SECTION_PROMPTS, guidance, resume_text=resume_slice(resume_text, role), **values)
+
+
+def section_tailoring(role, shortlist=(), target_role=""):
+    """The values that tailor a section's prompt to a job, to keep in its cache key."""
+    parts = list(shortlist) if shortlist and role in TAILORED_SECTION_PROMPTS else []
+    if target_role and role in POSITIONING_SECTIONS:
+        parts.append(f"target role: {target_role}")
+    return parts
 
 
 @app.route('/')
 def home():
-    return render_template('index.html')
+    return render_template('index.html', layouts=layouts.values(), default_layout=DEFAULT_LAYOUT)
 
 @app.route('/process', methods=['POST'])
 def process_resume():
@@ -239,15 +943,15 @@ def process_resume():
     if not uploaded_file:
         return "No file uploaded", 400
 
+    # Turn anything that is not a DOCX or PDF away before parsing it
+    if sniff_resume_type(uploaded_file.stream) is None:
+        metrics.inc("upload_rejections_total", reason="unsupported")
+        return "Unsupported file type. Please upload a DOCX or PDF resume.", 415
+
     # Extract text from uploaded resume (support DOCX and PDF)
-    filename = (uploaded_file.filename or "").lower()
     try:
-        if filename.endswith('.pdf'):
-            # use stream for PdfReader
-            resume_text = extract_text_from_pdf(uploaded_file.stream)
-        else:
-            # assume docx for other uploads
-            resume_text = extract_text_from_docx(uploaded_file)
+        with timed_stage("extract"):
+            resume_text = extract_resume_text(uploaded_file.stream, uploaded_file.filename or "")
     except Exception as e:
         return f"Failed to extract text from uploaded file: {e}", 400
         
@@ -256,510 +960,1085 @@ def process_resume():
     if not openai_api_key:
         return "OpenAI API Key not found!", 500
 
-    # Define CrewAI agents
+    mode = request.form.get('mode', PIPELINE_MODE)
+    if mode not in PIPELINE_MODES:
+        return f"Unknown pipeline mode: {mode}", 400
 
-    # Agent to extract name, contact, location
-    name_generator = Agent(
-        role="Name Generator",
-        goal="Extract structured personal information from a resume in structured JSON format.",
-        backstory="An expert at reading resumes and identifying core personal information including name, location, phone number, email, and LinkedIn.",
-        model="gpt-4o",
-        verbose=True,
-        allow_delegation=False
-    )
+    # An optional target job posting the keyword sections are tailored to
+    job_posting = request.form.get('job_posting', '').strip()[:JOB_POSTING_MAX_CHARS]
 
-    # Agent to extract ATS-friendly keywords
-    keyword_generator = Agent(
-        role="Keyword Generator",
-        goal="Generate exactly four two-word, ATS-optimized keywords based on resume content, suitable for inclusion beneath the candidate's name on a resume.",
-        backstory="You are an expert resume keyword analyst trained in recruiting and Applicant Tracking Systems. You extract four distinct, high-impact, two-word phrases that summarize a candidate’s professional strengths and focus areas, tailored to the job title and experience level.",
-        model="gpt-4.1",
-        verbose=True,
-        allow_delegation=False
-    )
+    layout = request.form.get('layout') or DEFAULT_LAYOUT
+    if layout not in layouts:
+        return f"Unknown layout: {layout}", 400
 
-    summary_writer = Agent(
-        role="Summary Writer",
-        goal="Generate a concise 3-paragraph professional summary from resume content using a consistent, formulaic structure.",
-        backstory=(
-        "You are an expert in crafting ATS-optimized professional summaries that present candidates with clarity, structure, and strategic positioning. "
-        "Each summary must use a predefined 3-paragraph structure with consistent sentence patterns and word choice, reflecting the candidate's experience, communication strengths, and forward-looking value."  
-        ),
-        model="gpt-4.1",
-        verbose=True,
-        allow_delegation=False
+    # Hand the pipeline to the worker pool and return right away
+    job_id = job_queue.submit(
+        run_resume_pipeline, resume_text, mode, job_posting, layout,
+        inputs={"resume_text": resume_text, "mode": mode, "job_posting": job_posting, "layout": layout}
     )
+    if job_id is None:
+        metrics.inc("resume_jobs_total", status="rejected")
+        return Response(
+            "The server is busy processing other resumes. Please try again in a minute.", 503,
+            {"Retry-After": "30"}
+        )
+    return render_template('status.html', job_id=job_id, section_order=SECTION_ORDER), 202
+
+
+def run_resume_pipeline(
+    job_id, resume_text, mode=PIPELINE_MODE, job_posting="", layout=DEFAULT_LAYOUT, checkpoint=True,
+    target_role="", shared=None
+):
+    """Run the crew pipeline for one resume and return the compiled HTML preview.
+
+    mode is "multi" for one agent per section or "single" for one combined call.
+    With a job_posting, the keyword sections choose from phrases in the resume
+    ranked against it by keyword_index instead of reading the resume, and with
+    a target_role the positioning sections are written for that role.
+    With checkpoint, every finished section is saved with the job, and sections
+    saved by an earlier run of the same job are reused instead of run again.
+    shared maps sections already produced for this resume to their data (the
+    extraction sections of a variant); those are used as they are.
+    The resume text is cleaned and compacted first, and each agent reads its
+    slice of it. The sections are parsed once into the template context that
+    both outputs come from: the HTML preview is returned straight away, while
+    the DOCX is rendered in the chosen layout into the job's own output file on
+    the background pool. The context is saved with the job, so other layouts can
+    be rendered from it later without running the agents again.
+    """
+    usage = job_traces.start(job_id)
+    resume_text = prepare_resume_text(resume_text, usage)
+    finished = job_queue.store.sections(job_id) if checkpoint else {}
+    if finished:
+        print(f"Resuming job {job_id} with checkpointed sections: {', '.join(sorted(finished))}")
+        usage.span("checkpoint", time.time(), 0.0, sections=sorted(finished))
+        for role in finished:
+            metrics.inc("section_checkpoints_total", role=role, event="reused")
+    finished = {**(shared or {}), **finished}
+    shortlist = []
+    if job_posting:
+        with timed_stage("keywords", usage):
+            shortlist = keyword_index.rank(resume_text, job_posting)
+        if len(shortlist) < KEYWORD_SHORTLIST_MIN:
+            print(f"Only {len(shortlist)} keywords match the posting for job {job_id}; using the resume instead")
+            shortlist = []
+
+    def on_done(task):
+        if checkpoint:
+            checkpoint_section(job_id, task)
+        publish_section(job_id, task)
+
+    if mode == "single":
+        # The combined call's sections are checkpointed one at a time, so a run that stopped
+        # part-way leaves only some of them; the pass is reused only if every section was saved
+        if all(role in finished for role in SECTION_KEYS):
+            tasks = [section_result(role, finished[role]) for role in SECTION_KEYS]
+        else:
+            tasks = run_single_pass(resume_text, usage, shortlist)
+        for task in tasks:
+            on_done(task)
+    else:
+        tasks = run_section_agents(resume_text, usage, on_done, finished, shortlist, target_role)
+
+    with timed_stage("parse", usage):
+        context = build_context(tasks)
+    try:
+        save_job_context(job_id, context)
+    except OSError as e:
+        print(f"Could not save the context of job {job_id}: {e}")
+
+    # Final Validation and Render; a job resumed after the registry changed falls back to the default layout
+    layout = layout if layout in layouts else DEFAULT_LAYOUT
+    missing = missing_layout_keys(layout, context)
+    if missing:
+        print(f"⚠️ Missing fields in context: {missing}")
+        job_events.publish(job_id, "docx_failed", {"error": f"Missing resume sections: {', '.join(missing)}"})
+    else:
+        docx_renders.submit(job_id, render_job_docx, job_id, context, usage, layout)
+
+    # Build the HTML preview shown on the result page
+    with timed_stage("markdown", usage):
+        compiled_resume_html = markdown(format_resume_markdown(context))
+
+    seconds = time.time() - usage.started
+    metrics.observe("resume_pipeline_seconds", seconds, mode=mode)
+    metrics.observe("resume_cost_usd", usage.cost_usd, mode=mode)
+    pipeline_report.record(mode, seconds, usage)
+    logger.info(json.dumps({"event": "resume_trace", "mode": mode, "seconds": round(seconds, 3), **usage.trace()}))
+    return compiled_resume_html
+
+
+def render_job_docx(job_id, context, usage=None, layout=DEFAULT_LAYOUT):
+    """Render a job's DOCX (on the render pool) and announce it on the job's event stream."""
+    with timed_stage("render_docx", usage):
+        rendered = render_new_format(context, job_output_path(job_id), layout)
+    if rendered:
+        print(f"✅ Resume rendered and saved for job {job_id}")
+        job_events.publish(job_id, "docx", {})
+    else:
+        job_events.publish(job_id, "docx_failed", {"error": "The resume could not be rendered"})
+    return rendered
+
+
+def run_section_agents(resume_text, usage, on_done=None, finished=None, shortlist=(), target_role=""):
+    """Run one agent per resume section and return their finished tasks.
+
+    on_done(task) is called as soon as each section finishes. finished maps the
+    roles an earlier run of the job already produced to their data; those are
+    reused as they are. Sections the rules in RULE_EXTRACTORS can read
+    confidently never reach an agent either. A keyword shortlist goes to the
+    sections in TAILORED_SECTION_PROMPTS in place of the resume, and a
+    target_role to the POSITIONING_SECTIONS.
+    """
+    finished = finished or {}
+    ready = [section_result(role, data) for role, data in finished.items() if role in SECTION_KEYS]
+    for role in RULE_EXTRACTORS:
+        if role not in finished:
+            result = rule_section(role, resume_text, usage)
+            if result is not None:
+                ready.append(result)
+    if on_done is not None:
+        for result in ready:
+            on_done(result)
+    ready_roles = {result.agent.role for result in ready}
+
+    tasks = {
+        role: build_resume_section(role, resume_text, shortlist, target_role)
+        for role in ["Achievements Writer"] + INDEPENDENT_SECTIONS if role not in ready_roles
+    }
+
+    # Run the sections. Everything except the Job Description Writer is independent,
+    # so it fans out on a thread pool; the experience task only waits for achievements.
+    with ThreadPoolExecutor(max_workers=SECTION_WORKERS) as executor:
+        futures = {
+            role: executor.submit(
+                run_section, task.agent, task,
+                section_cache_key(resume_text, task.agent, *section_tailoring(role, shortlist, target_role)),
+                usage, on_done
+            )
+            for role, task in tasks.items()
+        }
 
-    expertise_writer = Agent(
-        role="Areas of Expertise Writer",
-        goal="Generate 9 expertise keywords in 3x3 format without repeating top ATS keywords in structured JSON format.",
-        backstory="An expert in resume writing and applicant tracking systems. Selects precise, two-word industry phrases that reflect a candidate’s most relevant weekly-used strengths, avoiding redundancy with other keyword sections.",
-        model="gpt-4.1",
-        verbose=True,
-        allow_delegation=False
-    )
+        # Extract and clean the achievements text
+        try:
+            if "Achievements Writer" in futures:
+                futures["Achievements Writer"].result()
+            achievement_task = next(
+                task for task in ready + list(tasks.values()) if task.agent.role == "Achievements Writer"
+            )
+            achievement_output_text = "\n".join(
+                [item["text"] for item in section_data(achievement_task).get("notable_achievements", [])]
+            )
+        except Exception as e:
+            print(f"Error parsing achievement output: {e}")
+            achievement_output_text = ""
+
+        # The experience task needs the achievements text, so it is built last
+        if "Job Description Writer" not in ready_roles:
+            experience_task = tasks["Job Description Writer"] = build_resume_section(
+                "Job Description Writer", resume_text, shortlist, target_role,
+                achievement_output_text=achievement_output_text
+            )
+            futures["Job Description Writer"] = executor.submit(
+                run_section, experience_task.agent, experience_task,
+                section_cache_key(
+                    resume_text, experience_task.agent, achievement_output_text,
+                    *section_tailoring("Job Description Writer", shortlist, target_role)
+                ),
+                usage, on_done
+            )
 
-    achievement_writer = Agent(
-        role="Achievements Writer",
-        goal=(
-            "Craft 3–5 professional achievement bullets with measurable outcomes using strong verbs and domain-specific keywords. "
-            "Each achievement must include the company or organization where it occurred, as mentioned in the resume. "
-            "If no company can be determined, do not mention the company."
-        ),
-        backstory=(
-            "You are an expert in resume writing, specializing in turning work experience into high-impact, quantifiable bullet points. "
-            "You understand resume tone, industry nuance, and how to highlight both leadership and collaborative achievements with precision. "
-            "You only attribute achievements to companies explicitly found in the resume. "
-            "You always follow strict formatting rules."
-        ),
-        model="gpt-4.1",
-        verbose=True,
-        allow_delegation=False
-    )
+        for future in futures.values():
+            try:
+                future.result()
+            except Exception as e:
+                print(f"Error running section: {e}")
 
+    return ready + list(tasks.values())
 
-    experience_writer = Agent(
-        role="Job Description Writer",
-        goal=(
-            "Craft concise, structured job experience entries with professional responsibilities and achievements from resume data. "
-            "Summarize core responsibilities and factual achievements without fabricating or repeating metrics. "
-            "If numeric results or specific outcomes are not present, describe the impact qualitatively (e.g., 'improved process efficiency')."
-        ),
-        backstory=(
-            "You are an expert resume editor who writes ATS-optimized experience sections. "
-            "You always preserve factual accuracy and avoid duplication. "
-            "You must never make up achievements, metrics, or company details. "
-            "Each description must sound professional, concise, and entirely supported by the source resume."
-        ),
-        model="gpt-4.1",
-        verbose=True,
-        allow_delegation=False
-    )
 
-    additional_exp_writer = Agent(
-        role="Additional Experience Writer",
-        goal="Return earlier work experience entries in structured JSON format.",
-        backstory="Summarizes older work experience in a clean, compact structure including company, location, title, and dates.",
-        model="gpt-4.1",
-        verbose=True,
-        allow_delegation=False
+def run_extraction_sections(resume_text, usage):
+    """Produce the EXTRACTION_SECTIONS of a resume once, to share across its variants.
+
+    Returns a dict of role to section data; a section that could not be
+    produced is left out and runs again with each variant.
+    """
+    shared = {}
+    tasks = {}
+    for role in EXTRACTION_SECTIONS:
+        result = rule_section(role, resume_text, usage) if role in RULE_EXTRACTORS else None
+        if result is not None:
+            shared[role] = section_data(result)
+        else:
+            tasks[role] = build_resume_section(role, resume_text)
+    with ThreadPoolExecutor(max_workers=SECTION_WORKERS) as executor:
+        futures = [
+            executor.submit(run_section, task.agent, task, section_cache_key(resume_text, task.agent), usage)
+            for task in tasks.values()
+        ]
+        for future in futures:
+            try:
+                future.result()
+            except Exception as e:
+                print(f"Error running section: {e}")
+    for role, task in tasks.items():
+        data = section_data(task)
+        if data:
+            shared[role] = data
+    return shared
+
+
+def section_result(role, data):
+    """Wrap parsed section data so it looks like a finished task of that role."""
+    return SimpleNamespace(
+        agent=SimpleNamespace(role=role),
+        output=TaskOutput(description=role, raw=json.dumps(data), agent=role, json_dict=data)
     )
 
 
-    education_writer = Agent(
-        role="Education Writer",
-        goal="Extract and return education entries in structured JSON format.",
-        backstory="An expert in parsing and formatting educational history for professional resumes.",
-        model="gpt-4.1",
-        verbose=True,
-        allow_delegation=False
-    )
+def run_single_pass(resume_text, usage, shortlist=()):
+    """Produce every resume section from one combined LLM call.
 
- #   cert_writer = Agent(
- #       role="Certifications Writer",
- #       goal="Extract and return certification entries in structured JSON format.",
- #       backstory="Specialist in identifying and formatting certifications and credentials from resumes.",
- #       model="gpt-4.1",
- #       verbose=True,
- #       allow_delegation=False
- #   )
-    
-    # Run Achievements Writer first
-    achievement_task = Task(
-        description=(
-                f"Using the resume content below (delimited by < >), write 3–5 bullet points "
-                f"describing notable professional achievements.\n\n"
-                f"❗ STRICT RULES ❗\n"
-                f"- Each achievement must include the company or organization where it occurred, as mentioned in the resume. "
-                f"- If no company can be determined, do not mention the company.\n"
-                f"- Do not invent, infer, or estimate any metrics, outcomes, or achievements.\n"
-                f"- Only use information explicitly present in the resume text.\n"
-                f"- If no numeric data is provided, describe impact qualitatively (e.g., 'enhanced efficiency', 'streamlined workflow').\n"
-                f"- Each bullet must be exactly one sentence, no more than 30 words, impactful, and written in active voice.\n"
-                f"- Begin with a strong action verb (e.g., Spearheaded, Delivered, Improved).\n"
-                f"- Avoid pronouns, filler words, adverbs, and passive constructions.\n"
-                f"- Limit 'and' to two uses per bullet (use 'as well as' or 'in addition to' if needed).\n\n"
-                f"Resume:\n<{resume_text}>\n\n"
-                f"Tailor each bullet precisely to the resume’s content and role."
-            ),
-        agent=achievement_writer,
-        expected_output=(
-                "Return a JSON object with this structure:\n"
-                "{\n"
-                '  "notable_achievements": [\n'
-                '        {"text": "Improved lead generation by 150% across nine websites through the deployment of AI and A/B testing tools, resulting in four successful campaign implementations within six months at Ingersoll Rand."},\n'
-                '        {"text": "Identified inefficiencies within support team workflows and proposed process improvements that increased resolution speed, reduced errors, and strengthened team performance across multiple community support functions."}\n'
-                '        {"text": "Increased prospects and customers database from 100,000 to 800,000 within one year by utilizing both external and internal channels, significantly boosting marketing outreach and engagement."}\n'
-                "  ]\n"
-                "}\n\n"
-                "Only return the JSON. Do not include commentary, headers, or formatting."
-            )
-    )
+    The combined JSON is split back into one result per section role, so the
+    rest of the pipeline treats it exactly like the multi-agent output.
+    """
+    guidance = KEYWORD_GUIDANCE.render(keyword_shortlist=format_shortlist(shortlist)) if shortlist else ""
+    resume_task = build_section("Resume Writer", resume_text=resume_text, keyword_guidance=guidance)
+    run_section(resume_task.agent, resume_task, section_cache_key(resume_text, resume_task.agent, *shortlist), usage)
 
-    # Run a mini crew just for this task
-    achievement_crew = Crew(agents=[achievement_writer], tasks=[achievement_task], verbose=True)
-    achievement_result = achievement_crew.kickoff()
-    # Extract and clean the text
-    try:
-        raw = str(achievement_result)
-        cleaned = clean_json_block(raw)
-        achievement_data = json.loads(cleaned)
-        achievement_output_text = "\n".join(
-            [item["text"] for item in achievement_data.get("notable_achievements", [])]
-        )
-    except Exception as e:
-        print(f"Error parsing achievement output: {e}")
-        achievement_output_text = ""
-
-    # Define tasks
-    tasks = [
-
-        Task(
-            description=(
-                f"Extract the following fields from the resume delimited by < >:\n"
-                f"1. Full Name\n"
-                f"2. Location (City, State)\n"
-                f"3. Phone Number\n"
-                f"4. Email Address\n"
-                f"5. LinkedIn URL. Omit https://www.\n\n"
-                f"Resume:\n<{resume_text}>"
-            ),
-            agent=name_generator,
-            expected_output=(
-                "Return a JSON object with the following keys:\n"
-                "{\n"
-                '  "full_name": "Jasmine Taylor",\n'
-                '  "location": "New York, NY",\n'
-                '  "phone": "555-123-4567",\n'
-                '  "email": "jasmine@example.com",\n'
-                '  "LinkedIn": "linkedin.com/in/jasminetaylor"\n'
-                "}"
-            )
-        ),
-
-        Task(
-            description=(         
-                f"Read the resume below (delimited by < >) and extract the top four (4) two-word keywords optimized for Applicant Tracking Systems (ATS).\n" 
-                f"Resume:\n<{resume_text}>\n\n"
-                f"OUTPUT RULES:\n"
-                f"• No repeated concepts, soft skills, or personal traits.\n"
-                f"• Use ampersands (&) only when standard (e.g., Risk & Compliance).\n"
-                f"• These should be skills or phrases that match professional strengths and job market terminology.\n"
-                f"• Match terms to job level and job description keywords."
-                
-            ),
-            agent=keyword_generator,
-            expected_output=(
-                "Return a JSON list of exactly 4 strings, like this:\n"
-                " {\n"
-                ' "top_keywords": [\n'
-                '       "keyword 1", "keyword 2", "keyword 3", "keyword 4"\n'
-                "   ]\n"
-                "}"
-            )
-        ),
-
-        Task(
-            description=(
-                f"Read the resume below (delimited by < >) and write a concise 3-paragraph professional summary.\n"
-                f"Resume:\n<{resume_text}>\n\n"
-                f"Follow this structure:\n"
-                f"Each paragraph should follow a three-sentence structure.\n\n"
-                f"Tailor each paragraph to the job.\n\n"
-                f"Pick descriptor, role noun, soft skills / traits, missions, and impacts from the predefined lists below that align with their most recent job.\n\n"
-                f"Resume:\n<{resume_text}>"
-                f"Paragraph 1 – Experience & Impact:\n"
-                f"{{Descriptor 1}} and {{Descriptor 2}} {{Role Noun}} offering {{Years}}+ years of experience {{Action 1}}, {{Action 2}}, and {{Action 3}} in {{Industry/Function}}.\n\n"
-                f"Paragraph 2 – Influence & Communication:\n"
-                f"{{Descriptor 1}} and {{Descriptor 2}} {{Role Noun}} skilled at {{Soft Skill A}}, {{Soft Skill B}}, and {{Outcome}} using {{Trait A}}, {{Trait B}}, and {{Trait C}}.\n\n"
-                f"Paragraph 3 – Forward Value & Mission:\n"
-                f"{{Descriptor 1}} and {{Descriptor 2}} {{Role Noun}} focused on {{Mission A}}, {{Mission B}}, and {{Mission C}} by {{How they do it}}, delivering {{Impact}}.\n\n"
-                f"Use random sampling from the following predefined lists:\n"
-                f"- Descriptor examples: strategic, collaborative, detail-oriented, visionary, innovative, adaptable, people-focused, entrepreneurial, composed, solutions-oriented, future-facing\n"
-                f"- Nouns (Role) examples: leader, problem solver, collaborator, communicator,expert, strategist, business partner, relationship builder\n"
-                f"- Soft Skills / Traits examples: conflict resolution, storytelling ability, cultural awareness, growth mindset, calm under pressure, adaptability, strategic insight, hands-on approach\n"
-                f"- Missions examples: improving access, driving sustainability, transforming service delivery\n"
-                f"- Impacts examples: global health, community growth, team cohesion, policy change\n\n"
-                f"Each paragraph must be exactly one sentence, 25–30 words."
-            ),
-            agent=summary_writer,
-            expected_output=(
-                "Return a JSON object with the following structure:\n\n"
-                "{\n"
-                '  "summaries": [\n'
-                '    "Paragraph 1",\n'
-                '    "Paragraph 2",\n'
-                '    "Paragraph 3"\n'
-                "  ]\n"
-                "}\n\n"
-                "Ensure each paragraph is complete, ATS-friendly, and aligned with modern resume standards."
-            )
-        ),
-
-        Task(
-            description=(
-                f"From the resume below, generate 9 two-word unique 'Areas of Expertise' keyword phrases arranged for visual formatting in 3 columns and 3 rows.\n "
-                f"Resume:\n<{resume_text}>\n\n"
-                f"Do not repeat the top keywords already used earlier. Keep all keywords concise and resume-appropriate.\n"
-                f"All phrases should reflect weekly-used, high-signal competencies.\n"
-                f"Maintain balance across technical, strategic, and operational skills.\n"
-                f"Only use two-word phrases that would appear in real job descriptions or LinkedIn.\n"
-            
-            ),
-            agent=expertise_writer,
-            expected_output=(
-                "Return a JSON object like this:\n"
-                '{\n'
-                '  "expertise_keywords": [\n'
-                '    "Keyword 1", "Keyword 2", "Keyword 3",\n'
-                '    "Keyword 4", "Keyword 5", "Keyword 6",\n'
-                '    "Keyword 7", "Keyword 8", "Keyword 9"\n'
-                '  ]\n'
-                '}\n\n'
-                "Only include keyword phrases. No explanations, no formatting, no column titles."
-            )
-        ),
-
-        Task(
-            description=(
-                f"Use the resume below (delimited by < >) to write structured job descriptions for the 3 most recent roles.\n"
-                f"Resume:\n<{resume_text}>\n"
-                f"Notable achievements already covered by another agent are provided below. "
-                f"DO NOT repeat, rephrase, or reword any of them.\n\n"
-                f"Previously listed achievements:\n<{achievement_output_text}>\n\n"
-                f"For each role, return:\n"
-                f"• Company name\n"
-                f"• Location (City, State or Country)\n"
-                f"• Title\n"
-                f"• Dates of employment\n"
-                f"• 3-sentence paragraph (≤50 words) describing ONLY responsibilities — factual, recurring duties, no metrics or achievements\n"
-                f"• 1–4 achievement bullet points using this structure:\n"
-                f"    {{\"label\": \"Verb\", \"text\": \"achievement text with measurable or qualitative outcome\"}}\n\n"
-                f"DESCRIPTION RULES:\n"
-                f"• Begin with a high-level task summary\n"
-                f"• Next two sentences describe recurring responsibilities using action verbs\n"
-                f"ACHIEVEMENT RULES:\n"
-                f"• 1–4 bullets per role\n"
-                f"• Each bullet starts with a label verb (e.g., \"Led\", \"Supervised\", \"Directed\", \"Oversaw\", \"Managed\", \"Orchestrated\", \"Held full accountability\", \"Delivered\",  \"Drove\" )\n"
-                f"• Use short, strong phrasing\n"
-                f"• Do NOT invent, infer, or estimate any metrics or accomplishments.\n"
-                f"• Do NOT copy or paraphrase achievements listed earlier.\n"
-                f"• If the resume lacks quantifiable results, describe the impact qualitatively.\n"
-                f"• Avoid generic filler (e.g., 'responsible for', 'various duties').\n"
-                f"• Use strong action verbs, concise phrasing, and clear structure.\n"
-                f"• Keep tone factual, not promotional.\n"
-            ),
-            agent=experience_writer,
-            expected_output=(
-                "Return a JSON object with the following structure:\n\n"
-                "{\n"
-                '  "experience": [\n'
-                "    {\n"
-                '      "company": "Company Name",\n'
-                '      "location": "City, State",\n'
-                '      "title": "Job Title",\n'
-                '      "dates": "Start Year-End Year or Present",\n'
-                '      "description": "Three-sentence responsibility paragraph here (≤50 words).",\n'
-                '      "achievements": [\n'
-                '        {"label": "Led", "text": "achievement with metric or qualitative outcome."},\n'
-                '        ...\n'
-                '      ]\n'
-                "    },\n"
-                "    ...\n"
-                "  ]\n"
-                "}"
-            )
-        ),
-
-        Task(
-            description=(
-                f"From the resume below (delimited by < >), extract earlier/older work experience entries (not among the most recent 3 roles). "
-                f"If resume has only 3 roles, leave this section blank. Do not make up any information. "
-                f"For each job, return:\n"
-                f"- Company name\n"
-                f"- Location (City, State)\n"
-                f"- Job Title\n"
-                f"- Dates of Employment\n\n"
-                f"Resume:\n<{resume_text}>"
-            ),
-            agent=additional_exp_writer,
-            expected_output=(
-                "Return a JSON object in the following structure:\n\n"
-                "{\n"
-                '  "earlier_experience": [\n'
-                "    {\n"
-                '      "company": "Duke University",\n'
-                '      "location": "Durham, North Carolina",\n'
-                '      "title": "Project Coordinator (Time-Limited Grant)",\n'
-                '      "dates": "Jan 2011 – Jan 2012"\n'
-                "    },\n"
-                "    ...\n"
-                "  ]\n"
-                "}\n\n"
-                "Do not include responsibilities, bullet points, or extra commentary — just the structured entries."
-            )
-        ),
-
-        Task(
-            description=(
-                f"From the resume below (delimited by < >), extract all education and all professional certifications entries. "
-                f"For each entry, return:\n"
-                f"- Institution name\n"
-                f"- Credential (e.g. degree, diploma)\n\n"
-                f"Resume:\n<{resume_text}>"
-            ),
-            agent=education_writer,
-            expected_output=(
-                "Return a JSON object with this structure:\n\n"
-                "{\n"
-                '  "education": [\n'
-                "    {\n"
-                '      "institution": "Harvard University",\n'
-                '      "credential": "Master of Business Administration"\n'
-                "    },\n"
-                "    ...\n"
-                "  ]\n"
-                "}"
-            )
-        ),
-
- #       Task(
- #           description=(
- #               f"From the resume below (delimited by < >), extract all professional certifications. "
- #               f"Do not include Education or University degrees in this section. "
- #               f"For each entry, return:\n"
- #               f"- Institution (e.g. issuing organization)\n"
- #               f"- Location (e.g. Online or city)\n"
- #               f"- Credential (e.g. certificate title)\n\n"
- #               f"Resume:\n<{resume_text}>"
- #           ),
- #           agent=cert_writer,
- #           expected_output=(
- #               "Return a JSON object with this structure:\n\n"
- #               "{\n"
- #               '  "certifications": [\n'
- #               "    {\n"
- #               '      "institution": "Project Management Institute",\n'
- #               '      "location": "Online",\n'
- #               '      "credential": "Project Management Professional (PMP)"\n'
- #               "    },\n"
- #               "    ...\n"
- #               "  ]\n"
- #               "}"
- #           )
- #       )
+    data = section_data(resume_task)
+
+    return [
+        section_result(role, {key: data[key] for key in keys if key in data})
+        for role, keys in SECTION_KEYS.items()
+        if any(key in data for key in keys)
     ]
 
 
-    # Run the crew
-    crew = Crew(agents=[name_generator, keyword_generator, summary_writer, expertise_writer, 
-        achievement_writer, experience_writer, additional_exp_writer, education_writer
-    ], tasks=tasks, verbose=True)
-    
-    result = crew.kickoff()
-
-    # ---------------------------------------------------------------
-    # Inject the Achievements Writer task (from mini crew) into final results
-    # This ensures the "Notable Achievements" section appears in the output.
-    # ---------------------------------------------------------------
-    achievement_task.output = achievement_result  # attach mini-crew output
-    crew.tasks.insert(0, achievement_task)        # add at the top of the task list
-    # ---------------------------------------------------------------
-    # Reorder tasks so Achievements come after Areas of Expertise
-    # ---------------------------------------------------------------
-    def sort_key(task):
-        order = {
-            "Name Generator": 1,
-            "Keyword Generator": 2,
-            "Summary Writer": 3,
-            "Areas of Expertise Writer": 4,
-            "Achievements Writer": 5,          # 👈 place it right after expertise
-            "Job Description Writer": 6,
-            "Additional Experience Writer": 7,
-            "Education Writer": 8,
-            "Certifications Writer": 9
-        }
-        return order.get(getattr(task.agent, "role", ""), 99)
+@app.route('/jobs/<job_id>')
+def job_status(job_id):
+    """Report the status of a queued resume job as JSON."""
+    job = job_queue.store.get(job_id)
+    if job is None:
+        return {"error": "Job not found"}, 404
+    payload = {
+        "job_id": job_id,
+        "status": job["status"],
+        "created": job["created"],
+        "updated": job["updated"],
+        "error": job["error"],
+        "attempts": job["attempts"],
+        "sections": sorted(job_queue.store.sections(job_id)),
+    }
+    if job["status"] == JOB_DONE:
+        payload["result_url"] = url_for('job_result', job_id=job_id)
+        payload["pdf_url"] = url_for('download_pdf', job_id=job_id)
+        payload["docx"] = docx_status(job_id)
+        if payload["docx"] == "ready":
+            payload["download_url"] = url_for('download_new_format', job_id=job_id)
+    return payload
+
+
+@app.route('/jobs')
+def job_history():
+    """List recent jobs, newest first; ?status= filters by state and ?limit= caps the count."""
+    status = request.args.get('status') or None
+    try:
+        limit = min(max(int(request.args.get('limit', '50')), 1), 500)
+    except ValueError:
+        return {"error": "limit must be a number"}, 400
+    jobs = job_queue.store.history(limit, status)
+    for job in jobs:
+        job["status_url"] = url_for('job_status', job_id=job["job_id"])
+        job["result_url"] = url_for('job_result', job_id=job["job_id"])
+    return {"jobs": jobs}
+
+
+@app.route('/jobs/<job_id>/retry', methods=['POST'])
+def retry_job(job_id):
+    """Run a failed or incomplete resume job again; sections it already finished are reused, not rerun."""
+    job = job_queue.store.get(job_id)
+    if job is None:
+        return {"error": "Job not found"}, 404
+    incomplete = job["status"] == JOB_DONE and set(SECTION_KEYS) - set(job_queue.store.sections(job_id))
+    if job["status"] != JOB_FAILED and not incomplete:
+        return {"error": f"Only failed or incomplete jobs can be retried; this one is {job['status']}"}, 409
+    inputs = job_queue.store.inputs(job_id)
+    if not inputs:
+        return {"error": "This job cannot be retried"}, 409
+    if job["attempts"] >= JOB_MAX_ATTEMPTS:
+        return {"error": f"This job has already been tried {job['attempts']} times"}, 409
+    if not job_queue.requeue(
+        job_id, run_resume_pipeline, inputs["resume_text"], inputs["mode"], inputs.get("job_posting", ""),
+        inputs.get("layout", DEFAULT_LAYOUT)
+    ):
+        metrics.inc("resume_jobs_total", status="rejected")
+        return {"error": "The server is busy. Please try again in a minute."}, 503, {"Retry-After": "30"}
+    return {
+        "job_id": job_id,
+        "status": JOB_QUEUED,
+        "status_url": url_for('job_status', job_id=job_id),
+        "result_url": url_for('job_result', job_id=job_id),
+    }, 202
+
+
+def recover_stale_jobs():
+    """Resume the jobs whose worker died or was killed before finishing them.
+
+    Only the sections missing from their checkpoints are run again. Jobs that
+    cannot be resumed (batches, or too many attempts) are marked failed.
+    """
+    for job_id in job_queue.store.claim_stale(time.time() - JOB_STALE_SECONDS):
+        job = job_queue.store.get(job_id)
+        inputs = job_queue.store.inputs(job_id)
+        if not inputs or job["attempts"] >= JOB_MAX_ATTEMPTS:
+            job_queue.store.update(job_id, status=JOB_FAILED, error="The job stopped before it finished")
+        elif job_queue.requeue(
+            job_id, run_resume_pipeline, inputs["resume_text"], inputs["mode"], inputs.get("job_posting", ""),
+            inputs.get("layout", DEFAULT_LAYOUT)
+        ):
+            print(f"Resuming job {job_id} after its worker stopped")
+        else:
+            # Left without an owner, so it is claimed again after another JOB_STALE_SECONDS
+            print(f"No free worker to resume job {job_id}")
+
+
+def run_job_recovery():
+    while True:
+        try:
+            recover_stale_jobs()
+            job_queue.store.discard_older_than(time.time() - JOB_HISTORY_RETENTION)
+        except Exception as e:
+            print(f"Error recovering jobs: {e}")
+        time.sleep(OUTPUT_SWEEP_INTERVAL)
 
-    crew.tasks.sort(key=sort_key)
 
-    compiled_resume_text = ""
-    for task in crew.tasks:
-        if hasattr(task, 'output'):
-            compiled_resume_text += f"\n\n{task.output}"
+def run_job_heartbeat():
+    while True:
+        time.sleep(JOB_HEARTBEAT_SECONDS)
+        try:
+            job_queue.store.heartbeat(job_queue.owner)
+        except Exception as e:
+            print(f"Error sending the job heartbeat: {e}")
 
-    # Clean up the compiled resume text
-    try:
-        # Load template
-        template_path = os.path.join(os.path.dirname(__file__), 'templates', 'TraditionalFormat.docx')
-        doc = DocxTemplate("templates/TraditionalFormat.docx")
-        context = {}
-
-        # Extract Data from Crew Tasks
-        for task in crew.tasks:
-            if hasattr(task, 'output') and task.output:
-                raw = (
-                    getattr(task.output, 'raw_output', None)
-                    or getattr(task.output, 'value', None)
-                    or str(task.output)
-                )
-                cleaned = clean_json_block(raw)
 
-                try:
-                    parsed = json.loads(cleaned)
-                    if isinstance(parsed, dict):
-                        context.update(parsed)
-                    elif isinstance(parsed, list) and task.agent.role == "Keyword Generator":
-                        context["top_keywords"] = parsed
-                except Exception as e:
-                    print(f"❌ Could not parse output from {task.agent.role}:\n{cleaned[:300]}\nError: {e}")
+if multiprocessing.current_process().name == "MainProcess":
+    threading.Thread(target=run_job_heartbeat, name="job-heartbeat", daemon=True).start()
+    threading.Thread(target=run_job_recovery, name="job-recovery", daemon=True).start()
+
 
- 
-        # Optional sections
-        for key in ["earlier_experience", "education", "certifications"]:
-            context[key] = context.get(key, [])
+@app.route('/layouts')
+def list_layouts():
+    """List the resume layouts a request can pick, with the context keys each one reads."""
+    return {
+        "default": DEFAULT_LAYOUT,
+        "layouts": [
+            {key: layout[key] for key in ("name", "title", "description", "keys", "required")}
+            for layout in layouts.values()
+        ],
+    }
 
-        # Final Validation and Render
-        required_keys = ["experience", "earlier_experience", "education", "certifications"]
-        missing = [k for k in required_keys if k not in context]
+
+@app.route('/jobs/<job_id>/layouts', methods=['POST'])
+def render_job_layouts(job_id):
+    """Render a finished resume into every layout (or each ?layout= given) at once.
+
+    The context saved with the job is rendered as it is, so no agent runs
+    again; a layout already rendered from the current context is reused.
+    """
+    names = request.args.getlist('layout') or list(layouts)
+    unknown = [name for name in names if name not in layouts]
+    if unknown:
+        return {"error": f"Unknown layout: {', '.join(unknown)}"}, 400
+    try:
+        context = load_job_context(job_id)
+    except Exception as e:
+        print(f"Error loading context for layouts: {e}")
+        context = None
+    if context is None:
+        return {"error": "Resume not found or expired. Please process your resume again."}, 404
+
+    try:
+        saved = os.path.getmtime(job_output_path(job_id, "json"))
+    except OSError:
+        # The output sweeper removed the context after it was read
+        return {"error": "Resume not found or expired. Please process your resume again."}, 404
+    errors, outputs = {}, {}
+    for name in names:
+        path = job_output_path(job_id, f"{name}.docx")
+        missing = missing_layout_keys(name, context)
         if missing:
-            print(f"⚠️ Missing fields in context: {missing}")
+            errors[name] = f"Missing resume sections: {', '.join(missing)}"
+            continue
+        try:
+            current = os.path.getmtime(path) >= saved
+        except OSError:
+            current = False
+        if current:
+            errors[name] = None
         else:
-            output_path = os.path.join(os.path.dirname(__file__), 'Final_Resume.docx')
-            doc.render(context)
-            doc.save(output_path)
-            print("✅ Resume rendered and saved as Final_Resume.docx")
+            outputs[name] = path
+    if outputs:
+        rendered = layout_renderer.render(context, outputs, LAYOUT_TIMEOUT)
+        if rendered is None:
+            return {"error": "The server is busy. Please try again in a moment."}, 503, {"Retry-After": "10"}
+        errors.update(rendered)
+
+    results = {}
+    for name in names:
+        if errors[name]:
+            results[name] = {"status": "failed", "error": errors[name]}
+        else:
+            results[name] = {
+                "status": "ready", "download_url": url_for('download_new_format', job_id=job_id, layout=name)
+            }
+    return {"job_id": job_id, "layouts": results}
+
+
+class KeyedLocks:
+    """One lock per key, made on first use and dropped once nothing holds or waits for it."""
+
+    def __init__(self):
+        self._locks = {}
+        self._guard = threading.Lock()
+
+    @contextlib.contextmanager
+    def hold(self, key):
+        with self._guard:
+            entry = self._locks.setdefault(key, [threading.Lock(), 0])
+            entry[1] += 1
+        try:
+            with entry[0]:
+                yield
+        finally:
+            with self._guard:
+                entry[1] -= 1
+                if not entry[1]:
+                    del self._locks[key]
+
+
+# Edits to one resume are read, patched and saved one at a time, so two never overwrite each other
+context_edit_locks = KeyedLocks()
+
 
+@app.route('/jobs/<job_id>/context')
+def job_context(job_id):
+    """Return a finished resume's template context, the document an edit is patched against."""
+    try:
+        context = load_job_context(job_id)
     except Exception as e:
-        print(f"Error processing template: {e}")
+        print(f"Error loading context: {e}")
+        context = None
+    if context is None:
+        return {"error": "Resume not found or expired. Please process your resume again."}, 404
+    return {"job_id": job_id, "context": context}
+
+
+@app.route('/jobs/<job_id>/context', methods=['PATCH'])
+def edit_job_context(job_id):
+    """Apply a JSON patch to a finished resume and render its DOCX and HTML preview again.
+
+    The body is a list of RFC 6902 operations against the context, such as
+    {"op": "replace", "path": "/full_name", "value": "Jane Doe"} or
+    {"op": "move", "from": "/notable_achievements/2", "path": "/notable_achievements/0"}.
+    No agent runs: the edited context is saved in place of the old one and
+    rendered in the job's layout, and the preview is rebuilt from it.
+    """
+    job = job_queue.store.get(job_id)
+    if job is not None and job["status"] != JOB_DONE:
+        return {"error": f"Only finished resumes can be edited; this one is {job['status']}"}, 409
+    layout = ((job_queue.store.inputs(job_id) if job is not None else None) or {}).get("layout", DEFAULT_LAYOUT)
+    layout = layout if layout in layouts else DEFAULT_LAYOUT
+    operations = request.get_json(force=True, silent=True)
+
+    started = time.time()
+    with context_edit_locks.hold(job_id):
+        try:
+            context = load_job_context(job_id)
+        except Exception as e:
+            print(f"Error loading context: {e}")
+            context = None
+        if context is None:
+            return {"error": "Resume not found or expired. Please process your resume again."}, 404
+        try:
+            context = apply_json_patch(context, operations)
+            if not isinstance(context, dict):
+                raise ValueError("The edited resume must still be a JSON object")
+            problems = schema_problems(context, CONTEXT_SCHEMA, "context")
+            problems += [f"context.{key} is required by the layout" for key in missing_layout_keys(layout, context)]
+            if problems:
+                raise ValueError("; ".join(problems))
+        except ValueError as e:
+            metrics.inc("context_edits_total", result="invalid")
+            return {"error": str(e)}, 400
+        try:
+            save_job_context(job_id, context)
+        except OSError as e:
+            metrics.inc("context_edits_total", result="failed")
+            return {"error": f"Could not save the edit: {e}"}, 500
+
+        # Queued in the order the edits were saved; a job's renders run one after another
+        render = docx_renders.submit(job_id, render_job_docx, job_id, context, None, layout)
+        html = markdown(format_resume_markdown(context))
+        if job is not None:
+            job_queue.store.update(job_id, result=html)
+    metrics.inc("context_edits_total", result="applied")
+
+    try:
+        docx = "ready" if render.result(DOCX_WAIT) else "failed"
+    except FutureTimeoutError:
+        docx = "pending"
+    except Exception:
+        docx = "failed"
+
+    payload = {
+        "job_id": job_id,
+        "html": html,
+        "docx": docx,
+        "pdf_url": url_for('download_pdf', job_id=job_id),
+        "seconds": round(time.time() - started, 3),
+    }
+    if docx != "failed":
+        payload["download_url"] = url_for('download_new_format', job_id=job_id)
+    if job is not None:
+        payload["result_url"] = url_for('job_result', job_id=job_id)
+    return payload
+
+
+@app.route('/jobs/<job_id>/events')
+def job_event_stream(job_id):
+    """Stream a job's sections as Server-Sent Events while the pipeline runs.
+
+    Each stream closes after EVENT_STREAM_SECONDS; the browser reconnects with
+    the id of the last event it got (Last-Event-ID) and the stream resumes there.
+    """
+    if job_queue.store.get(job_id) is None:
+        return "Job not found.", 404
+    try:
+        resume_from = max(0, int(request.headers.get('Last-Event-ID', '0')))
+    except ValueError:
+        resume_from = 0
+
+    def server_sent_event(event, data, event_id=None):
+        event_line = f"id: {event_id}\n" if event_id is not None else ""
+        return f"{event_line}event: {event}\ndata: {json.dumps(data)}\n\n"
+
+    def stream():
+        sent = resume_from
+        opened = last_write = time.time()
+        done_sent = False
+        yield "retry: 2000\n\n"
+        while True:
+            # Read the status first so events published before it changed are still sent.
+            # A finished job's stream stays open until its DOCX render is over as well.
+            job = job_queue.store.get(job_id)
+            rendering = docx_renders.state(job_id) == "pending"
+            finished = job["status"] == JOB_FAILED or (job["status"] == JOB_DONE and not rendering)
+            events = job_events.wait(job_id, sent, 0 if finished else 1)
+            for event, data in events:
+                sent += 1
+                if event == "docx":
+                    data = {"download_url": url_for('download_new_format', job_id=job_id)}
+                yield server_sent_event(event, data, sent)
+            if job["status"] == JOB_DONE and not done_sent:
+                done_sent = True
+                yield server_sent_event("done", {
+                    "result_url": url_for('job_result', job_id=job_id),
+                    "pdf_url": url_for('download_pdf', job_id=job_id),
+                })
+            if job["status"] == JOB_FAILED:
+                yield server_sent_event("failed", {"error": job["error"]})
+                return
+            if finished:
+                # Tells the browser not to reconnect
+                yield server_sent_event("end", {})
+                return
+            if time.time() - opened > EVENT_STREAM_SECONDS:
+                return
+            if events:
+                last_write = time.time()
+            elif time.time() - last_write > 15:
+                last_write = time.time()
+                yield ": keep-alive\n\n"
 
+    return Response(
+        stream_with_context(stream()),
+        mimetype="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
 
-    # Return the template as before
-    compiled_resume_html = markdown(format_resume_markdown(crew.tasks))
-    return render_template('result.html', compiled_resume_html=compiled_resume_html)
+
+@app.route('/jobs/<job_id>/trace')
+def job_trace(job_id):
+    """Return a job's per-stage timings, token counts and estimated cost as JSON."""
+    usage = job_traces.get(job_id)
+    if usage is None:
+        return {"error": "Trace not found"}, 404
+    return usage.trace()
+
+
+@app.route('/jobs/<job_id>/result')
+def job_result(job_id):
+    """Show the formatted resume once its job has finished."""
+    job = job_queue.store.get(job_id)
+    if job is None:
+        return "Job not found.", 404
+    if job["status"] == JOB_FAILED:
+        return f"Resume processing failed: {job['error']}", 500
+    if job["status"] != JOB_DONE:
+        return render_template('status.html', job_id=job_id, section_order=SECTION_ORDER), 202
+    return render_template(
+        'result.html', compiled_resume_html=job["result"], job_id=job_id, docx_status=docx_status(job_id)
+    )
 
 
+# ---------------------------------------------------------------
+# Batch processing: many resumes per request (or from the batch.py CLI),
+# returned as one ZIP of DOCX files with a manifest.
+# ---------------------------------------------------------------
+# Shared by every batch in this process, so parallel batches never exceed BATCH_WORKERS resumes
+batch_executor = ThreadPoolExecutor(max_workers=BATCH_WORKERS, thread_name_prefix="resume-batch")
 
 
-@app.route('/download_new_format')
-def download_new_format():
+def spool(source):
+    """Copy a file object into a temporary file kept in memory up to UPLOAD_SPOOL_BYTES."""
+    spooled = tempfile.SpooledTemporaryFile(max_size=UPLOAD_SPOOL_BYTES, mode="w+b")
+    shutil.copyfileobj(source, spooled)
+    spooled.seek(0)
+    return spooled
+
+
+def batch_items(uploads):
+    """Turn uploaded files into (filename, file) pairs; ZIP uploads are unpacked.
+
+    Every resume is copied to its own spooled file, since the request's uploads
+    are closed before the batch runs. The ZIP directories are checked before
+    anything is extracted: a member larger than MAX_UPLOAD_BYTES, more than
+    BATCH_MAX_FILES resumes in all, or members adding up to more than
+    MAX_BATCH_UPLOAD_BYTES uncompressed raise ValueError.
+    """
+    # (filename, archive or None, ZIP member or upload stream) for every accepted resume
+    sources = []
+    uncompressed = 0
+    with contextlib.ExitStack() as archives:
+        for upload in uploads:
+            filename = upload.filename or ""
+            if not filename.lower().endswith('.zip'):
+                sources.append((filename, None, upload.stream))
+            else:
+                archive = archives.enter_context(zipfile.ZipFile(upload.stream))
+                for member in archive.infolist():
+                    name = os.path.basename(member.filename)
+                    if member.is_dir() or member.filename.startswith("__MACOSX/") or name.startswith("."):
+                        continue
+                    if not name.lower().endswith(BATCH_EXTENSIONS):
+                        continue
+                    if member.file_size > MAX_UPLOAD_BYTES:
+                        raise ValueError(
+                            f"{member.filename} is larger than {MAX_UPLOAD_BYTES // (1024 * 1024)} MB"
+                        )
+                    sources.append((member.filename, archive, member))
+                    uncompressed += member.file_size
+            if len(sources) > BATCH_MAX_FILES:
+                raise ValueError(f"A batch may contain at most {BATCH_MAX_FILES} resumes")
+            if uncompressed > MAX_BATCH_UPLOAD_BYTES:
+                raise ValueError(
+                    f"The resumes add up to more than {MAX_BATCH_UPLOAD_BYTES // (1024 * 1024)} MB uncompressed"
+                )
+
+        items = []
+        for filename, archive, source in sources:
+            if archive is None:
+                items.append((filename, spool(source)))
+                continue
+            with archive.open(source) as member:
+                items.append((filename, spool(member)))
+        return items
+
+
+def process_batch_file(filename, data, mode):
+    """Run one resume of a batch and return its manifest entry; errors are recorded, not raised.
+
+    data is the resume's bytes or a file, which is closed once it has been read.
+    """
+    job_id = uuid.uuid4().hex
+    entry = {"file": filename, "status": JOB_FAILED, "output": None, "error": None}
+    started = time.time()
     try:
-        base_dir = os.path.dirname(os.path.abspath(__file__))
-        file_path = os.path.join(base_dir, "Final_Resume.docx")
-        
-        if not os.path.exists(file_path):
-            return "Resume file not found. Please process your resume first.", 404
+        resume_text = extract_resume_text(data, filename)
+        run_resume_pipeline(job_id, resume_text, mode, checkpoint=False)
+        docx_renders.wait(job_id)
+        if not os.path.exists(job_output_path(job_id)):
+            raise RuntimeError("The resume could not be rendered")
+        entry["status"] = JOB_DONE
+    except Exception as e:
+        print(f"Error processing {filename} in batch: {e}")
+        entry["error"] = str(e)
+    finally:
+        if hasattr(data, "close"):
+            data.close()
+    entry["seconds"] = round(time.time() - started, 2)
+    usage = job_traces.get(job_id)
+    if usage is not None:
+        entry["llm_calls"] = usage.llm_calls
+        entry["cost_usd"] = round(usage.cost_usd, 6)
+    return job_id, entry
+
+
+def process_batch(items, output, mode=PIPELINE_MODE, on_file=None):
+    """Run the pipeline for (filename, bytes) items and write a ZIP of DOCX files plus manifest.json.
+
+    Up to BATCH_WORKERS resumes run at once; a failing file is listed in the
+    manifest and the rest of the batch carries on. on_file(entry) is called as
+    each file finishes. Returns the manifest.
+    """
+    started = time.time()
+
+    def run(item):
+        job_id, entry = process_batch_file(item[0], item[1], mode)
+        if on_file is not None:
+            on_file(entry)
+        return job_id, entry
+
+    results = list(batch_executor.map(run, items))
+
+    manifest = {"mode": mode, "files": len(results), "done": 0, "failed": 0, "results": []}
+    names = set()
+    tmp_path = f"{output}.tmp"
+    with zipfile.ZipFile(tmp_path, "w", zipfile.ZIP_DEFLATED) as archive:
+        for job_id, entry in results:
+            manifest[entry["status"]] += 1
+            if entry["status"] == JOB_DONE:
+                # One DOCX per input file, named after it and kept unique within the ZIP
+                stem = os.path.splitext(os.path.basename(entry["file"]))[0] or "resume"
+                name, number = f"{stem}.docx", 1
+                while name in names:
+                    number += 1
+                    name = f"{stem}-{number}.docx"
+                names.add(name)
+                archive.write(job_output_path(job_id), name)
+                os.remove(job_output_path(job_id))
+                entry["output"] = name
+            with contextlib.suppress(FileNotFoundError):
+                os.remove(job_output_path(job_id, "json"))
+            manifest["results"].append(entry)
+        manifest["seconds"] = round(time.time() - started, 2)
+        archive.writestr("manifest.json", json.dumps(manifest, indent=2))
+    os.replace(tmp_path, output)
+    return manifest
+
+
+def run_batch_job(job_id, items, mode):
+    """Job queue entry point for /batch: the ZIP goes to the job's output file."""
+    os.makedirs(OUTPUT_DIR, exist_ok=True)
+    manifest = process_batch(
+        items, job_output_path(job_id, "zip"), mode,
+        lambda entry: job_events.publish(job_id, "file", entry)
+    )
+    return json.dumps(manifest)
+
+
+@app.route('/batch', methods=['POST'])
+def process_batch_upload():
+    """Queue a batch of resumes sent as several files and/or ZIP archives."""
+    uploads = request.files.getlist('files') + request.files.getlist('file')
+    if not uploads:
+        return {"error": "No files uploaded"}, 400
+    try:
+        items = batch_items(uploads)
+    except zipfile.BadZipFile as e:
+        return {"error": f"Could not read ZIP upload: {e}"}, 400
+    except ValueError as e:
+        metrics.inc("upload_rejections_total", reason="too_large")
+        return {"error": str(e)}, 413
+    if not items:
+        return {"error": "No resumes found in the upload"}, 400
+
+    if not os.getenv('OPENAI_API_KEY'):
+        return {"error": "OpenAI API Key not found!"}, 500
+
+    mode = request.form.get('mode', PIPELINE_MODE)
+    if mode not in PIPELINE_MODES:
+        return {"error": f"Unknown pipeline mode: {mode}"}, 400
+
+    job_id = job_queue.submit(run_batch_job, items, mode)
+    if job_id is None:
+        metrics.inc("resume_jobs_total", status="rejected")
+        return {"error": "The server is busy. Please try again in a minute."}, 503, {"Retry-After": "30"}
+    return {
+        "job_id": job_id,
+        "files": len(items),
+        "status_url": url_for('batch_status', job_id=job_id),
+        "download_url": url_for('download_batch', job_id=job_id),
+    }, 202
+
+
+@app.route('/batches/<job_id>')
+def batch_status(job_id):
+    """Report a batch's progress as JSON, with the manifest once it has finished."""
+    job = job_queue.store.get(job_id)
+    if job is None:
+        return {"error": "Job not found"}, 404
+    payload = {
+        "job_id": job_id,
+        "status": job["status"],
+        "processed": sum(1 for event, _ in job_events.wait(job_id, 0, 0) if event == "file"),
+        "error": job["error"],
+    }
+    if job["status"] == JOB_DONE:
+        payload["manifest"] = json.loads(job["result"])
+        payload["download_url"] = url_for('download_batch', job_id=job_id)
+    return payload
+
+
+@app.route('/batches/<job_id>/download')
+def download_batch(job_id):
+    file_path = job_output_path(job_id, "zip")
+    if not file_path or not os.path.exists(file_path):
+        return "Batch results not found or expired.", 404
+    return send_file(file_path, as_attachment=True, download_name="Resumes.zip", mimetype=ZIP_MIMETYPE)
+
+
+def parse_variants(raw):
+    """Read the /variants list: target role strings, or objects with target_role,
+    job_posting and an optional name. Raises ValueError when it is not usable."""
+    try:
+        items = json.loads(raw or "[]")
+    except json.JSONDecodeError as e:
+        raise ValueError(f"variants is not valid JSON: {e}")
+    if not isinstance(items, list) or not items:
+        raise ValueError("variants must be a non-empty JSON list")
+    if len(items) > VARIANT_MAX:
+        raise ValueError(f"At most {VARIANT_MAX} variants can be made at once")
+    variants = []
+    for number, item in enumerate(items, 1):
+        if isinstance(item, str):
+            item = {"target_role": item}
+        if not isinstance(item, dict):
+            raise ValueError(f"Variant {number} must be a target role or an object")
+        target_role = str(item.get("target_role") or "").strip()[:200]
+        job_posting = str(item.get("job_posting") or "").strip()[:JOB_POSTING_MAX_CHARS]
+        if not target_role and not job_posting:
+            raise ValueError(f"Variant {number} needs a target_role or a job_posting")
+        name = str(item.get("name") or "").strip()[:200] or target_role or f"Variant {number}"
+        variants.append({"name": name, "target_role": target_role, "job_posting": job_posting})
+    return variants
+
+
+# Shared by every variant job in this process, so parallel variant jobs never write more than
+# VARIANT_WORKERS variants (each with up to SECTION_WORKERS LLM calls) at once
+variant_executor = ThreadPoolExecutor(max_workers=VARIANT_WORKERS, thread_name_prefix="resume-variant")
+
+
+def process_variant(resume_text, variant, shared):
+    """Write one variant of a resume and return its manifest entry; errors are recorded, not raised.
+
+    The variant gets its own job ID, so its DOCX, PDF and trace are served by
+    the same routes as any other resume.
+    """
+    variant_id = uuid.uuid4().hex
+    entry = {
+        "name": variant["name"], "target_role": variant["target_role"], "job_id": variant_id,
+        "status": JOB_FAILED, "error": None,
+    }
+    started = time.time()
+    try:
+        run_resume_pipeline(
+            variant_id, resume_text, "multi", variant["job_posting"], checkpoint=False,
+            target_role=variant["target_role"], shared=shared
+        )
+        docx_renders.wait(variant_id)
+        if not os.path.exists(job_output_path(variant_id)):
+            raise RuntimeError("The resume could not be rendered")
+        entry["status"] = JOB_DONE
+    except Exception as e:
+        print(f"Error writing variant {variant['name']}: {e}")
+        entry["error"] = str(e)
+    entry["seconds"] = round(time.time() - started, 2)
+    usage = job_traces.get(variant_id)
+    if usage is not None:
+        entry["llm_calls"] = usage.llm_calls
+        entry["cost_usd"] = round(usage.cost_usd, 6)
+    return entry
+
+
+def run_variant_job(job_id, resume_text, variants):
+    """Job queue entry point for /variants: one tailored DOCX per variant of a resume.
+
+    The extraction sections run once for the resume; only the positioning
+    sections run again for each variant, with up to VARIANT_WORKERS variants
+    at once. Returns the manifest as JSON.
+    """
+    usage = job_traces.start(job_id)
+    started = time.time()
+    resume_text = prepare_resume_text(resume_text, usage)
+    with timed_stage("extraction", usage):
+        shared = run_extraction_sections(resume_text, usage)
+
+    def run(variant):
+        entry = process_variant(resume_text, variant, shared)
+        job_events.publish(job_id, "variant", entry)
+        return entry
+
+    results = list(variant_executor.map(run, variants))
+
+    manifest = {
+        "variants": len(results),
+        "done": sum(1 for entry in results if entry["status"] == JOB_DONE),
+        "failed": sum(1 for entry in results if entry["status"] == JOB_FAILED),
+        "shared": {"sections": sorted(shared), "llm_calls": usage.llm_calls, "cost_usd": round(usage.cost_usd, 6)},
+        "results": results,
+        "seconds": round(time.time() - started, 2),
+    }
+    return json.dumps(manifest)
+
+
+@app.route('/variants', methods=['POST'])
+def process_variants():
+    """Queue several tailored versions of one resume, one per target role or job posting."""
+    uploaded_file = request.files.get('file')
+    if not uploaded_file:
+        return {"error": "No file uploaded"}, 400
+    if sniff_resume_type(uploaded_file.stream) is None:
+        metrics.inc("upload_rejections_total", reason="unsupported")
+        return {"error": "Unsupported file type. Please upload a DOCX or PDF resume."}, 415
+    try:
+        variants = parse_variants(request.form.get('variants'))
+    except ValueError as e:
+        return {"error": str(e)}, 400
+
+    try:
+        with timed_stage("extract"):
+            resume_text = extract_resume_text(uploaded_file.stream, uploaded_file.filename or "")
+    except Exception as e:
+        return {"error": f"Failed to extract text from uploaded file: {e}"}, 400
+
+    if not os.getenv('OPENAI_API_KEY'):
+        return {"error": "OpenAI API Key not found!"}, 500
+
+    job_id = job_queue.submit(run_variant_job, resume_text, variants)
+    if job_id is None:
+        metrics.inc("resume_jobs_total", status="rejected")
+        return {"error": "The server is busy. Please try again in a minute."}, 503, {"Retry-After": "30"}
+    return {
+        "job_id": job_id,
+        "variants": len(variants),
+        "status_url": url_for('variant_status', job_id=job_id),
+    }, 202
+
+
+@app.route('/variants/<job_id>')
+def variant_status(job_id):
+    """Report a variant job's progress as JSON, with a download per variant once it has finished."""
+    job = job_queue.store.get(job_id)
+    if job is None:
+        return {"error": "Job not found"}, 404
+    payload = {
+        "job_id": job_id,
+        "status": job["status"],
+        "processed": sum(1 for event, _ in job_events.wait(job_id, 0, 0) if event == "variant"),
+        "error": job["error"],
+    }
+    if job["status"] == JOB_DONE:
+        manifest = json.loads(job["result"])
+        for entry in manifest["results"]:
+            if entry["status"] == JOB_DONE:
+                entry["download_url"] = url_for('download_new_format', job_id=entry["job_id"])
+                entry["pdf_url"] = url_for('download_pdf', job_id=entry["job_id"])
+        payload["manifest"] = manifest
+    return payload
+
+
+@app.route('/cache/stats')
+def cache_stats():
+    """Report section cache hits and misses as JSON."""
+    return section_cache.stats()
+
+
+@app.route('/pipeline/report')
+def pipeline_report_view():
+    """Compare average wall-clock time and token usage per pipeline mode as JSON."""
+    return pipeline_report.summary()
+
+
+@app.route('/metrics')
+def metrics_view():
+    """Expose pipeline counters and histograms for Prometheus to scrape."""
+    return Response(metrics.render(), mimetype="text/plain; version=0.0.4")
+
+
+@app.route('/metrics/sections')
+def section_metrics_view():
+    """Report LLM calls, p50/p95 latency and cost per section role and model as JSON.
+
+    Used to tune MODEL_ROUTES: a role whose cheap model is fast and rarely falls
+    back is a candidate for staying there.
+    """
+    report = {}
+    for labels, count, p50, p95 in metrics.percentiles("llm_call_seconds"):
+        report.setdefault(labels["role"], {"models": {}, "fallbacks": 0})["models"][labels["model"]] = {
+            "calls": count, "p50_seconds": round(p50, 3), "p95_seconds": round(p95, 3), "cost_usd": 0.0
+        }
+    for labels, value in metrics.values("llm_cost_usd_total"):
+        stats = report.get(labels["role"], {}).get("models", {}).get(labels["model"])
+        if stats:
+            stats["cost_usd"] = round(value, 6)
+            stats["avg_cost_usd"] = round(value / stats["calls"], 6)
+    for labels, value in metrics.values("section_fallbacks_total"):
+        if labels["role"] in report:
+            report[labels["role"]]["fallbacks"] += value
+    return report
+
+
+@app.route('/download_new_format/<job_id>')
+def download_new_format(job_id):
+    try:
+        # ?layout= downloads a layout rendered by POST /jobs/<job_id>/layouts
+        layout = request.args.get('layout')
+        if layout is not None and layout not in layouts:
+            return f"Unknown layout: {layout}", 404
+        file_path = job_output_path(job_id, f"{layout}.docx" if layout else "docx")
+
+        # The HTML preview is ready before the DOCX, so give a running render a moment
+        if file_path and not layout and not os.path.exists(file_path):
+            docx_renders.wait(job_id, DOCX_WAIT)
+        if not file_path or not os.path.exists(file_path):
+            return "Resume file not found or expired. Please process your resume again.", 404
             
         return send_file(
             file_path,
             as_attachment=True,
-            download_name="Final_Resume.docx",
-            mimetype='application/vnd.openxmlformats-officedocument.wordprocessingml.document'
+            download_name=f"Final_Resume_{layouts[layout]['title']}.docx" if layout else "Final_Resume.docx",
+            mimetype=DOCX_MIMETYPE
         )
     except Exception as e:
         print(f"Error downloading file: {e}")
         return f"Error downloading file: {str(e)}", 500
 
+
+@app.route('/download_pdf/<job_id>')
+def download_pdf(job_id):
+    """Download a finished resume as a PDF, rendered from the same context as its DOCX."""
+    try:
+        context = load_job_context(job_id)
+    except Exception as e:
+        print(f"Error loading context for PDF: {e}")
+        context = None
+    if context is None:
+        return "Resume not found or expired. Please process your resume again.", 404
+
+    future = pdf_exporter.submit(context)
+    if future is None:
+        return Response(
+            "The server is busy creating other PDFs. Please try again in a moment.", 503, {"Retry-After": "10"}
+        )
+    try:
+        pdf = future.result(PDF_TIMEOUT)
+    except Exception as e:
+        print(f"Error creating PDF: {e}")
+        return f"Error creating PDF: {str(e) or 'timed out'}", 500
+    return send_file(io.BytesIO(pdf), as_attachment=True, download_name="Final_Resume.pdf", mimetype=PDF_MIMETYPE)
+
 if __name__ == '__main__':
     app.run(host='0.0.0.0', port=8080)
 
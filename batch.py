@@ -0,0 +1,67 @@
+"""Run a directory of resumes through the pipeline in one go.
+
+    python batch.py resumes/ --output resumes.zip
+    python batch.py resumes/ --output resumes.zip --mode single
+
+Every .docx and .pdf file under the directory is processed, BATCH_WORKERS
+resumes at a time. The ZIP holds one DOCX per resume plus manifest.json with
+each file's status and timing; a file that fails is listed in the manifest
+and does not stop the rest of the batch.
+"""
+import argparse
+import os
+import sys
+
+import app
+
+
+def find_resumes(directory):
+    """Return the resume files under directory, sorted by path."""
+    paths = []
+    for root, dirs, files in os.walk(directory):
+        dirs[:] = [name for name in dirs if not name.startswith(".")]
+        paths.extend(
+            os.path.join(root, name) for name in files
+            if name.lower().endswith(app.BATCH_EXTENSIONS) and not name.startswith((".", "~$"))
+        )
+    return sorted(paths)
+
+
+def print_entry(entry):
+    line = f"{entry['status']:<7} {entry['seconds']:7.1f}s  {entry['file']}"
+    if entry["error"]:
+        line += f"  ({entry['error']})"
+    print(line, flush=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("directory", help="folder containing .docx and .pdf resumes")
+    parser.add_argument("--output", default="resumes.zip", help="ZIP file to write")
+    parser.add_argument("--mode", choices=app.PIPELINE_MODES, default=app.PIPELINE_MODE)
+    args = parser.parse_args()
+
+    if not os.getenv('OPENAI_API_KEY'):
+        print("OpenAI API Key not found!", file=sys.stderr)
+        return 2
+    paths = find_resumes(args.directory)
+    if not paths:
+        print(f"No .docx or .pdf resumes found in {args.directory}", file=sys.stderr)
+        return 2
+
+    items = []
+    for path in paths:
+        with open(path, "rb") as resume_file:
+            items.append((os.path.relpath(path, args.directory), resume_file.read()))
+
+    print(f"Processing {len(items)} resumes, {app.BATCH_WORKERS} at a time", flush=True)
+    manifest = app.process_batch(items, args.output, args.mode, print_entry)
+    print(
+        f"{manifest['done']} done, {manifest['failed']} failed in {manifest['seconds']}s; "
+        f"results written to {args.output}"
+    )
+    return 1 if manifest["failed"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
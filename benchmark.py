@@ -0,0 +1,539 @@
+"""Micro-benchmarks for the resume pipeline.
+
+Run with the same environment as the app, e.g.:
+
+    python benchmark.py setup --iterations 200
+    python benchmark.py render
+    python benchmark.py extract
+    python benchmark.py stages
+    python benchmark.py pipeline --requests 40 --concurrency 8 --latency 0.8 --jitter 0.4
+
+The pipeline benchmark needs no OpenAI account: it points the app at a local
+mock LLM server that answers each section agent with canned JSON after a
+configurable delay. The mock can also be started on its own so a deployed
+instance can be load-tested offline:
+
+    python benchmark.py mock-llm --port 8001
+    OPENAI_BASE_URL=http://127.0.0.1:8001/v1 gunicorn app:app
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import random
+import re
+import resource
+import statistics
+import tempfile
+import threading
+import time
+import tracemalloc
+import zipfile
+from base64 import b64encode
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from docx import Document
+from docxtpl import DocxTemplate
+
+import app
+import config
+import extract_worker
+import jobs
+import json_repair
+import preprocess
+import prompts
+import rendering
+
+
+SAMPLE_RESUME = "\n".join([
+    "Jasmine Taylor",
+    "New York, NY • 555-123-4567 • jasmine@example.com • linkedin.com/in/jasminetaylor",
+    "PROFESSIONAL EXPERIENCE",
+    "Ingersoll Rand – Davidson, NC",
+    "Senior Marketing Manager, 2019 – Present",
+    "Led a team of six marketers and improved lead generation by 150% across nine websites.",
+    "Acme Analytics – Charlotte, NC",
+    "Marketing Analyst, 2015 – 2019",
+    "Built weekly reporting for campaign performance and customer segmentation.",
+    "EDUCATION",
+    "Harvard University – Master of Business Administration",
+] * 5)
+
+SAMPLE_POSTING = "\n".join([
+    "Senior Digital Marketing Manager",
+    "We are looking for a marketing leader to own lead generation, campaign management and marketing analytics.",
+    "You will lead a team, build customer segmentation and reporting, and partner with sales on pipeline growth.",
+    "Requirements: 5+ years of digital marketing experience, A/B testing and content strategy.",
+] * 3)
+
+SAMPLE_CONTEXT = {
+    "full_name": "Jasmine Taylor",
+    "location": "New York, NY",
+    "phone": "555-123-4567",
+    "email": "jasmine@example.com",
+    "LinkedIn": "linkedin.com/in/jasminetaylor",
+    "top_keywords": ["Demand Generation", "Marketing Analytics", "Campaign Strategy", "Team Leadership"],
+    "summaries": [
+        "Strategic and collaborative leader offering 10+ years of experience driving demand, analytics, and campaigns in B2B marketing.",
+        "Adaptable and people-focused communicator skilled at storytelling, conflict resolution, and alignment using empathy, focus, and clarity.",
+        "Innovative and future-facing strategist focused on growth, access, and efficiency by testing relentlessly, delivering measurable impact.",
+    ],
+    "expertise_keywords": [
+        "Lead Generation", "A/B Testing", "Marketing Automation",
+        "Budget Management", "Content Strategy", "SEO Optimization",
+        "Data Visualization", "Vendor Management", "Team Development",
+    ],
+    "notable_achievements": [
+        {"text": "Improved lead generation by 150% across nine websites at Ingersoll Rand."},
+        {"text": "Grew the prospect database from 100,000 to 800,000 within one year at Acme Analytics."},
+    ],
+    "experience": [
+        {
+            "company": "Ingersoll Rand",
+            "location": "Davidson, NC",
+            "title": "Senior Marketing Manager",
+            "dates": "2019 – Present",
+            "description": "Leads digital demand generation. Manages a team of six marketers. Owns the campaign budget.",
+            "achievements": [{"label": "Led", "text": "the rollout of marketing automation across three regions."}],
+        },
+        {
+            "company": "Acme Analytics",
+            "location": "Charlotte, NC",
+            "title": "Marketing Analyst",
+            "dates": "2015 – 2019",
+            "description": "Built weekly reporting. Analyzed campaign performance. Supported segmentation.",
+            "achievements": [{"label": "Delivered", "text": "a self-service dashboard used by sales leadership."}],
+        },
+    ],
+    "earlier_experience": [
+        {"company": "Duke University", "location": "Durham, NC", "title": "Project Coordinator", "dates": "2011 – 2012"},
+    ],
+    "education": [{"institution": "Harvard University", "credential": "Master of Business Administration"}],
+    "certifications": [],
+}
+
+
+# What the mock LLM answers for each section role; the single-pass writer gets everything
+CANNED_SECTIONS = {
+    role: {key: SAMPLE_CONTEXT[key] for key in keys} for role, keys in app.SECTION_KEYS.items()
+}
+CANNED_SECTIONS["Resume Writer"] = {
+    key: SAMPLE_CONTEXT[key] for keys in app.SECTION_KEYS.values() for key in keys
+}
+
+
+class MockLLMServer:
+    """Local stand-in for the OpenAI chat completions API with canned, role-specific answers.
+
+    Each answer is delayed by latency seconds plus up to jitter seconds at random.
+    """
+
+    def __init__(self, latency=0.5, jitter=0.25, port=0):
+        self.latency = latency
+        self.jitter = jitter
+        self.calls = 0
+        self._lock = threading.Lock()
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+                payload = json.dumps(server.complete(body)).encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def log_message(self, *args):
+                pass
+
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", port), Handler)
+        self.httpd.daemon_threads = True
+        self.url = f"http://127.0.0.1:{self.httpd.server_port}/v1"
+
+    def complete(self, body):
+        """Build a chat completion for the section role named in the system prompt."""
+        prompt = "\n".join(str(message.get("content", "")) for message in body.get("messages", []))
+        match = re.search(r"You are (.+?)\. ", prompt)
+        answer = CANNED_SECTIONS.get(match.group(1) if match else "", {})
+        content = "Thought: I now can give a great answer\nFinal Answer: " + json.dumps(answer)
+        with self._lock:
+            self.calls += 1
+        time.sleep(self.latency + random.uniform(0, self.jitter))
+        return {
+            "id": f"mock-{self.calls}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": body.get("model", "mock"),
+            "choices": [
+                {"index": 0, "message": {"role": "assistant", "content": content}, "finish_reason": "stop"}
+            ],
+            "usage": {
+                "prompt_tokens": len(prompt) // 4,
+                "completion_tokens": len(content) // 4,
+                "total_tokens": (len(prompt) + len(content)) // 4,
+            },
+        }
+
+    def start(self):
+        threading.Thread(target=self.httpd.serve_forever, name="mock-llm", daemon=True).start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+def measure(func, iterations):
+    """Call func iterations times and return the duration of each call in seconds."""
+    samples = []
+    for _ in range(iterations):
+        started = time.perf_counter()
+        func()
+        samples.append(time.perf_counter() - started)
+    return samples
+
+
+def percentile(samples, fraction):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+def report(name, samples):
+    print(
+        f"{name:<28} mean {statistics.mean(samples) * 1000:8.3f} ms   "
+        f"p50 {statistics.median(samples) * 1000:8.3f} ms   p95 {percentile(samples, 0.95) * 1000:8.3f} ms"
+    )
+
+
+def bench_setup(args):
+    """Per-request setup cost: building agents, tasks and prompts for all eight sections."""
+    roles = ["Achievements Writer", *app.INDEPENDENT_SECTIONS, "Job Description Writer"]
+    values = {"resume_text": SAMPLE_RESUME, "achievement_output_text": ""}
+
+    def build_everything_per_request():
+        # What the handler used to do: create every definition, prompt and the order table per request
+        for role in roles:
+            definition = dict(app.AGENT_DEFINITIONS[role])
+            template = prompts.PromptTemplate(app.SECTION_PROMPTS[role]["description"].template)
+            agent = app.Agent(role=role, verbose=True, allow_delegation=False, **definition)
+            app.Task(
+                description=template.render(**values),
+                agent=agent,
+                expected_output=app.SECTION_PROMPTS[role]["expected_output"]
+            )
+        dict(app.SECTION_SORT_ORDER)
+
+    def bind_registry():
+        for role in roles:
+            app.build_section(role, **values)
+
+    # Warm up imports and lazy initialisation in crewai before timing
+    build_everything_per_request()
+    bind_registry()
+    report("setup: built per request", measure(build_everything_per_request, args.iterations))
+    report("setup: prebuilt registry", measure(bind_registry, args.iterations))
+
+
+def bench_render(args):
+    """DOCX render throughput for a fixed context, loading the template per render vs cached."""
+    template_path = os.path.join(app.TEMPLATE_DIR, app.layouts[app.DEFAULT_LAYOUT]["file"])
+
+    def render_uncached():
+        doc = DocxTemplate(template_path)
+        doc.render(SAMPLE_CONTEXT)
+        doc.save(io.BytesIO())
+
+    def render_cached():
+        app.render_new_format(SAMPLE_CONTEXT, io.BytesIO())
+
+    for name, func in (("render: load per request", render_uncached), ("render: template cache", render_cached)):
+        func()
+        samples = measure(func, args.iterations)
+        report(name, samples)
+        print(f"{'':<28} {len(samples) / sum(samples):8.1f} renders/sec")
+
+
+def make_pdf(pages, lines_per_page=45):
+    """Build a simple text PDF with the given number of pages."""
+    objects = [b"<< /Type /Catalog /Pages 2 0 R >>", None, b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>"]
+    kids = []
+    for page in range(pages):
+        lines = " ".join(
+            f"(Page {page} line {line}: Led cross-functional delivery of analytics programs.) '"
+            for line in range(lines_per_page)
+        )
+        stream = f"BT /F1 10 Tf 50 780 Td 12 TL {lines} ET".encode()
+        objects.append(b"<< /Length %d >>\nstream\n%s\nendstream" % (len(stream), stream))
+        objects.append(
+            b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+            b"/Resources << /Font << /F1 3 0 R >> >> /Contents %d 0 R >>" % len(objects)
+        )
+        kids.append(b"%d 0 R" % len(objects))
+    objects[1] = b"<< /Type /Pages /Kids [%s] /Count %d >>" % (b" ".join(kids), pages)
+
+    out = io.BytesIO()
+    out.write(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(out.tell())
+        out.write(b"%d 0 obj\n%s\nendobj\n" % (number, body))
+    xref = out.tell()
+    out.write(b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1))
+    for offset in offsets:
+        out.write(b"%010d 00000 n \n" % offset)
+    out.write(b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref))
+    return out.getvalue()
+
+
+def make_docx(paragraphs, table_rows):
+    """Build a DOCX with many paragraphs and a table full of merged cells."""
+    document = Document()
+    for number in range(paragraphs):
+        document.add_paragraph(f"Paragraph {number}: managed vendor relationships and quarterly budgets.")
+    table = document.add_table(rows=table_rows, cols=4)
+    for row in range(0, table_rows - 2, 3):
+        table.cell(row, 0).merge(table.cell(row, 3)).text = f"Merged heading {row}"
+        table.cell(row + 1, 0).merge(table.cell(row + 2, 0)).text = f"Merged category {row}"
+        table.cell(row + 1, 1).text = f"Skill {row}"
+    out = io.BytesIO()
+    document.save(out)
+    return out.getvalue()
+
+
+def build_corpus():
+    """Large and malformed uploads, generated in memory so no binaries live in the repo."""
+    large_pdf = make_pdf(200)
+    large_docx = make_docx(5000, 201)
+    broken_zip = io.BytesIO()
+    with zipfile.ZipFile(broken_zip, "w") as archive:
+        archive.writestr("[Content_Types].xml", "<Types/>")
+    noise = random.Random(42)
+    return {
+        "resume.pdf (2 pages)": (make_pdf(2), "resume.pdf"),
+        "large.pdf (200 pages)": (large_pdf, "large.pdf"),
+        "truncated.pdf": (large_pdf[:len(large_pdf) // 2], "truncated.pdf"),
+        "garbage.pdf": (b"%PDF-1.4\n" + bytes(noise.getrandbits(8) for _ in range(200_000)), "garbage.pdf"),
+        "resume.docx (40 paragraphs)": (make_docx(40, 6), "resume.docx"),
+        "large.docx (5000 paragraphs)": (large_docx, "large.docx"),
+        "truncated.docx": (large_docx[:len(large_docx) // 2], "truncated.docx"),
+        "no-document.docx": (broken_zip.getvalue(), "broken.docx"),
+    }
+
+
+def legacy_extract(data, filename):
+    """Extraction as it worked before the streaming engine: every page, every table cell."""
+    if filename.endswith(".pdf"):
+        reader = extract_worker.PdfReader(io.BytesIO(data))
+        return "\n\n".join((page.extract_text() or "").strip() for page in reader.pages)
+    document = Document(io.BytesIO(data))
+    text = [para.text.strip() for para in document.paragraphs if para.text.strip()]
+    for table in document.tables:
+        for row in table.rows:
+            for cell in row.cells:
+                if cell.text.strip():
+                    text.append(cell.text.strip())
+    return "\n".join(text)
+
+
+def streaming_extract(data, filename):
+    """The streaming engine in this process, without the extraction worker pool."""
+    return extract_worker.extract_text(data, filename, config.EXTRACT_MAX_PAGES, config.EXTRACT_MAX_CHARS)
+
+
+def bench_extract(args):
+    """Extraction time, peak Python memory and output size per corpus file, before and after."""
+    corpus = build_corpus()
+    engines = (
+        ("legacy", legacy_extract),
+        ("streaming", streaming_extract),
+        ("streaming+process", app.extract_resume_text),
+    )
+    print(f"{'file':<30} {'engine':<18} {'ms':>9} {'peak MiB':>9} {'chars':>9}")
+    for name, (data, filename) in corpus.items():
+        for engine, func in engines:
+            tracemalloc.start()
+            started = time.perf_counter()
+            try:
+                result = f"{len(func(data, filename)):>9}"
+            except Exception as e:
+                result = f"  error: {str(e)[:40]}"
+            elapsed = (time.perf_counter() - started) * 1000
+            peak = tracemalloc.get_traced_memory()[1] / (1024 * 1024)
+            tracemalloc.stop()
+            print(f"{name:<30} {engine:<18} {elapsed:9.1f} {peak:9.1f} {result}")
+
+
+def bench_stages(args):
+    """The pure-Python stages on their own: extraction, text cleanup, JSON cleanup, markdown, keywords,
+    DOCX and PDF render."""
+    docx_data = make_docx(40, 6)
+    pdf_data = make_pdf(2)
+    raw_output = "```json\n" + json.dumps(CANNED_SECTIONS["Resume Writer"], indent=2) + "\n```"
+    tasks = [app.section_result(role, data) for role, data in CANNED_SECTIONS.items() if role in app.SECTION_KEYS]
+
+    stages = (
+        ("extract_text_from_docx", lambda: extract_worker.extract_text_from_docx(
+            io.BytesIO(docx_data), config.EXTRACT_MAX_CHARS
+        )),
+        ("extract_text_from_pdf", lambda: extract_worker.extract_text_from_pdf(
+            io.BytesIO(pdf_data), config.EXTRACT_MAX_PAGES, config.EXTRACT_MAX_CHARS
+        )),
+        ("clean_resume_text", lambda: preprocess.clean_resume_text(SAMPLE_RESUME)),
+        ("clean_json_block", lambda: json.loads(json_repair.clean_json_block(raw_output))),
+        ("context + HTML preview", lambda: app.markdown(app.format_resume_markdown(app.build_context(tasks)))),
+        ("keyword shortlist", lambda: app.keyword_index.rank(SAMPLE_RESUME, SAMPLE_POSTING)),
+        ("DocxTemplate render", lambda: app.render_new_format(SAMPLE_CONTEXT, io.BytesIO())),
+    )
+    stages += tuple(
+        (f"DocxTemplate render: {name}", lambda name=name: app.render_new_format(SAMPLE_CONTEXT, io.BytesIO(), name))
+        for name in app.layouts if name != app.DEFAULT_LAYOUT
+    )
+    if rendering.FPDF is not None:
+        stages += (("PDF render", lambda: app.render_pdf(SAMPLE_CONTEXT)),)
+    for name, func in stages:
+        func()
+        report(name, measure(func, args.iterations))
+
+
+def resume_upload(number):
+    """A small DOCX resume that differs per request, so the section cache never answers."""
+    document = Document()
+    for line in SAMPLE_RESUME.splitlines()[:11]:
+        document.add_paragraph(line)
+    document.add_paragraph(f"Reference number {number}")
+    out = io.BytesIO()
+    document.save(out)
+    out.seek(0)
+    return out
+
+
+def bench_pipeline(args):
+    """End-to-end /process load test with the LLM replaced by the local mock server."""
+    server = MockLLMServer(args.latency, args.jitter).start()
+    # Agents are built per request, so they pick the mock endpoint up from here on
+    os.environ["OPENAI_BASE_URL"] = server.url
+    os.environ.setdefault("OPENAI_API_KEY", "sk-benchmark")
+    app.USERNAME = app.USERNAME or "benchmark"
+    app.PASSWORD = app.PASSWORD or "benchmark"
+    app.OUTPUT_DIR = tempfile.mkdtemp(prefix="resume-benchmark-")
+    app.CREW_VERBOSE = False
+    headers = {"Authorization": "Basic " + b64encode(f"{app.USERNAME}:{app.PASSWORD}".encode()).decode()}
+
+    latencies = []
+    outcomes = {"done": 0, "failed": 0, "rejected": 0}
+    job_ids = []
+    lock = threading.Lock()
+
+    def run_one(number):
+        client = app.app.test_client()
+        started = time.perf_counter()
+        while True:
+            response = client.post(
+                "/process", headers=headers, content_type="multipart/form-data",
+                data={"file": (resume_upload(number), f"resume-{number}.docx"), "mode": args.mode}
+            )
+            if response.status_code != 503:
+                break
+            # Queue full: back off like a client honouring Retry-After, but briefly
+            with lock:
+                outcomes["rejected"] += 1
+            time.sleep(0.2)
+        job_id = re.search(r"/jobs/([0-9a-f]{32})", response.get_data(as_text=True)).group(1)
+        with lock:
+            job_ids.append(job_id)
+        while True:
+            status = client.get(f"/jobs/{job_id}", headers=headers).get_json()["status"]
+            if status in (app.JOB_DONE, app.JOB_FAILED):
+                break
+            time.sleep(0.02)
+        with lock:
+            latencies.append(time.perf_counter() - started)
+            outcomes[status] += 1
+
+    # Sample how many job workers are busy and how many jobs wait while the load runs
+    busy, waiting = [], []
+    sampling = threading.Event()
+
+    def sample_workers():
+        while not sampling.wait(0.05):
+            with lock:
+                ids = list(job_ids)
+            statuses = [(app.job_queue.store.get(job_id) or {}).get("status") for job_id in ids]
+            busy.append(statuses.count(jobs.JOB_RUNNING))
+            waiting.append(statuses.count(app.JOB_QUEUED))
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        run_one(-1)  # warm up imports, the template cache and the HTTP client
+    latencies.clear()
+    outcomes.update(done=0, failed=0, rejected=0)
+    calls_before = server.calls
+    rss_before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    sampler = threading.Thread(target=sample_workers, daemon=True)
+    sampler.start()
+    started = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+            list(pool.map(run_one, range(args.requests)))
+    elapsed = time.perf_counter() - started
+    sampling.set()
+    sampler.join()
+    server.stop()
+
+    # ru_maxrss is in KiB on Linux; growth is shared by the jobs that ran side by side
+    rss_growth = (resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - rss_before) / 1024
+    in_flight = min(args.concurrency, app.JOB_WORKERS)
+    print(
+        f"pipeline: {args.requests} requests, concurrency {args.concurrency}, mode {args.mode}, "
+        f"{app.JOB_WORKERS} job workers, mock latency {args.latency:.2f}+{args.jitter:.2f}s"
+    )
+    print(f"{'throughput':<28} {len(latencies) / elapsed:8.2f} resumes/sec over {elapsed:.1f}s")
+    report("end-to-end latency", latencies)
+    print(f"{'':<28} p99 {percentile(latencies, 0.99) * 1000:8.1f} ms   max {max(latencies) * 1000:8.1f} ms")
+    print(f"{'outcomes':<28} done {outcomes['done']}   failed {outcomes['failed']}   503 retries {outcomes['rejected']}")
+    print(
+        f"{'worker saturation':<28} mean {statistics.mean(busy or [0]) / app.JOB_WORKERS:7.0%}   "
+        f"max queued {max(waiting or [0])}"
+    )
+    print(f"{'memory':<28} peak RSS +{rss_growth:.1f} MiB, ~{rss_growth / in_flight:.1f} MiB per running job")
+    print(f"{'mock LLM calls':<28} {(server.calls - calls_before) / max(1, len(latencies)):8.1f} per resume")
+
+
+BENCHMARKS = {
+    "extract": bench_extract,
+    "pipeline": bench_pipeline,
+    "render": bench_render,
+    "setup": bench_setup,
+    "stages": bench_stages,
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("benchmark", choices=sorted(BENCHMARKS) + ["all", "mock-llm"])
+    parser.add_argument("--iterations", type=int, default=100)
+    parser.add_argument("--requests", type=int, default=20, help="resumes sent by the pipeline benchmark")
+    parser.add_argument("--concurrency", type=int, default=4, help="clients sending resumes at once")
+    parser.add_argument("--mode", choices=app.PIPELINE_MODES, default=app.PIPELINE_MODE)
+    parser.add_argument("--latency", type=float, default=0.5, help="mock LLM delay per call in seconds")
+    parser.add_argument("--jitter", type=float, default=0.25, help="extra random mock LLM delay in seconds")
+    parser.add_argument("--port", type=int, default=8001, help="port for the standalone mock LLM server")
+    args = parser.parse_args()
+
+    if args.benchmark == "mock-llm":
+        server = MockLLMServer(args.latency, args.jitter, args.port)
+        print(f"Mock LLM listening on {server.url}")
+        server.httpd.serve_forever()
+        return
+
+    names = sorted(BENCHMARKS) if args.benchmark == "all" else [args.benchmark]
+    for name in names:
+        BENCHMARKS[name](args)
+
+
+if __name__ == "__main__":
+    main()
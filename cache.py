@@ -0,0 +1,117 @@
+"""Cache of parsed section outputs, keyed by the resume text, the agent and its prompt."""
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+
+from config import PROMPT_VERSION
+
+
+def section_cache_key(resume_text, agent, *extra):
+    """Build a content-addressed cache key for one section of one resume.
+
+    The resume text is normalized (Unicode form and whitespace) so trivial
+    re-formatting of the same resume still hits the cache.
+    """
+    normalized = " ".join(unicodedata.normalize("NFKC", resume_text).split())
+    model = getattr(agent.llm, "model", "") or ""
+    digest = hashlib.sha256()
+    for part in (PROMPT_VERSION, agent.role, model, normalized, *extra):
+        digest.update(str(part).encode("utf-8"))
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+
+class SectionCache:
+    """LRU + TTL cache of parsed section outputs, optionally backed by SQLite."""
+
+    def __init__(self, max_entries, ttl, path=""):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.path = path
+        self.hits = 0
+        self.misses = 0
+        self.saved_seconds = 0.0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        if self.path:
+            self._execute(
+                "CREATE TABLE IF NOT EXISTS sections ("
+                "key TEXT PRIMARY KEY, value TEXT, seconds REAL, stored REAL, accessed REAL)"
+            )
+
+    def _execute(self, sql, params=()):
+        conn = sqlite3.connect(self.path, timeout=30)
+        try:
+            with conn:
+                return conn.execute(sql, params).fetchall()
+        finally:
+            conn.close()
+
+    def get(self, key):
+        """Return the cached section data for key, or None on a miss."""
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and now - entry[2] > self.ttl:
+                del self._entries[key]
+                entry = None
+            if entry is not None:
+                self._entries.move_to_end(key)
+
+        if entry is None and self.path:
+            rows = self._execute(
+                "SELECT value, seconds, stored FROM sections WHERE key = ? AND stored > ?",
+                (key, now - self.ttl)
+            )
+            if rows:
+                entry = (json.loads(rows[0][0]), rows[0][1], rows[0][2])
+                self._execute("UPDATE sections SET accessed = ? WHERE key = ?", (now, key))
+                self._remember(key, entry)
+
+        with self._lock:
+            if entry is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self.saved_seconds += entry[1]
+        return entry[0]
+
+    def set(self, key, value, seconds):
+        """Store parsed section data together with the time it took to produce."""
+        now = time.time()
+        self._remember(key, (value, seconds, now))
+        if self.path:
+            self._execute(
+                "INSERT OR REPLACE INTO sections (key, value, seconds, stored, accessed) VALUES (?, ?, ?, ?, ?)",
+                (key, json.dumps(value), seconds, now, now)
+            )
+            # Drop expired rows and keep only the most recently used ones on disk
+            self._execute("DELETE FROM sections WHERE stored <= ?", (now - self.ttl,))
+            self._execute(
+                "DELETE FROM sections WHERE key NOT IN "
+                "(SELECT key FROM sections ORDER BY accessed DESC LIMIT ?)",
+                (max(self.max_entries, 1) * 10,)
+            )
+
+    def _remember(self, key, entry):
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+                "saved_llm_calls": self.hits,
+                "saved_seconds": round(self.saved_seconds, 2),
+                "entries": len(self._entries),
+            }
@@ -0,0 +1,232 @@
+"""Settings read from the environment (and .env), with the section schemas they describe.
+
+Every module reads its settings from here, so load_dotenv() runs before any
+of them is read.
+"""
+import json
+import os
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Load credentials from .env
+USERNAME = os.getenv('AUTH_USERNAME')
+PASSWORD = os.getenv('AUTH_PASSWORD')
+
+# Number of section agents allowed to run at the same time (1 = sequential)
+SECTION_WORKERS = max(1, int(os.getenv('SECTION_WORKERS', '8')))
+
+# Background job queue: resumes processed at once, extra jobs allowed to wait,
+# and an optional SQLite file so job status, inputs and per-section checkpoints
+# are shared between gunicorn workers and survive restarts
+JOB_WORKERS = max(1, int(os.getenv('JOB_WORKERS', '2')))
+JOB_QUEUE_SIZE = max(0, int(os.getenv('JOB_QUEUE_SIZE', '20')))
+JOB_DB_PATH = os.getenv('JOB_DB_PATH', '')
+
+# Each process marks the jobs it holds (queued or running) with a heartbeat every
+# JOB_HEARTBEAT_SECONDS; jobs whose heartbeat is older than JOB_STALE_SECONDS (their
+# worker died or was killed) are resumed, up to JOB_MAX_ATTEMPTS runs in all; finished
+# jobs stay in the job history for JOB_HISTORY_RETENTION seconds
+JOB_HEARTBEAT_SECONDS = max(1, int(os.getenv('JOB_HEARTBEAT_SECONDS', '30')))
+JOB_STALE_SECONDS = max(2 * JOB_HEARTBEAT_SECONDS, int(os.getenv('JOB_STALE_SECONDS', '1800')))
+JOB_MAX_ATTEMPTS = max(1, int(os.getenv('JOB_MAX_ATTEMPTS', '3')))
+JOB_HISTORY_RETENTION = int(os.getenv('JOB_HISTORY_RETENTION', str(30 * 24 * 3600)))
+
+# Batch uploads: resumes processed at once across all running batches, and the
+# most resumes accepted in one batch
+BATCH_WORKERS = max(1, int(os.getenv('BATCH_WORKERS', '3')))
+BATCH_MAX_FILES = max(1, int(os.getenv('BATCH_MAX_FILES', '500')))
+BATCH_EXTENSIONS = ('.docx', '.pdf')
+ZIP_MIMETYPE = 'application/zip'
+
+# Most variants (target roles or job postings) accepted for one resume by /variants,
+# and variants written at once across all running variant jobs
+VARIANT_MAX = max(1, int(os.getenv('VARIANT_MAX', '5')))
+VARIANT_WORKERS = max(1, int(os.getenv('VARIANT_WORKERS', '2')))
+
+# Per-section LLM output cache: entries kept in memory, lifetime in seconds,
+# and an optional SQLite file that survives restarts and is shared by workers.
+# Bump PROMPT_VERSION whenever a section prompt changes so old entries are ignored.
+SECTION_CACHE_SIZE = max(0, int(os.getenv('SECTION_CACHE_SIZE', '256')))
+SECTION_CACHE_TTL = int(os.getenv('SECTION_CACHE_TTL', str(7 * 24 * 3600)))
+SECTION_CACHE_PATH = os.getenv('SECTION_CACHE_PATH', '')
+PROMPT_VERSION = "2"
+
+# "multi" runs one agent per section, "single" asks for the whole resume in one call
+PIPELINE_MODES = ("multi", "single")
+PIPELINE_MODE = os.getenv('PIPELINE_MODE', 'multi')
+
+# Crew console logging, the level of the app's own log (pipeline traces are
+# INFO, per-file details DEBUG), and LLM prices in USD per million (input,
+# output) tokens used for the cost metrics; MODEL_PRICES in the environment
+# overrides them as JSON
+CREW_VERBOSE = os.getenv('CREW_VERBOSE', 'true').lower() in ('1', 'true', 'yes')
+LOG_LEVEL = os.getenv('LOG_LEVEL', 'INFO').upper()
+MODEL_PRICES = {
+    "gpt-4o": [2.50, 10.00],
+    "gpt-4o-mini": [0.15, 0.60],
+    "gpt-4.1": [2.00, 8.00],
+    "gpt-4.1-mini": [0.40, 1.60],
+    "gpt-4.1-nano": [0.10, 0.40],
+}
+MODEL_PRICES.update(json.loads(os.getenv('MODEL_PRICES', '{}')))
+
+# Shared OpenAI client: pooled connections, request timeout, retries of 429/5xx
+# and connection errors with exponential backoff, and the most seconds one
+# section may spend waiting for budget, retrying and running
+LLM_MAX_CONNECTIONS = max(1, int(os.getenv('LLM_MAX_CONNECTIONS', '32')))
+LLM_TIMEOUT = float(os.getenv('LLM_TIMEOUT', '120'))
+LLM_MAX_RETRIES = max(0, int(os.getenv('LLM_MAX_RETRIES', '5')))
+LLM_BACKOFF_BASE = float(os.getenv('LLM_BACKOFF_BASE', '1'))
+LLM_BACKOFF_MAX = float(os.getenv('LLM_BACKOFF_MAX', '30'))
+SECTION_DEADLINE = float(os.getenv('SECTION_DEADLINE', '240'))
+
+# Requests and tokens per minute allowed per model; set LLM_RATE_LIMITS (JSON,
+# "*" for any other model) to your OpenAI account's limits. Completion tokens
+# are counted up front at LLM_COMPLETION_TOKENS unless the request sets a maximum.
+# With LLM_RATE_LIMIT_PATH the budgets live in a SQLite file shared by all workers.
+LLM_RATE_LIMITS = {
+    "gpt-4o": {"rpm": 5000, "tpm": 450000},
+    "gpt-4.1": {"rpm": 5000, "tpm": 450000},
+    "gpt-4.1-mini": {"rpm": 5000, "tpm": 2000000},
+}
+LLM_RATE_LIMITS.update(json.loads(os.getenv('LLM_RATE_LIMITS', '{}')))
+LLM_COMPLETION_TOKENS = int(os.getenv('LLM_COMPLETION_TOKENS', '1000'))
+LLM_RATE_LIMIT_PATH = os.getenv('LLM_RATE_LIMIT_PATH', '')
+
+# Models tried for each section, in order: the first does the work and the rest
+# are fallbacks if it fails or its output stays invalid. Sections that only
+# extract facts from the resume run on a small fast model; sections that write
+# new copy stay on the premium one. MODEL_ROUTES (JSON) overrides roles.
+MODEL_ROUTES = {
+    "Name Generator": ["gpt-4.1-mini", "gpt-4o"],
+    "Keyword Generator": ["gpt-4.1", "gpt-4o"],
+    "Summary Writer": ["gpt-4.1", "gpt-4o"],
+    "Areas of Expertise Writer": ["gpt-4.1", "gpt-4o"],
+    "Achievements Writer": ["gpt-4.1", "gpt-4o"],
+    "Job Description Writer": ["gpt-4.1", "gpt-4o"],
+    "Additional Experience Writer": ["gpt-4.1-mini", "gpt-4.1"],
+    "Education Writer": ["gpt-4.1-mini", "gpt-4.1"],
+    "Resume Writer": ["gpt-4.1", "gpt-4o"],
+}
+MODEL_ROUTES.update(json.loads(os.getenv('MODEL_ROUTES', '{}')))
+
+# Recent observations kept per histogram series for the p50/p95 report
+METRICS_SAMPLES = max(1, int(os.getenv('METRICS_SAMPLES', '1000')))
+
+# Context keys produced by each section agent
+SECTION_KEYS = {
+    "Name Generator": ["full_name", "location", "phone", "email", "LinkedIn"],
+    "Keyword Generator": ["top_keywords"],
+    "Summary Writer": ["summaries"],
+    "Areas of Expertise Writer": ["expertise_keywords"],
+    "Achievements Writer": ["notable_achievements"],
+    "Job Description Writer": ["experience"],
+    "Additional Experience Writer": ["earlier_experience"],
+    "Education Writer": ["education"],
+}
+
+# Shape of each section agent's JSON output. Top-level keys are required; nested
+# fields are optional but must have the given type ([x] is a list of x).
+SECTION_SCHEMAS = {
+    "Name Generator": {"full_name": str, "location": str, "phone": str, "email": str, "LinkedIn": str},
+    "Keyword Generator": {"top_keywords": [str]},
+    "Summary Writer": {"summaries": [str]},
+    "Areas of Expertise Writer": {"expertise_keywords": [str]},
+    "Achievements Writer": {"notable_achievements": [{"label": str, "text": str}]},
+    "Job Description Writer": {"experience": [{
+        "company": str, "location": str, "title": str, "dates": str, "description": str,
+        "achievements": [{"label": str, "text": str}],
+    }]},
+    "Additional Experience Writer": {
+        "earlier_experience": [{"company": str, "location": str, "title": str, "dates": str}]
+    },
+    "Education Writer": {"education": [{"institution": str, "credential": str}]},
+}
+SECTION_SCHEMAS["Resume Writer"] = {key: value for schema in SECTION_SCHEMAS.values() for key, value in schema.items()}
+
+# Shape of a whole template context, which an edit to a finished resume must keep
+CONTEXT_SCHEMA = {**SECTION_SCHEMAS["Resume Writer"], "certifications": [{"institution": str, "credential": str}]}
+
+# Extra attempts for a section whose output is not valid JSON for its schema
+SECTION_REASKS = max(0, int(os.getenv('SECTION_REASKS', '1')))
+
+# Contact details and education are read from the resume with rules first; the
+# LLM agent only runs when the rules' confidence (0-1) is below this. Set above 1
+# to always use the LLM.
+RULES_MIN_CONFIDENCE = float(os.getenv('RULES_MIN_CONFIDENCE', '0.8'))
+
+# Resume text sent to the agents is cleaned and then compacted to at most
+# RESUME_TOKEN_BUDGET tokens (0 = no limit), counted with tiktoken's encoding for
+# the OpenAI models when it is installed and estimated at 4 characters otherwise
+RESUME_TOKEN_BUDGET = max(0, int(os.getenv('RESUME_TOKEN_BUDGET', '4000')))
+TOKENIZER_ENCODING = os.getenv('TOKENIZER_ENCODING', 'o200k_base')
+
+# Job posting tailoring: two-word phrases from the vocabulary file and from the
+# posting are ranked against both the resume and the posting, and the keyword
+# sections choose from the best KEYWORD_SHORTLIST_SIZE of them. The weight is the
+# posting's share of a phrase's score; longer postings are cut to JOB_POSTING_MAX_CHARS.
+# A shortlist too short for the 4 top and 9 expertise keywords is not used.
+KEYWORD_VOCABULARY_PATH = os.getenv(
+    'KEYWORD_VOCABULARY_PATH', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'keywords.txt')
+)
+KEYWORD_SHORTLIST_MIN = 13
+KEYWORD_SHORTLIST_SIZE = max(KEYWORD_SHORTLIST_MIN, int(os.getenv('KEYWORD_SHORTLIST_SIZE', '20')))
+KEYWORD_POSTING_WEIGHT = min(max(float(os.getenv('KEYWORD_POSTING_WEIGHT', '0.6')), 0.0), 1.0)
+JOB_POSTING_MAX_CHARS = int(os.getenv('JOB_POSTING_MAX_CHARS', '20000'))
+
+# Order of the sections in the streamed preview; the job title sits under the name
+SECTION_ORDER = ["Name Generator", "Job Title"] + list(SECTION_KEYS)[1:]
+
+# Seconds one event stream stays open before the browser is asked to reconnect (it
+# carries on from the last event it got), so a viewer never holds a worker for long
+EVENT_STREAM_SECONDS = float(os.getenv('EVENT_STREAM_SECONDS', '25'))
+
+# Rendered resumes are written per job into OUTPUT_DIR and deleted after OUTPUT_RETENTION seconds
+OUTPUT_DIR = os.getenv('OUTPUT_DIR', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'outputs'))
+OUTPUT_RETENTION = int(os.getenv('OUTPUT_RETENTION', str(24 * 3600)))
+OUTPUT_SWEEP_INTERVAL = int(os.getenv('OUTPUT_SWEEP_INTERVAL', '600'))
+DOCX_MIMETYPE = 'application/vnd.openxmlformats-officedocument.wordprocessingml.document'
+
+# DOCX files rendered at once in the background (the HTML preview never waits for
+# them), and the seconds a download waits for a DOCX that is still being rendered
+RENDER_WORKERS = max(1, int(os.getenv('RENDER_WORKERS', '2')))
+DOCX_WAIT = float(os.getenv('DOCX_WAIT', '30'))
+
+# PDF export: conversions run at once, extra ones allowed to wait, PDFs kept in
+# memory (by context hash) for repeated downloads, and seconds a download waits
+PDF_WORKERS = max(1, int(os.getenv('PDF_WORKERS', '2')))
+PDF_QUEUE_SIZE = max(0, int(os.getenv('PDF_QUEUE_SIZE', '8')))
+PDF_CACHE_SIZE = max(0, int(os.getenv('PDF_CACHE_SIZE', '64')))
+PDF_TIMEOUT = float(os.getenv('PDF_TIMEOUT', '60'))
+PDF_MIMETYPE = 'application/pdf'
+
+# Text extraction limits: pages and characters read from an upload, the seconds
+# a parser may run before its process is killed (0 = run inline), and the
+# number of extraction worker processes
+EXTRACT_MAX_PAGES = int(os.getenv('EXTRACT_MAX_PAGES', '10'))
+EXTRACT_MAX_CHARS = int(os.getenv('EXTRACT_MAX_CHARS', '50000'))
+EXTRACT_TIMEOUT = float(os.getenv('EXTRACT_TIMEOUT', '20'))
+EXTRACT_WORKERS = max(1, int(os.getenv('EXTRACT_WORKERS', '2')))
+
+# Upload limits in bytes: largest resume (the /process request body, or one file
+# inside a batch ZIP) and largest /batch request body, both refused from the
+# Content-Length before the body is read (the /batch limit also caps the resumes
+# of its ZIPs added up uncompressed), and the size above which an uploaded file
+# is spooled to a temporary file instead of being kept in memory
+MAX_UPLOAD_BYTES = int(os.getenv('MAX_UPLOAD_BYTES', str(10 * 1024 * 1024)))
+MAX_BATCH_UPLOAD_BYTES = int(os.getenv('MAX_BATCH_UPLOAD_BYTES', str(200 * 1024 * 1024)))
+UPLOAD_SPOOL_BYTES = int(os.getenv('UPLOAD_SPOOL_BYTES', str(512 * 1024)))
+
+# Folder holding the DOCX resume templates, and the registry of layouts made from them
+# (templates/layouts.json); DEFAULT_LAYOUT is used when a request does not pick one
+TEMPLATE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'templates')
+LAYOUTS_PATH = os.path.join(TEMPLATE_DIR, 'layouts.json')
+DEFAULT_LAYOUT = os.getenv('DEFAULT_LAYOUT', 'traditional')
+
+# Rendering a saved context into other layouts: worker processes, extra requests
+# allowed to wait, and the seconds a request waits for its layouts
+LAYOUT_WORKERS = max(1, int(os.getenv('LAYOUT_WORKERS', '2')))
+LAYOUT_QUEUE_SIZE = max(0, int(os.getenv('LAYOUT_QUEUE_SIZE', '4')))
+LAYOUT_TIMEOUT = float(os.getenv('LAYOUT_TIMEOUT', '60'))
@@ -0,0 +1,149 @@
+"""Extract the text of an uploaded resume inside an extraction worker process.
+
+app.TextExtractor starts its workers with the spawn method, so each one is a
+fresh interpreter rather than a fork of the threaded web process. They import
+this module instead of app, which keeps them to PyPDF2 and ElementTree: no web
+app, job threads, LLM clients or agents are loaded into them.
+"""
+import io
+import zipfile
+from xml.etree import ElementTree
+
+try:
+    from PyPDF2 import PdfReader
+except Exception:
+    PdfReader = None
+
+# WordprocessingML namespace used in word/document.xml
+W_NAMESPACE = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}"
+
+# Leading bytes of the supported upload formats (a DOCX is a ZIP archive)
+PDF_MAGIC = b"%PDF-"
+ZIP_MAGIC = b"PK\x03\x04"
+
+
+class TextBudget:
+    """Collect extracted text blocks until a character budget is used up."""
+
+    def __init__(self, max_chars):
+        self.max_chars = max_chars
+        self.blocks = []
+        self.chars = 0
+
+    def add(self, text):
+        """Add a block of text; returns False once the budget is exhausted."""
+        text = text.strip()
+        if text:
+            text = text[:self.max_chars - self.chars]
+            self.blocks.append(text)
+            self.chars += len(text)
+        return self.chars < self.max_chars
+
+
+def iter_docx_paragraph_text(element):
+    """Yield the text runs, tabs and breaks of a paragraph in document order."""
+    for node in element.iter():
+        if node.tag == W_NAMESPACE + "t" and node.text:
+            yield node.text
+        elif node.tag == W_NAMESPACE + "tab":
+            yield "\t"
+        elif node.tag in (W_NAMESPACE + "br", W_NAMESPACE + "cr"):
+            yield "\n"
+
+
+def extract_text_from_docx(file, max_chars):
+    """Stream text out of a DOCX file-like object in document order.
+
+    word/document.xml is parsed incrementally and parsed elements are discarded,
+    so memory stays bounded. Reading stops once max_chars characters are collected.
+    Merged table cells are emitted once instead of once per grid column or row.
+    """
+    budget = TextBudget(max_chars)
+    cell_depth = 0
+    with zipfile.ZipFile(file) as docx_zip:
+        with docx_zip.open("word/document.xml") as document_xml:
+            for event, element in ElementTree.iterparse(document_xml, events=("start", "end")):
+                if element.tag == W_NAMESPACE + "tc":
+                    if event == "start":
+                        cell_depth += 1
+                        continue
+                    cell_depth -= 1
+                    # Cells continuing a vertical merge repeat nothing new
+                    v_merge = element.find(f"{W_NAMESPACE}tcPr/{W_NAMESPACE}vMerge")
+                    continues_merge = v_merge is not None and v_merge.get(W_NAMESPACE + "val") != "restart"
+                    if not continues_merge:
+                        paragraphs = [
+                            "".join(iter_docx_paragraph_text(paragraph)).strip()
+                            for paragraph in element.iter(W_NAMESPACE + "p")
+                        ]
+                        if not budget.add("\n".join(p for p in paragraphs if p)):
+                            break
+                    element.clear()
+                elif event == "end" and element.tag == W_NAMESPACE + "p" and cell_depth == 0:
+                    if not budget.add("".join(iter_docx_paragraph_text(element))):
+                        break
+                    element.clear()
+
+    return "\n".join(budget.blocks)
+
+
+def extract_text_from_pdf(file, max_pages, max_chars):
+    """Extract text from a PDF file-like object using PyPDF2.
+
+    Pages are read one at a time and reading stops after max_pages pages or
+    max_chars characters.
+    """
+    if PdfReader is None:
+        raise RuntimeError("PyPDF2 is not installed. Please add PyPDF2 to requirements.txt and reinstall.")
+
+    budget = TextBudget(max_chars)
+
+    # PdfReader accepts a file-like object
+    try:
+        reader = PdfReader(file)
+        for page_number in range(min(len(reader.pages), max_pages)):
+            try:
+                text = reader.pages[page_number].extract_text() or ""
+            except Exception:
+                # skip problematic pages
+                continue
+            if not budget.add(text):
+                break
+        return "\n\n".join(budget.blocks)
+    except Exception as e:
+        raise RuntimeError(f"Failed to read PDF: {e}")
+
+
+def sniff_resume_type(file):
+    """Return "docx" or "pdf" from a file's content, or None for anything else.
+
+    Only the first kilobyte and, for a ZIP, its central directory are read, and
+    the file position is left where it was.
+    """
+    start = file.tell()
+    head = file.read(1024)
+    file.seek(start)
+    # The PDF header may follow a little junk
+    if PDF_MAGIC in head:
+        return "pdf"
+    if not head.startswith(ZIP_MAGIC):
+        return None
+    try:
+        with zipfile.ZipFile(file) as archive:
+            return "docx" if "word/document.xml" in archive.namelist() else None
+    except zipfile.BadZipFile:
+        return None
+    finally:
+        file.seek(start)
+
+
+def extract_text(file, filename, max_pages, max_chars):
+    """Extract resume text from an upload (bytes or a seekable file), choosing the parser by its content."""
+    if isinstance(file, bytes):
+        file = io.BytesIO(file)
+    kind = sniff_resume_type(file)
+    if kind == "pdf":
+        return extract_text_from_pdf(file, max_pages, max_chars)
+    if kind == "docx":
+        return extract_text_from_docx(file, max_chars)
+    raise RuntimeError(f"{filename or 'The file'} is not a DOCX or PDF document")
@@ -0,0 +1,296 @@
+"""Background resume jobs: their status, inputs and section checkpoints, kept in
+memory or in a SQLite file shared by every gunicorn worker.
+"""
+import contextlib
+import json
+import sqlite3
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from metrics import metrics
+
+
+# Job states
+JOB_QUEUED = "queued"
+JOB_RUNNING = "running"
+JOB_DONE = "done"
+JOB_FAILED = "failed"
+
+
+class MemoryJobStore:
+    """Keep job records, inputs and section checkpoints in this process only."""
+
+    def __init__(self):
+        self._jobs = {}
+        self._inputs = {}
+        self._sections = {}
+        self._lock = threading.Lock()
+
+    def create(self, job_id, inputs=None):
+        now = time.time()
+        with self._lock:
+            self._jobs[job_id] = {
+                "status": JOB_QUEUED, "created": now, "updated": now, "error": None, "result": None, "attempts": 1
+            }
+            self._inputs[job_id] = inputs
+            self._sections[job_id] = {}
+
+    def update(self, job_id, **fields):
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is not None:
+                job.update(fields, updated=time.time())
+
+    def get(self, job_id):
+        with self._lock:
+            job = self._jobs.get(job_id)
+            return dict(job) if job is not None else None
+
+    def inputs(self, job_id):
+        with self._lock:
+            return self._inputs.get(job_id)
+
+    def save_section(self, job_id, role, data):
+        """Checkpoint one finished section; this also counts as progress on the job."""
+        with self._lock:
+            if job_id in self._jobs:
+                self._sections[job_id][role] = data
+                self._jobs[job_id]["updated"] = time.time()
+
+    def sections(self, job_id):
+        with self._lock:
+            return dict(self._sections.get(job_id, {}))
+
+    def history(self, limit=50, status=None):
+        """The most recent jobs first, without their results."""
+        with self._lock:
+            jobs = [
+                dict(job, job_id=job_id, sections=sorted(self._sections.get(job_id, {})))
+                for job_id, job in self._jobs.items() if status is None or job["status"] == status
+            ]
+        jobs.sort(key=lambda job: job["created"], reverse=True)
+        for job in jobs[:limit]:
+            del job["result"]
+        return jobs[:limit]
+
+    def set_owner(self, job_id, owner):
+        """Jobs kept in memory belong to their process, so no owner is recorded."""
+
+    def heartbeat(self, owner):
+        return 0
+
+    def claim_stale(self, cutoff):
+        """Jobs kept in memory end with their process, so there is never one to take over."""
+        return []
+
+    def discard_older_than(self, cutoff):
+        with self._lock:
+            for job_id in [
+                job_id for job_id, job in self._jobs.items()
+                if job["status"] in (JOB_DONE, JOB_FAILED) and job["updated"] < cutoff
+            ]:
+                del self._jobs[job_id], self._inputs[job_id], self._sections[job_id]
+
+
+class SQLiteJobStore:
+    """Keep job records, inputs and section checkpoints in a SQLite file.
+
+    Every gunicorn worker sees the same jobs, and they survive a restart.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._execute(
+            "CREATE TABLE IF NOT EXISTS jobs ("
+            "job_id TEXT PRIMARY KEY, status TEXT, created REAL, updated REAL, error TEXT, result TEXT, "
+            "inputs TEXT, attempts INTEGER DEFAULT 1, owner TEXT, heartbeat REAL)"
+        )
+        # Files written before job inputs, attempts and owners were stored
+        columns = {row["name"] for row in self._execute("PRAGMA table_info(jobs)")}
+        for name, kind in (
+            ("inputs", "TEXT"), ("attempts", "INTEGER DEFAULT 1"), ("owner", "TEXT"), ("heartbeat", "REAL")
+        ):
+            if name not in columns:
+                with contextlib.suppress(sqlite3.OperationalError):
+                    self._execute(f"ALTER TABLE jobs ADD COLUMN {name} {kind}")
+        self._execute("CREATE INDEX IF NOT EXISTS jobs_created ON jobs (created)")
+        self._execute(
+            "CREATE TABLE IF NOT EXISTS job_sections ("
+            "job_id TEXT, role TEXT, data TEXT, stored REAL, PRIMARY KEY (job_id, role))"
+        )
+
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=30)
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    def _execute(self, sql, params=()):
+        conn = self._connect()
+        try:
+            with conn:
+                return conn.execute(sql, params).fetchall()
+        finally:
+            conn.close()
+
+    def _change(self, sql, params=()):
+        """Run an UPDATE or DELETE and return the number of rows it changed."""
+        conn = self._connect()
+        try:
+            with conn:
+                return conn.execute(sql, params).rowcount
+        finally:
+            conn.close()
+
+    def create(self, job_id, inputs=None):
+        now = time.time()
+        self._execute(
+            "INSERT INTO jobs (job_id, status, created, updated, inputs, attempts) VALUES (?, ?, ?, ?, ?, 1)",
+            (job_id, JOB_QUEUED, now, now, json.dumps(inputs) if inputs is not None else None)
+        )
+
+    def update(self, job_id, **fields):
+        fields["updated"] = time.time()
+        columns = ", ".join(f"{name} = ?" for name in fields)
+        self._execute(f"UPDATE jobs SET {columns} WHERE job_id = ?", (*fields.values(), job_id))
+
+    def get(self, job_id):
+        rows = self._execute(
+            "SELECT status, created, updated, error, result, attempts FROM jobs WHERE job_id = ?", (job_id,)
+        )
+        return dict(rows[0]) if rows else None
+
+    def inputs(self, job_id):
+        rows = self._execute("SELECT inputs FROM jobs WHERE job_id = ?", (job_id,))
+        return json.loads(rows[0]["inputs"]) if rows and rows[0]["inputs"] else None
+
+    def save_section(self, job_id, role, data):
+        """Checkpoint one finished section; this also counts as progress on the job."""
+        now = time.time()
+        self._execute(
+            "INSERT OR REPLACE INTO job_sections (job_id, role, data, stored) VALUES (?, ?, ?, ?)",
+            (job_id, role, json.dumps(data), now)
+        )
+        self._execute("UPDATE jobs SET updated = ? WHERE job_id = ?", (now, job_id))
+
+    def sections(self, job_id):
+        rows = self._execute("SELECT role, data FROM job_sections WHERE job_id = ?", (job_id,))
+        return {row["role"]: json.loads(row["data"]) for row in rows}
+
+    def history(self, limit=50, status=None):
+        """The most recent jobs first, without their results."""
+        where, params = ("WHERE status = ?", (status,)) if status else ("", ())
+        rows = self._execute(
+            f"SELECT job_id, status, created, updated, error, attempts FROM jobs {where} "
+            "ORDER BY created DESC LIMIT ?",
+            (*params, limit)
+        )
+        jobs = [dict(row, sections=[]) for row in rows]
+        if jobs:
+            by_id = {job["job_id"]: job for job in jobs}
+            for row in self._execute(
+                f"SELECT job_id, role FROM job_sections WHERE job_id IN ({', '.join('?' * len(jobs))}) ORDER BY role",
+                tuple(by_id)
+            ):
+                by_id[row["job_id"]]["sections"].append(row["role"])
+        return jobs
+
+    def set_owner(self, job_id, owner):
+        """Record the process now holding the job, with a fresh heartbeat."""
+        self._execute("UPDATE jobs SET owner = ?, heartbeat = ? WHERE job_id = ?", (owner, time.time(), job_id))
+
+    def heartbeat(self, owner):
+        """Mark every unfinished job the owner holds as still alive; returns how many there are."""
+        return self._change(
+            "UPDATE jobs SET heartbeat = ? WHERE owner = ? AND status IN (?, ?)",
+            (time.time(), owner, JOB_QUEUED, JOB_RUNNING)
+        )
+
+    def claim_stale(self, cutoff):
+        """Take over unfinished jobs whose owner's last heartbeat is before cutoff; returns their IDs.
+
+        A job waiting in a live worker's queue keeps its heartbeat, however long
+        it waits, so it is never run twice. Each job is released by a conditional
+        update that only one caller can win, so workers sharing the file never
+        take the same job.
+        """
+        claimed = []
+        rows = self._execute(
+            "SELECT job_id FROM jobs WHERE status IN (?, ?) AND COALESCE(heartbeat, updated) < ?",
+            (JOB_QUEUED, JOB_RUNNING, cutoff)
+        )
+        for row in rows:
+            now = time.time()
+            if self._change(
+                "UPDATE jobs SET status = ?, updated = ?, owner = NULL, heartbeat = ? "
+                "WHERE job_id = ? AND status IN (?, ?) AND COALESCE(heartbeat, updated) < ?",
+                (JOB_QUEUED, now, now, row["job_id"], JOB_QUEUED, JOB_RUNNING, cutoff)
+            ):
+                claimed.append(row["job_id"])
+        return claimed
+
+    def discard_older_than(self, cutoff):
+        self._execute(
+            "DELETE FROM job_sections WHERE job_id IN "
+            "(SELECT job_id FROM jobs WHERE status IN (?, ?) AND updated < ?)",
+            (JOB_DONE, JOB_FAILED, cutoff)
+        )
+        self._execute("DELETE FROM jobs WHERE status IN (?, ?) AND updated < ?", (JOB_DONE, JOB_FAILED, cutoff))
+
+
+class JobQueue:
+    """Run resume jobs on a bounded thread pool and record their status in a job store."""
+
+    def __init__(self, store, workers, queue_size):
+        self.store = store
+        # Identifies this process's jobs in a shared store; a restarted process gets a new one
+        self.owner = uuid.uuid4().hex
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="resume-job")
+        # Running plus waiting jobs; anything beyond this is turned away
+        self._slots = threading.BoundedSemaphore(workers + queue_size)
+
+    def submit(self, func, *args, inputs=None):
+        """Queue func(job_id, *args) and return the job ID, or None if the queue is full.
+
+        inputs (JSON) are kept with the job so that it can be queued again later.
+        """
+        if not self._slots.acquire(blocking=False):
+            return None
+        job_id = uuid.uuid4().hex
+        try:
+            self.store.create(job_id, inputs)
+            self.store.set_owner(job_id, self.owner)
+            self._executor.submit(self._run, job_id, func, *args)
+        except Exception:
+            # The job never reached _run, which would have released its slot
+            self._slots.release()
+            raise
+        return job_id
+
+    def requeue(self, job_id, func, *args):
+        """Queue an existing job again under its own ID; returns False if the queue is full."""
+        if not self._slots.acquire(blocking=False):
+            return False
+        try:
+            job = self.store.get(job_id)
+            self.store.update(job_id, status=JOB_QUEUED, error=None, attempts=(job["attempts"] or 1) + 1)
+            self.store.set_owner(job_id, self.owner)
+            self._executor.submit(self._run, job_id, func, *args)
+        except Exception:
+            self._slots.release()
+            raise
+        return True
+
+    def _run(self, job_id, func, *args):
+        try:
+            self.store.update(job_id, status=JOB_RUNNING)
+            result = func(job_id, *args)
+            self.store.update(job_id, status=JOB_DONE, result=result)
+            metrics.inc("resume_jobs_total", status=JOB_DONE)
+        except Exception as e:
+            print(f"Error in job {job_id}: {e}")
+            self.store.update(job_id, status=JOB_FAILED, error=str(e))
+            metrics.inc("resume_jobs_total", status=JOB_FAILED)
+        finally:
+            self._slots.release()
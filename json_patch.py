@@ -0,0 +1,104 @@
+"""JSON pointers (RFC 6901) and JSON patches (RFC 6902), used to edit a finished resume's context."""
+import copy
+import re
+
+
+JSON_PATCH_OPERATIONS = ("add", "remove", "replace", "move", "copy", "test")
+
+
+def parse_json_pointer(pointer):
+    """Split a JSON pointer such as "/experience/0/title" into its tokens (RFC 6901)."""
+    if not isinstance(pointer, str) or (pointer and not pointer.startswith("/")):
+        raise ValueError(f"{pointer!r} is not a JSON pointer")
+    return [token.replace("~1", "/").replace("~0", "~") for token in pointer.split("/")[1:]]
+
+
+def _pointer_key(container, token, adding=False):
+    # A dict key, or a list index; "-" (the end of a list) and len(list) only when adding
+    if isinstance(container, dict):
+        return token
+    if not isinstance(container, list):
+        raise ValueError(f"cannot look inside {type(container).__name__} value at {token!r}")
+    if adding and token == "-":
+        return len(container)
+    if not re.fullmatch(r"0|[1-9][0-9]*", token):
+        raise ValueError(f"{token!r} is not a list index")
+    index = int(token)
+    if index > len(container) or (index == len(container) and not adding):
+        raise ValueError(f"list index {index} is out of range")
+    return index
+
+
+def _pointer_get(document, tokens):
+    for token in tokens:
+        key = _pointer_key(document, token)
+        if isinstance(document, dict) and key not in document:
+            raise ValueError(f"there is no {key!r}")
+        document = document[key]
+    return document
+
+
+def _pointer_remove(document, tokens):
+    if not tokens:
+        raise ValueError("the whole document cannot be removed")
+    parent = _pointer_get(document, tokens[:-1])
+    key = _pointer_key(parent, tokens[-1])
+    if isinstance(parent, dict) and key not in parent:
+        raise ValueError(f"there is no {key!r}")
+    return parent.pop(key)
+
+
+def _pointer_add(document, tokens, value):
+    if not tokens:
+        return value
+    parent = _pointer_get(document, tokens[:-1])
+    key = _pointer_key(parent, tokens[-1], adding=True)
+    if isinstance(parent, list):
+        parent.insert(key, value)
+    else:
+        parent[key] = value
+    return document
+
+
+def apply_json_patch(document, operations):
+    """Apply a JSON patch (RFC 6902) to a copy of document and return the copy.
+
+    Every operation (add, remove, replace, move, copy, test) is applied in
+    order; the first one that cannot be applied raises ValueError and nothing
+    is changed.
+    """
+    if not isinstance(operations, list):
+        raise ValueError("The patch must be a JSON list of operations")
+    document = copy.deepcopy(document)
+    for number, operation in enumerate(operations, 1):
+        op = operation.get("op") if isinstance(operation, dict) else None
+        if op not in JSON_PATCH_OPERATIONS:
+            raise ValueError(f"Operation {number} needs an op of {', '.join(JSON_PATCH_OPERATIONS)}")
+        try:
+            tokens = parse_json_pointer(operation.get("path"))
+            if op in ("add", "replace", "test") and "value" not in operation:
+                raise ValueError("a value is required")
+            if op == "add":
+                document = _pointer_add(document, tokens, copy.deepcopy(operation["value"]))
+            elif op == "remove":
+                _pointer_remove(document, tokens)
+            elif op == "replace":
+                _pointer_get(document, tokens)
+                if tokens:
+                    _pointer_remove(document, tokens)
+                document = _pointer_add(document, tokens, copy.deepcopy(operation["value"]))
+            elif op == "test":
+                if _pointer_get(document, tokens) != operation["value"]:
+                    raise ValueError("the value does not match")
+            else:
+                source = parse_json_pointer(operation.get("from"))
+                if op == "copy":
+                    value = copy.deepcopy(_pointer_get(document, source))
+                elif tokens[:len(source)] == source and tokens != source:
+                    raise ValueError("a value cannot be moved into itself")
+                else:
+                    value = _pointer_remove(document, source)
+                document = _pointer_add(document, tokens, value)
+        except ValueError as e:
+            raise ValueError(f"Operation {number} ({op} {operation.get('path')}): {e}")
+    return document
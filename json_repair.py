@@ -0,0 +1,157 @@
+"""Parse section agents' JSON output, repairing the usual LLM mistakes, and check it against SECTION_SCHEMAS."""
+import json
+import re
+
+from config import SECTION_SCHEMAS
+from metrics import metrics
+
+
+def clean_json_block(text: str) -> str:
+    """
+    Clean triple-backtick-wrapped JSON content and remove control characters.
+    """
+    text = text.strip()
+    if text.startswith("```json"):
+        text = text[7:].strip("` \n")
+    elif text.startswith("```"):
+        text = text.strip("` \n")
+    # Remove control characters except for \n, \r, \t
+    text = re.sub(r'[\x00-\x08\x0b\x0c\x0e-\x1f\x7f]', '', text)
+    return text
+
+
+JSON_NUMBER_RE = re.compile(r"-?(?:0|[1-9]\d*)(?:\.\d+)?(?:[eE][+-]?\d+)?")
+JSON_LITERALS = ("true", "false", "null")
+
+
+def repair_json(text):
+    """Fix the usual LLM JSON mistakes in one pass and return the repaired text.
+
+    Prose around the JSON is dropped, missing commas between values are added,
+    trailing commas removed, raw newlines inside strings escaped, and output that
+    was cut off has its open string, arrays and objects closed, and a literal it
+    ends in completed (true, false, null) or dropped.
+    """
+    starts = [index for index in (text.find("{"), text.find("[")) if index >= 0]
+    if not starts:
+        return text
+    out = []
+    stack = []
+    in_string = escaped = in_literal = False
+    literal_start = 0
+    value_done = False  # a complete value was written and no comma has followed yet
+
+    def separate():
+        # Two values in a row inside an array or object: the comma between them is missing
+        if value_done and stack:
+            out.append(",")
+
+    for char in text[min(starts):]:
+        if in_string:
+            if escaped:
+                escaped = False
+            elif char == "\\":
+                escaped = True
+            elif char == '"':
+                in_string = False
+                value_done = True
+            elif char == "\n":
+                char = "\\n"
+            out.append(char)
+            continue
+        if in_literal:
+            if char.isalnum() or char in ".+-":
+                out.append(char)
+                continue
+            in_literal = False
+            value_done = True
+        if char.isspace():
+            out.append(char)
+        elif char == '"':
+            separate()
+            in_string = True
+            value_done = False
+            out.append(char)
+        elif char in "{[":
+            separate()
+            stack.append("}" if char == "{" else "]")
+            value_done = False
+            out.append(char)
+        elif char in "}]":
+            while out and (out[-1].isspace() or out[-1] == ","):
+                out.pop()
+            if not stack:
+                break
+            out.append(stack.pop())
+            value_done = True
+            if not stack:
+                break
+        elif char in ",:":
+            value_done = False
+            out.append(char)
+        elif char.isalnum() or char == "-":
+            separate()
+            in_literal = True
+            literal_start = len(out)
+            value_done = False
+            out.append(char)
+
+    if in_string:
+        out.append('"')
+    if in_literal:
+        literal = "".join(out[literal_start:])
+        del out[literal_start:]
+        completed = next((word for word in JSON_LITERALS if word.startswith(literal)), None)
+        if completed or JSON_NUMBER_RE.fullmatch(literal):
+            out.append(completed or literal)
+    while out and (out[-1].isspace() or out[-1] == ","):
+        out.pop()
+    if out and out[-1] == ":":
+        out.append("null")
+    out.extend(reversed(stack))
+    return "".join(out)
+
+
+def schema_problems(value, schema, path):
+    """List the places where value does not match a SECTION_SCHEMAS entry."""
+    if isinstance(schema, list):
+        if not isinstance(value, list):
+            return [f"{path} should be a list"]
+        return [
+            problem for index, item in enumerate(value)
+            for problem in schema_problems(item, schema[0], f"{path}[{index}]")
+        ]
+    if isinstance(schema, dict):
+        if not isinstance(value, dict):
+            return [f"{path} should be an object"]
+        return [
+            problem for key, field in schema.items() if key in value
+            for problem in schema_problems(value[key], field, f"{path}.{key}")
+        ]
+    if value is not None and (isinstance(value, bool) or not isinstance(value, (str, int, float))):
+        return [f"{path} should be text"]
+    return []
+
+
+def parse_section_output(role, raw):
+    """Parse one agent's raw output, repairing it if needed; returns (data, problems).
+
+    data is always a dict (empty if nothing could be parsed) and problems lists
+    what is wrong with it according to the role's schema.
+    """
+    text = clean_json_block(raw or "")
+    try:
+        data = json.loads(text)
+    except ValueError:
+        try:
+            data = json.loads(repair_json(text))
+            metrics.inc("section_json_repairs_total", role=role)
+        except ValueError as e:
+            return {}, [f"the output is not valid JSON ({e})"]
+    if isinstance(data, list) and role == "Keyword Generator":
+        data = {"top_keywords": data}
+    if not isinstance(data, dict):
+        return {}, ["the output should be a JSON object"]
+    schema = SECTION_SCHEMAS.get(role, {})
+    problems = [f'"{key}" is missing' for key in schema if key not in data]
+    return data, problems + schema_problems(data, schema, "output")
@@ -0,0 +1,226 @@
+"""Keyword index: candidate two-word phrases are ranked against the resume and the
+target job posting by TF-IDF cosine similarity, so the keyword sections choose
+from a short ranked list instead of reading both documents.
+"""
+import hashlib
+import os
+import re
+import threading
+from collections import Counter, OrderedDict
+
+import numpy as np
+
+from config import KEYWORD_POSTING_WEIGHT, KEYWORD_SHORTLIST_SIZE, KEYWORD_VOCABULARY_PATH
+
+
+KEYWORD_WORD_RE = re.compile(r"[A-Za-z][A-Za-z0-9+#'’-]*")
+KEYWORD_CLAUSE_RE = re.compile(r"[.,;:!?()\[\]{}<>|•·●▪\n\t]+")
+KEYWORD_STOPWORDS = {
+    "a", "about", "across", "all", "also", "an", "and", "any", "are", "as", "at", "be", "been", "both", "but",
+    "by", "can", "do", "each", "etc", "for", "from", "has", "have", "in", "including", "into", "is", "it",
+    "its", "may", "more", "most", "must", "new", "not", "of", "on", "or", "other", "our", "over", "per",
+    "should", "such", "that", "the", "their", "them", "these", "they", "this", "those", "to", "under", "up",
+    "us", "using", "via", "we", "what", "which", "while", "who", "will", "with", "within", "would", "you",
+    "your",
+    # Job posting filler
+    "ability", "able", "candidate", "candidates", "company", "degree", "demonstrated", "equivalent",
+    "excellent", "experience", "experienced", "familiarity", "ideal", "join", "knowledge", "looking",
+    "minimum", "plus", "preferred", "proven", "qualifications", "related", "required", "requirements",
+    "responsibilities", "role", "skills", "strong", "understanding", "year", "years",
+}
+# Words that make a posting's word pair a job title, a perk or an instruction rather than a skill
+POSTING_PHRASE_NOISE = {
+    "analyst", "apply", "assistant", "associate", "benefits", "build", "consultant", "coordinator", "designer",
+    "developer", "director", "drive", "engineer", "help", "hybrid", "intern", "junior", "lead", "manager",
+    "officer", "onsite", "own", "partner", "please", "position", "principal", "remote", "salary", "senior",
+    "specialist", "staff", "team", "work",
+}
+
+
+def keyword_words(text):
+    """Lowercase the words of a text, with None in place of stopwords; acronyms such as "IT" are kept."""
+    words = []
+    for word in KEYWORD_WORD_RE.findall(text):
+        acronym = word.isupper() and len(word) > 1
+        word = word.lower().strip("'’-").replace("-", "")
+        words.append(None if len(word) < 2 or (word in KEYWORD_STOPWORDS and not acronym) else word)
+    return words
+
+
+def keyword_stem(word):
+    """Fold a word to a crude stem, so "managing", "managed" and "manage" match."""
+    for suffix in ("ing", "ed", "es", "s"):
+        if word.endswith(suffix) and not word.endswith("ss") and len(word) - len(suffix) >= 4:
+            word = word[:-len(suffix)]
+            break
+    return word[:-1] if word.endswith("e") and len(word) > 4 else word
+
+
+def keyword_terms(text):
+    """Count a text's stemmed words and the adjacent word pairs within each clause."""
+    terms = Counter()
+    for clause in KEYWORD_CLAUSE_RE.split(text):
+        stems = [keyword_stem(word) if word else None for word in keyword_words(clause)]
+        terms.update(stem for stem in stems if stem)
+        terms.update(f"{first} {second}" for first, second in zip(stems, stems[1:]) if first and second)
+    return terms
+
+
+def posting_phrases(posting, limit=200):
+    """Two-word phrases used in a job posting, most frequent first, spelled as there."""
+    counts = Counter()
+    spellings = {}
+    for clause in KEYWORD_CLAUSE_RE.split(posting):
+        spelled = KEYWORD_WORD_RE.findall(clause)
+        words = keyword_words(clause)
+        for index in range(len(words) - 1):
+            if not (words[index] and words[index + 1]) or POSTING_PHRASE_NOISE & {words[index], words[index + 1]}:
+                continue
+            key = (keyword_stem(words[index]), keyword_stem(words[index + 1]))
+            first, second = spelled[index], spelled[index + 1]
+            counts[key] += 1
+            spellings.setdefault(key, " ".join(
+                word if any(char.isupper() for char in word) else word.capitalize() for word in (first, second)
+            ))
+    return [spellings[key] for key, _ in counts.most_common(limit)]
+
+
+def unit_rows(matrix):
+    return matrix / np.maximum(np.linalg.norm(matrix, axis=1, keepdims=True), 1e-12)
+
+
+def load_keyword_vocabulary(path):
+    try:
+        with open(path, encoding="utf-8") as f:
+            return [line.strip() for line in f if line.strip() and not line.startswith("#")]
+    except OSError as e:
+        print(f"Could not load the keyword vocabulary from {path}: {e}")
+        return []
+
+
+class KeywordIndex:
+    """Rank two-word phrases against a resume and a job posting by TF-IDF cosine similarity.
+
+    The vocabulary file's phrase matrix and IDF are built once, and again only
+    when the file changes; each ranking adds just the posting's new phrases.
+    Each resume's term counts are kept (LRU) so ranking it for many postings
+    only has to read the postings.
+    """
+
+    def __init__(self, path, cache_size=64):
+        self.path = path
+        self._vocabulary = None
+        self._cache_size = cache_size
+        self._documents = OrderedDict()
+        self._lock = threading.Lock()
+        self.vocabulary()
+
+    @staticmethod
+    def _build(phrases, mtime):
+        phrases = list(dict.fromkeys(phrases))
+        terms = [keyword_terms(phrase) for phrase in phrases]
+        # One row per phrase over its words and word pair; terms that many phrases
+        # share (e.g. "management") carry less weight
+        columns = {}
+        for phrase_terms in terms:
+            for term in phrase_terms:
+                columns.setdefault(term, len(columns))
+        presence = np.zeros((len(phrases), len(columns)))
+        for row, phrase_terms in enumerate(terms):
+            presence[row, [columns[term] for term in phrase_terms]] = 1.0
+        idf = np.log((1 + len(phrases)) / (1 + presence.sum(axis=0))) + 1
+        words = presence.copy()
+        words[:, [column for term, column in columns.items() if " " in term]] = 0
+        return {
+            "mtime": mtime,
+            "phrases": phrases,
+            "known": {frozenset(phrase_terms) for phrase_terms in terms},
+            "columns": columns,
+            "idf": idf,
+            # Terms missing from the vocabulary are weighted as if no phrase shared them
+            "new_idf": np.log(1 + len(phrases)) + 1,
+            "rows": unit_rows(presence * idf),
+            "words": words,
+            "word_counts": words.sum(axis=1),
+        }
+
+    def vocabulary(self):
+        """The vocabulary's phrases and matrices, rebuilt when the file's mtime changes."""
+        try:
+            mtime = os.stat(self.path).st_mtime_ns
+        except OSError:
+            mtime = None
+        with self._lock:
+            vocabulary = self._vocabulary
+            if vocabulary is None or vocabulary["mtime"] != mtime:
+                vocabulary = self._vocabulary = self._build(load_keyword_vocabulary(self.path), mtime)
+        return vocabulary
+
+    def _document_terms(self, text):
+        key = hashlib.sha256(text.encode("utf-8")).hexdigest()
+        with self._lock:
+            if key in self._documents:
+                self._documents.move_to_end(key)
+                return self._documents[key]
+        terms = keyword_terms(text)
+        with self._lock:
+            self._documents[key] = terms
+            while len(self._documents) > self._cache_size:
+                self._documents.popitem(last=False)
+        return terms
+
+    def rank(self, resume_text, posting, limit=KEYWORD_SHORTLIST_SIZE):
+        """Return up to limit phrases whose words all appear in the resume, best match first."""
+        vocabulary = self.vocabulary()
+        columns = vocabulary["columns"]
+        extra_phrases, extra_terms, extra_columns, seen = [], [], {}, set()
+        for phrase in posting_phrases(posting):
+            phrase_terms = keyword_terms(phrase)
+            key = frozenset(phrase_terms)
+            if phrase_terms and key not in vocabulary["known"] and key not in seen:
+                seen.add(key)
+                extra_phrases.append(phrase)
+                extra_terms.append(phrase_terms)
+                for term in phrase_terms:
+                    if term not in columns:
+                        extra_columns.setdefault(term, len(columns) + len(extra_columns))
+        phrases = vocabulary["phrases"] + extra_phrases
+        if not phrases:
+            return []
+
+        width = len(columns) + len(extra_columns)
+        idf = np.concatenate([vocabulary["idf"], np.full(len(extra_columns), vocabulary["new_idf"])])
+        documents = np.zeros((2, width))
+        for row, counts in enumerate((self._document_terms(resume_text), keyword_terms(posting))):
+            for term, count in counts.items():
+                column = columns.get(term, extra_columns.get(term))
+                if column is not None:
+                    documents[row, column] = 1 + np.log(count)
+        weighted = unit_rows(documents * idf)
+        shown = documents[0] > 0
+
+        # The vocabulary's rows only use its own columns; the posting's new phrases get rows of their own
+        scores = vocabulary["rows"] @ weighted[:, :len(columns)].T
+        grounded = vocabulary["words"] @ shown[:len(columns)] >= vocabulary["word_counts"]
+        if extra_phrases:
+            presence, words = np.zeros((len(extra_phrases), width)), np.zeros((len(extra_phrases), width))
+            for row, phrase_terms in enumerate(extra_terms):
+                for term in phrase_terms:
+                    column = columns.get(term, extra_columns.get(term))
+                    presence[row, column] = 1.0
+                    words[row, column] = 0.0 if " " in term else 1.0
+            scores = np.vstack([scores, unit_rows(presence * idf) @ weighted.T])
+            grounded = np.concatenate([grounded, words @ shown >= words.sum(axis=1)])
+        combined = KEYWORD_POSTING_WEIGHT * scores[:, 1] + (1 - KEYWORD_POSTING_WEIGHT) * scores[:, 0]
+
+        # The agents only see the shortlist, so it must not offer skills the resume does not show
+        combined[~grounded] = 0
+        order = np.argsort(-combined, kind="stable")[:limit]
+        return [phrases[row] for row in order if combined[row] > 0]
+
+
+keyword_index = KeywordIndex(KEYWORD_VOCABULARY_PATH)
+
+
+def format_shortlist(shortlist):
+    return "\n".join(f"{rank}. {phrase}" for rank, phrase in enumerate(shortlist, 1))
@@ -0,0 +1,37 @@
+"""Render a resume context into a DOCX layout inside a layout worker process.
+
+app.LayoutRenderer starts its workers with the spawn method, so each one is a
+fresh interpreter rather than a fork of the threaded web process. They import
+this module instead of app, which keeps them to docxtpl: no web app, job
+threads, LLM clients or agents are loaded into them.
+"""
+import io
+import os
+
+from docxtpl import DocxTemplate
+
+# Template file contents by path, read again when the file changes on disk
+_templates = {}
+
+
+def template_bytes(path):
+    mtime = os.stat(path).st_mtime_ns
+    cached = _templates.get(path)
+    if cached is None or cached[0] != mtime:
+        with open(path, "rb") as f:
+            cached = _templates[path] = (mtime, f.read())
+    return cached[1]
+
+
+def render_layout(template_path, context, output_path):
+    """Render context into the template at template_path and save it to output_path.
+
+    The file is written under a temporary name first, so a half-written DOCX
+    is never downloaded. Errors are raised to the caller.
+    """
+    doc = DocxTemplate(io.BytesIO(template_bytes(template_path)))
+    doc.render(context)
+    tmp_path = f"{output_path}.tmp"
+    doc.save(tmp_path)
+    os.replace(tmp_path, output_path)
+    return True
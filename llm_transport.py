@@ -0,0 +1,212 @@
+"""LLM client layer: every agent's OpenAI client sends its requests through one
+pooled HTTP client that enforces per-model rate limits, retries with backoff
+and the deadline of the section being generated.
+"""
+import contextvars
+import json
+import random
+import sqlite3
+import threading
+import time
+
+import httpx
+from openai import OpenAI
+from crewai.llms.providers.openai.completion import OpenAICompletion
+
+from config import (
+    LLM_BACKOFF_BASE, LLM_BACKOFF_MAX, LLM_COMPLETION_TOKENS, LLM_MAX_CONNECTIONS, LLM_MAX_RETRIES,
+    LLM_RATE_LIMIT_PATH, LLM_RATE_LIMITS, LLM_TIMEOUT, SECTION_DEADLINE,
+)
+from metrics import metrics
+
+
+# Set by run_section to the time its LLM requests must be done by
+section_deadline = contextvars.ContextVar("section_deadline", default=None)
+
+
+def draw_from_buckets(levels, buckets, now):
+    """Refill token buckets and take from them; return the new levels and the wait in seconds.
+
+    levels maps a bucket key to (level, updated) and buckets lists (key, amount,
+    per_minute). A bucket holds at most one minute of budget and may go below
+    zero; that debt is how long the caller has to wait before using its share.
+    """
+    new_levels, wait = {}, 0.0
+    for key, amount, per_minute in buckets:
+        level, updated = levels.get(key, (per_minute, now))
+        level = min(per_minute, level + (now - updated) * per_minute / 60) - amount
+        new_levels[key] = level
+        wait = max(wait, -level * 60 / per_minute)
+    return new_levels, wait
+
+
+class MemoryRateLimiter:
+    """Token buckets kept in this process only."""
+
+    def __init__(self):
+        self._levels = {}
+        self._lock = threading.Lock()
+
+    def reserve(self, buckets, max_wait):
+        """Take from every bucket and return the seconds to wait, or None (taking nothing) if over max_wait."""
+        with self._lock:
+            now = time.time()
+            levels, wait = draw_from_buckets(self._levels, buckets, now)
+            if wait > max_wait:
+                return None
+            self._levels.update((key, (level, now)) for key, level in levels.items())
+            return wait
+
+
+class SQLiteRateLimiter:
+    """Token buckets in a SQLite file so every gunicorn worker draws from the same budget."""
+
+    def __init__(self, path):
+        self.path = path
+        conn = sqlite3.connect(self.path, timeout=30)
+        try:
+            with conn:
+                conn.execute("CREATE TABLE IF NOT EXISTS rate_buckets (key TEXT PRIMARY KEY, level REAL, updated REAL)")
+        finally:
+            conn.close()
+
+    def reserve(self, buckets, max_wait):
+        """Take from every bucket and return the seconds to wait, or None (taking nothing) if over max_wait."""
+        conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+        try:
+            # Lock the file for writing before reading, so workers never draw from stale levels
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                keys = [key for key, _, _ in buckets]
+                rows = conn.execute(
+                    f"SELECT key, level, updated FROM rate_buckets WHERE key IN ({', '.join('?' * len(keys))})", keys
+                ).fetchall()
+                now = time.time()
+                levels, wait = draw_from_buckets({key: (level, updated) for key, level, updated in rows}, buckets, now)
+                if wait > max_wait:
+                    conn.execute("ROLLBACK")
+                    return None
+                conn.executemany(
+                    "INSERT OR REPLACE INTO rate_buckets (key, level, updated) VALUES (?, ?, ?)",
+                    [(key, level, now) for key, level in levels.items()]
+                )
+                conn.execute("COMMIT")
+                return wait
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+        finally:
+            conn.close()
+
+
+llm_limiter = SQLiteRateLimiter(LLM_RATE_LIMIT_PATH) if LLM_RATE_LIMIT_PATH else MemoryRateLimiter()
+
+
+def llm_request_budget(request):
+    """Return the model of an OpenAI request and the rate limit buckets it draws from."""
+    try:
+        body = json.loads(request.content)
+    except ValueError:
+        body = {}
+    model = body.get("model", "")
+    limits = LLM_RATE_LIMITS.get(model) or LLM_RATE_LIMITS.get("*") or {}
+    # Roughly four characters per prompt token, plus the completion the request may produce
+    tokens = len(request.content) // 4 + (
+        body.get("max_completion_tokens") or body.get("max_tokens") or LLM_COMPLETION_TOKENS
+    )
+    buckets = []
+    if limits.get("rpm"):
+        buckets.append((f"{model}:requests", 1, limits["rpm"]))
+    if limits.get("tpm"):
+        buckets.append((f"{model}:tokens", tokens, limits["tpm"]))
+    return model, buckets
+
+
+def retry_after_seconds(response):
+    """Read the server's requested retry delay from a response, if it sent one."""
+    for header, scale in (("retry-after-ms", 0.001), ("retry-after", 1)):
+        try:
+            return float(response.headers[header]) * scale
+        except (KeyError, ValueError):
+            continue
+    return None
+
+
+class LLMTransport(httpx.HTTPTransport):
+    """HTTP transport for all OpenAI requests: rate limits, retries with backoff and deadlines.
+
+    Each attempt first reserves its model's request and token budget, waiting if
+    the budget is spent. 429s, 5xx responses and connection errors are retried with
+    exponential backoff and full jitter (longer if the server asks), but never past
+    the deadline of the section being generated.
+    """
+
+    def handle_request(self, request):
+        deadline = section_deadline.get() or time.time() + SECTION_DEADLINE
+        model, buckets = llm_request_budget(request)
+        attempt = 0
+        while True:
+            if buckets:
+                wait = llm_limiter.reserve(buckets, deadline - time.time())
+                if wait is None:
+                    # Worded so crewai does not treat it as a throttle and retry it
+                    raise httpx.TimeoutException(
+                        f"No {model} request budget left before the section deadline", request=request
+                    )
+                metrics.observe("llm_throttle_seconds", wait, model=model)
+                time.sleep(wait)
+
+            response, reason = None, None
+            try:
+                response = super().handle_request(request)
+                if response.status_code == 429 or response.status_code >= 500:
+                    reason = str(response.status_code)
+            except httpx.TransportError as e:
+                if attempt >= LLM_MAX_RETRIES:
+                    raise
+                reason = type(e).__name__
+            if reason is None:
+                return response
+
+            delay = random.uniform(0, min(LLM_BACKOFF_MAX, LLM_BACKOFF_BASE * 2 ** attempt))
+            if response is not None:
+                delay = max(delay, retry_after_seconds(response) or 0)
+            if attempt >= LLM_MAX_RETRIES or time.time() + delay > deadline:
+                # Out of retries: hand the error response to the OpenAI client to report
+                if response is not None:
+                    return response
+                raise httpx.TimeoutException(
+                    f"LLM request for {model} did not succeed before the section deadline", request=request
+                )
+            if response is not None:
+                response.close()
+            attempt += 1
+            metrics.inc("llm_http_retries_total", model=model, reason=reason)
+            print(f"Retrying LLM request for {model} in {delay:.1f}s after {reason} (attempt {attempt})")
+            time.sleep(delay)
+
+
+llm_http_client = httpx.Client(
+    transport=LLMTransport(
+        limits=httpx.Limits(max_connections=LLM_MAX_CONNECTIONS, max_keepalive_connections=LLM_MAX_CONNECTIONS)
+    ),
+    timeout=LLM_TIMEOUT,
+)
+
+
+class PooledOpenAICompletion(OpenAICompletion):
+    """crewai's OpenAI LLM with its requests sent through the shared llm_http_client.
+
+    crewai has no public way to hand its OpenAI client an httpx.Client (its
+    client_params also build the async client, which needs an AsyncClient), so
+    this overrides private methods; requirements.txt pins the crewai release
+    they were checked against.
+    """
+
+    def _build_sync_client(self):
+        return OpenAI(**self._get_client_params(), http_client=llm_http_client)
+
+
+def build_llm(model):
+    """Create the LLM for one agent; retries happen in LLMTransport, not the OpenAI client."""
+    return PooledOpenAICompletion(model=model, timeout=LLM_TIMEOUT, max_retries=0)
@@ -0,0 +1,217 @@
+"""Process-wide metrics served on /metrics, and the token, cost and timing trace of each job."""
+import contextlib
+import threading
+import time
+from collections import OrderedDict, deque
+
+from config import METRICS_SAMPLES, MODEL_PRICES
+
+
+class Metrics:
+    """Prometheus-style counters and histograms kept in process memory, served on /metrics."""
+
+    def __init__(self):
+        self._metrics = OrderedDict()
+        self._lock = threading.Lock()
+
+    def counter(self, name, help_text):
+        self._metrics[name] = {"type": "counter", "help": help_text, "series": {}}
+
+    def histogram(self, name, help_text, buckets):
+        self._metrics[name] = {"type": "histogram", "help": help_text, "buckets": buckets, "series": {}}
+
+    def inc(self, name, amount=1, **labels):
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            series = self._metrics[name]["series"]
+            series[key] = series.get(key, 0) + amount
+
+    def observe(self, name, value, **labels):
+        metric = self._metrics[name]
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            series = metric["series"].get(key)
+            if series is None:
+                series = metric["series"][key] = {
+                    "buckets": [0] * len(metric["buckets"]),
+                    "sum": 0.0,
+                    "count": 0,
+                    "samples": deque(maxlen=METRICS_SAMPLES),
+                }
+            for index, bound in enumerate(metric["buckets"]):
+                if value <= bound:
+                    series["buckets"][index] += 1
+            series["sum"] += value
+            series["count"] += 1
+            series["samples"].append(value)
+
+    def percentiles(self, name):
+        """Return (labels, count, p50, p95) for each series of a histogram."""
+        with self._lock:
+            series = [
+                (dict(key), data["count"], sorted(data["samples"]))
+                for key, data in self._metrics[name]["series"].items()
+            ]
+        return [
+            (labels, count, samples[int(0.50 * (len(samples) - 1))], samples[int(0.95 * (len(samples) - 1))])
+            for labels, count, samples in series
+        ]
+
+    def values(self, name):
+        """Return (labels, value) for each series of a counter."""
+        with self._lock:
+            return [(dict(key), value) for key, value in self._metrics[name]["series"].items()]
+
+    def render(self):
+        """Return every metric in the Prometheus text exposition format."""
+        def label_text(labels):
+            if not labels:
+                return ""
+            pairs = ",".join(
+                '{}="{}"'.format(name, str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n"))
+                for name, value in labels
+            )
+            return "{" + pairs + "}"
+
+        lines = []
+        with self._lock:
+            for name, metric in self._metrics.items():
+                lines.append(f"# HELP {name} {metric['help']}")
+                lines.append(f"# TYPE {name} {metric['type']}")
+                for key, value in metric["series"].items():
+                    if metric["type"] == "counter":
+                        lines.append(f"{name}{label_text(key)} {value}")
+                        continue
+                    for bound, count in zip(metric["buckets"], value["buckets"]):
+                        lines.append(f"{name}_bucket{label_text(key + (('le', bound),))} {count}")
+                    lines.append(f"{name}_bucket{label_text(key + (('le', '+Inf'),))} {value['count']}")
+                    lines.append(f"{name}_sum{label_text(key)} {value['sum']}")
+                    lines.append(f"{name}_count{label_text(key)} {value['count']}")
+        return "\n".join(lines) + "\n"
+
+
+metrics = Metrics()
+metrics.counter("llm_requests_total", "LLM requests per section role and model, by outcome.")
+metrics.counter("llm_retries_total", "Extra LLM requests made within one section call.")
+metrics.counter("llm_tokens_total", "Prompt and completion tokens per section role and model.")
+metrics.counter("llm_cost_usd_total", "Estimated LLM spend in USD per section role and model.")
+metrics.counter("llm_http_retries_total", "LLM HTTP requests retried after a 429, 5xx or connection error.")
+metrics.counter("section_fallbacks_total", "Sections handed to a fallback model from MODEL_ROUTES.")
+metrics.counter("section_json_repairs_total", "Section outputs that needed JSON repair before parsing.")
+metrics.counter("section_reasks_total", "Sections asked for again because their output was not valid.")
+metrics.counter("section_invalid_total", "Sections still not valid after every re-ask.")
+metrics.counter("section_cache_requests_total", "Section cache lookups by role and result.")
+metrics.counter("section_rules_total", "Sections read by the rule-based extractor, by role and whether it was used.")
+metrics.counter("resume_jobs_total", "Finished resume jobs by status.")
+metrics.counter("section_checkpoints_total", "Section checkpoints saved with their job, and reused when it reran.")
+metrics.counter("upload_rejections_total", "Uploads refused before parsing, by reason.")
+metrics.counter("pdf_exports_total", "PDF downloads by how they were served.")
+metrics.counter("layout_renders_total", "Saved contexts rendered into another layout, by layout and result.")
+metrics.counter("context_edits_total", "Edits to finished resumes, by result.")
+metrics.histogram(
+    "resume_stage_seconds", "Time spent per pipeline stage; LLM calls are stage=\"llm\" per role.",
+    (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 30, 60, 120)
+)
+metrics.histogram(
+    "llm_call_seconds", "Latency of each section's LLM call by role and model.",
+    (0.25, 0.5, 1, 2.5, 5, 10, 15, 20, 30, 45, 60, 90, 120)
+)
+metrics.histogram(
+    "llm_throttle_seconds", "Time LLM requests waited for their model's rate limit budget.",
+    (0.01, 0.1, 0.5, 1, 2.5, 5, 10, 20, 30, 60, 120)
+)
+metrics.histogram(
+    "resume_text_tokens", "Resume text tokens as extracted and after cleaning and compaction.",
+    (250, 500, 1000, 1500, 2000, 3000, 4000, 6000, 8000, 12000, 16000)
+)
+metrics.histogram(
+    "resume_pipeline_seconds", "Wall-clock time per resume by pipeline mode.",
+    (1, 2.5, 5, 10, 20, 30, 45, 60, 90, 120, 180, 300)
+)
+metrics.histogram(
+    "resume_cost_usd", "Estimated LLM spend in USD per resume by pipeline mode.",
+    (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1)
+)
+
+
+def llm_cost(model, prompt_tokens, completion_tokens):
+    """Estimate the USD cost of an LLM call from MODEL_PRICES; unknown models cost nothing."""
+    prices = MODEL_PRICES.get(model) or MODEL_PRICES.get(model.split("/")[-1]) or (0, 0)
+    return (prompt_tokens * prices[0] + completion_tokens * prices[1]) / 1_000_000
+
+
+def record_llm_call(role, model, started, seconds, crew_output, usage=None):
+    """Record one section's Crew call in the metrics and, if given, the job's trace."""
+    token_usage = getattr(crew_output, "token_usage", None)
+    requests = getattr(token_usage, "successful_requests", 0) or 1
+    prompt_tokens = getattr(token_usage, "prompt_tokens", 0) or 0
+    completion_tokens = getattr(token_usage, "completion_tokens", 0) or 0
+    cost = llm_cost(model, prompt_tokens, completion_tokens)
+
+    metrics.inc("llm_requests_total", role=role, model=model, outcome="ok")
+    if requests > 1:
+        metrics.inc("llm_retries_total", requests - 1, role=role, model=model)
+    metrics.inc("llm_tokens_total", prompt_tokens, role=role, model=model, kind="prompt")
+    metrics.inc("llm_tokens_total", completion_tokens, role=role, model=model, kind="completion")
+    metrics.inc("llm_cost_usd_total", cost, role=role, model=model)
+    metrics.observe("resume_stage_seconds", seconds, stage="llm", role=role)
+    metrics.observe("llm_call_seconds", seconds, role=role, model=model)
+
+    if usage is not None:
+        usage.add(requests, prompt_tokens, completion_tokens, cost)
+        usage.span(
+            "llm", started, seconds, role=role, model=model, requests=requests,
+            prompt_tokens=prompt_tokens, completion_tokens=completion_tokens, cost_usd=round(cost, 6)
+        )
+
+
+@contextlib.contextmanager
+def timed_stage(stage, usage=None, role=""):
+    """Time a block into the stage histogram and, if usage is given, the job's trace."""
+    started = time.time()
+    try:
+        yield
+    finally:
+        seconds = time.time() - started
+        metrics.observe("resume_stage_seconds", seconds, stage=stage, role=role)
+        if usage is not None:
+            usage.span(stage, started, seconds, role=role)
+
+
+class PipelineUsage:
+    """Token, cost and timing trace collected while one resume is processed."""
+
+    def __init__(self, job_id=None):
+        self.job_id = job_id
+        self.started = time.time()
+        self.llm_calls = 0
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+        self.cost_usd = 0.0
+        self.spans = []
+        self._lock = threading.Lock()
+
+    def add(self, requests, prompt_tokens, completion_tokens, cost):
+        with self._lock:
+            self.llm_calls += requests
+            self.prompt_tokens += prompt_tokens
+            self.completion_tokens += completion_tokens
+            self.cost_usd += cost
+
+    def span(self, stage, started, seconds, **details):
+        """Append one timed step; start is relative to the beginning of the job."""
+        entry = {"stage": stage, "start": round(started - self.started, 3), "seconds": round(seconds, 3)}
+        entry.update(details)
+        with self._lock:
+            self.spans.append(entry)
+
+    def trace(self):
+        with self._lock:
+            return {
+                "job_id": self.job_id,
+                "llm_calls": self.llm_calls,
+                "prompt_tokens": self.prompt_tokens,
+                "completion_tokens": self.completion_tokens,
+                "cost_usd": round(self.cost_usd, 6),
+                "spans": list(self.spans),
+            }
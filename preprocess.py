@@ -0,0 +1,223 @@
+"""Resume preprocessing: the extracted text is cleaned of extraction artifacts and
+compacted to a token budget once per job, then split into sections so each
+agent in SECTION_SLICES reads only the part of the resume it needs.
+"""
+import re
+import threading
+import time
+import unicodedata
+from collections import Counter
+try:
+    import tiktoken
+except Exception:
+    tiktoken = None
+
+from config import RESUME_TOKEN_BUDGET, TOKENIZER_ENCODING
+from metrics import metrics
+from rules import EDUCATION_HEADING_RE, OTHER_HEADING_RE, is_heading
+
+
+INVISIBLE_CHARS_RE = re.compile("[\u00ad\u200b\u200c\u200d\u2060\ufeff]")
+HYPHEN_BREAK_RE = re.compile(r"([a-z])-\n([a-z])")
+COLUMN_GAP_RE = re.compile(r"\s*(?:\t|\s{5,})\s*")
+WRAPPED_LINE_RE = re.compile(r"[a-z]+(?:[ ,;]|$)")
+PAGE_NUMBER_RE = re.compile(r"(?:page\s*)?\d{1,2}(?:\s*(?:/|of)\s*\d{1,2})?|-\s*\d{1,2}\s*-", re.IGNORECASE)
+# Lines this long are sentences or bullets: a repeat is an extraction artifact,
+# and they are the first to go when the text is over its token budget
+LONG_LINE_CHARS = 40
+EXPERIENCE_HEADING_RE = re.compile(
+    r"(?:professional |work |relevant |career |additional |other |volunteer |leadership )?"
+    r"(?:experience|employment(?: history)?|work history|career history)",
+    re.IGNORECASE,
+)
+SUMMARY_HEADING_RE = re.compile(r"(?:professional |career )?(?:summary|profile)|objective|about me", re.IGNORECASE)
+# Kinds of resume section by heading, checked in order; lines above the first
+# heading are the "contact" header
+RESUME_SECTION_HEADINGS = [
+    ("experience", EXPERIENCE_HEADING_RE),
+    ("education", EDUCATION_HEADING_RE),
+    ("summary", SUMMARY_HEADING_RE),
+    ("other", OTHER_HEADING_RE),
+]
+# Lines a resume over its token budget loses, in order: (section kind, long lines only).
+# The contact header and education are never trimmed.
+COMPACT_PASSES = [("experience", True), ("summary", True), ("other", True), ("experience", False)]
+
+
+class TokenCounter:
+    """Count tokens with tiktoken's encoding for the OpenAI models, loaded on first use.
+
+    Without tiktoken, or if its encoding cannot be loaded, tokens are estimated
+    at four characters each.
+    """
+
+    def __init__(self, encoding):
+        self.encoding = encoding
+        self._tokenizer = None
+        self._loaded = False
+        self._lock = threading.Lock()
+
+    def _load(self):
+        with self._lock:
+            if not self._loaded:
+                if tiktoken is not None:
+                    try:
+                        self._tokenizer = tiktoken.get_encoding(self.encoding)
+                    except Exception as e:
+                        print(f"Could not load the {self.encoding} tokenizer, estimating tokens instead: {e}")
+                self._loaded = True
+        return self._tokenizer
+
+    def count(self, text):
+        tokenizer = self._tokenizer if self._loaded else self._load()
+        if tokenizer is None:
+            return (len(text) + 3) // 4
+        return len(tokenizer.encode(text, disallowed_special=()))
+
+
+token_counter = TokenCounter(TOKENIZER_ENCODING)
+
+
+def section_kind(line):
+    """The kind of resume section a line is the heading of, or None if it is not a heading."""
+    line = line.strip().lstrip("•·●▪*-–— \t").strip()
+    for kind, pattern in RESUME_SECTION_HEADINGS:
+        if is_heading(line, pattern):
+            return kind
+    return None
+
+
+def running_lines(pages):
+    """Lines near the top or bottom of more than one page: running headers and footers."""
+    if len(pages) < 2:
+        return set()
+    counts = Counter()
+    for page in pages:
+        lines = [
+            line.strip().casefold() for line in page.splitlines()
+            if line.strip() and not PAGE_NUMBER_RE.fullmatch(line.strip())
+        ]
+        counts.update(set(lines[:3] + lines[-3:]))
+    return {line for line, count in counts.items() if count > 1}
+
+
+def compact_lines(lines, budget):
+    """Drop lines section by section, in COMPACT_PASSES order, until they fit in budget tokens.
+
+    Experience is trimmed first: the long lines (bullets and descriptions) of
+    the oldest roles, at the end of the section, go before anything else, and
+    its titles, companies and dates go last. Headings, the contact header,
+    education and the first line of every section are always kept, so every
+    agent's slice of the resume still has its section.
+    """
+    tokens = [token_counter.count(line) + 1 for line in lines]
+    total = sum(tokens)
+    # The section kind of each line (None for headings), and the first line under each heading
+    kinds, firsts = [], set()
+    kind, first = "contact", True
+    for index, line in enumerate(lines):
+        heading = section_kind(line)
+        if heading:
+            kind, first = heading, True
+            kinds.append(None)
+            continue
+        kinds.append(kind)
+        if first:
+            firsts.add(index)
+            first = False
+
+    dropped = set()
+    for kind, long_only in COMPACT_PASSES:
+        for index in range(len(lines) - 1, -1, -1):
+            if total <= budget:
+                break
+            if kinds[index] != kind or index in dropped or index in firsts:
+                continue
+            if long_only and len(lines[index]) < LONG_LINE_CHARS:
+                continue
+            dropped.add(index)
+            total -= tokens[index]
+    return [line for index, line in enumerate(lines) if index not in dropped]
+
+
+def clean_resume_text(resume_text, budget=RESUME_TOKEN_BUDGET):
+    """Clean extracted resume text for the prompts and compact it to budget tokens.
+
+    Unicode and whitespace are normalized, column gaps become " | ", words and
+    sentences wrapped across PDF lines are rejoined, page numbers and running
+    headers or footers are dropped, and repeated lines (such as table cells
+    extracted twice) are kept once. Cleaning text twice changes nothing.
+    """
+    text = unicodedata.normalize("NFKC", resume_text).replace("\r\n", "\n").replace("\r", "\n")
+    text = HYPHEN_BREAK_RE.sub(r"\1\2", INVISIBLE_CHARS_RE.sub("", text))
+    running = running_lines(re.split(r"\n\s*\n", text))
+
+    lines = []
+    for line in text.splitlines():
+        line = " ".join(COLUMN_GAP_RE.sub(" | ", line.strip()).split())
+        if not line or PAGE_NUMBER_RE.fullmatch(line):
+            continue
+        # A word in lower case after a long unfinished line continues the sentence the PDF wrapped
+        previous = lines[-1] if lines else ""
+        if WRAPPED_LINE_RE.match(line) and len(previous) >= LONG_LINE_CHARS and previous[-1] not in ".:;!?":
+            lines[-1] = f"{previous} {line}"
+        else:
+            lines.append(line)
+
+    kept = []
+    seen = set()
+    for line in lines:
+        key = line.casefold()
+        repeated = key in seen and (key in running or len(line) >= LONG_LINE_CHARS or kept[-1].casefold() == key)
+        if not repeated:
+            kept.append(line)
+            seen.add(key)
+
+    if budget and token_counter.count("\n".join(kept)) > budget:
+        kept = compact_lines(kept, budget)
+    return "\n".join(kept)
+
+
+def prepare_resume_text(resume_text, usage=None):
+    """Clean a resume's text for the prompts, recording its tokens before and after."""
+    started = time.time()
+    cleaned = clean_resume_text(resume_text)
+    seconds = time.time() - started
+    before, after = token_counter.count(resume_text), token_counter.count(cleaned)
+    metrics.observe("resume_stage_seconds", seconds, stage="preprocess", role="")
+    metrics.observe("resume_text_tokens", before, stage="extracted")
+    metrics.observe("resume_text_tokens", after, stage="cleaned")
+    if usage is not None:
+        usage.span("preprocess", started, seconds, tokens_before=before, tokens_after=after)
+    return cleaned
+
+
+def split_resume_sections(resume_text):
+    """Split cleaned resume text into its contact header and sections, joined by kind."""
+    sections = {}
+    kind = "contact"
+    for line in resume_text.splitlines():
+        kind = section_kind(line) or kind
+        sections.setdefault(kind, []).append(line)
+    return {kind: "\n".join(lines) for kind, lines in sections.items()}
+
+
+def resume_slice(resume_text, role):
+    """The parts of the resume a section's agent reads, or all of it if they cannot be found."""
+    kinds = SECTION_SLICES.get(role)
+    if not kinds:
+        return resume_text
+    sections = split_resume_sections(resume_text)
+    parts = [sections[kind] for kind in kinds if kind in sections]
+    return "\n".join(parts) if parts else resume_text
+
+
+# Parts of the resume (see split_resume_sections) each section's agent reads;
+# the others read all of it. Rule-based extraction always reads all of it.
+SECTION_SLICES = {
+    "Name Generator": ["contact"],
+    "Achievements Writer": ["summary", "experience", "other"],
+    "Job Description Writer": ["experience"],
+    "Additional Experience Writer": ["experience"],
+    "Education Writer": ["education"],
+}
@@ -0,0 +1,443 @@
+"""Section registry: agent definitions and prompt templates are built once per
+worker, so each request only binds the resume text into them.
+"""
+import string
+
+
+class PromptTemplate:
+    """A prompt with {placeholders}, split into static text and fields once at startup."""
+
+    def __init__(self, template):
+        self.template = template
+        self.parts = [
+            (literal, field) for literal, field, _, _ in string.Formatter().parse(template)
+        ]
+
+    def render(self, **values):
+        return "".join(
+            literal if field is None else literal + str(values[field])
+            for literal, field in self.parts
+        )
+
+
+AGENT_DEFINITIONS = {
+    # Agent to extract name, contact, location
+    "Name Generator": dict(
+        goal="Extract structured personal information from a resume in structured JSON format.",
+        backstory="An expert at reading resumes and identifying core personal information including name, location, phone number, email, and LinkedIn.",
+    ),
+    # Agent to extract ATS-friendly keywords
+    "Keyword Generator": dict(
+        goal="Generate exactly four two-word, ATS-optimized keywords based on resume content, suitable for inclusion beneath the candidate's name on a resume.",
+        backstory="You are an expert resume keyword analyst trained in recruiting and Applicant Tracking Systems. You extract four distinct, high-impact, two-word phrases that summarize a candidate’s professional strengths and focus areas, tailored to the job title and experience level.",
+    ),
+    "Summary Writer": dict(
+        goal="Generate a concise 3-paragraph professional summary from resume content using a consistent, formulaic structure.",
+        backstory=(
+            "You are an expert in crafting ATS-optimized professional summaries that present candidates with clarity, structure, and strategic positioning. "
+            "Each summary must use a predefined 3-paragraph structure with consistent sentence patterns and word choice, reflecting the candidate's experience, communication strengths, and forward-looking value."
+        ),
+    ),
+    "Areas of Expertise Writer": dict(
+        goal="Generate 9 expertise keywords in 3x3 format without repeating top ATS keywords in structured JSON format.",
+        backstory="An expert in resume writing and applicant tracking systems. Selects precise, two-word industry phrases that reflect a candidate’s most relevant weekly-used strengths, avoiding redundancy with other keyword sections.",
+    ),
+    "Achievements Writer": dict(
+        goal=(
+            "Craft 3–5 professional achievement bullets with measurable outcomes using strong verbs and domain-specific keywords. "
+            "Each achievement must include the company or organization where it occurred, as mentioned in the resume. "
+            "If no company can be determined, do not mention the company."
+        ),
+        backstory=(
+            "You are an expert in resume writing, specializing in turning work experience into high-impact, quantifiable bullet points. "
+            "You understand resume tone, industry nuance, and how to highlight both leadership and collaborative achievements with precision. "
+            "You only attribute achievements to companies explicitly found in the resume. "
+            "You always follow strict formatting rules."
+        ),
+    ),
+    "Job Description Writer": dict(
+        goal=(
+            "Craft concise, structured job experience entries with professional responsibilities and achievements from resume data. "
+            "Summarize core responsibilities and factual achievements without fabricating or repeating metrics. "
+            "If numeric results or specific outcomes are not present, describe the impact qualitatively (e.g., 'improved process efficiency')."
+        ),
+        backstory=(
+            "You are an expert resume editor who writes ATS-optimized experience sections. "
+            "You always preserve factual accuracy and avoid duplication. "
+            "You must never make up achievements, metrics, or company details. "
+            "Each description must sound professional, concise, and entirely supported by the source resume."
+        ),
+    ),
+    "Additional Experience Writer": dict(
+        goal="Return earlier work experience entries in structured JSON format.",
+        backstory="Summarizes older work experience in a clean, compact structure including company, location, title, and dates.",
+    ),
+    "Education Writer": dict(
+        goal="Extract and return education entries in structured JSON format.",
+        backstory="An expert in parsing and formatting educational history for professional resumes.",
+    ),
+    # Agent that writes every section in one call (single-pass mode)
+    "Resume Writer": dict(
+        goal="Turn a resume into every structured section of an ATS-optimized resume in a single JSON object.",
+        backstory=(
+            "You are an expert resume writer trained in recruiting and Applicant Tracking Systems. "
+            "You extract personal details, keywords, summaries, achievements, experience, and education with precision. "
+            "You must never make up achievements, metrics, or company details. "
+            "You always follow strict formatting rules."
+        ),
+    ),
+}
+
+SECTION_PROMPTS = {
+    "Name Generator": dict(
+        description=PromptTemplate(
+            "Extract the following fields from the resume delimited by < >:\n"
+            "1. Full Name\n"
+            "2. Location (City, State)\n"
+            "3. Phone Number\n"
+            "4. Email Address\n"
+            "5. LinkedIn URL. Omit https://www.\n\n"
+            "Resume:\n<{resume_text}>"
+        ),
+        expected_output=(
+            "Return a JSON object with the following keys:\n"
+            "{\n"
+            '  "full_name": "Jasmine Taylor",\n'
+            '  "location": "New York, NY",\n'
+            '  "phone": "555-123-4567",\n'
+            '  "email": "jasmine@example.com",\n'
+            '  "LinkedIn": "linkedin.com/in/jasminetaylor"\n'
+            "}"
+        ),
+    ),
+    "Keyword Generator": dict(
+        description=PromptTemplate(
+            "Read the resume below (delimited by < >) and extract the top four (4) two-word keywords optimized for Applicant Tracking Systems (ATS).\n"
+            "Resume:\n<{resume_text}>\n\n"
+            "OUTPUT RULES:\n"
+            "• No repeated concepts, soft skills, or personal traits.\n"
+            "• Use ampersands (&) only when standard (e.g., Risk & Compliance).\n"
+            "• These should be skills or phrases that match professional strengths and job market terminology.\n"
+            "• Match terms to job level and job description keywords."
+        ),
+        expected_output=(
+            "Return a JSON list of exactly 4 strings, like this:\n"
+            " {\n"
+            ' "top_keywords": [\n'
+            '       "keyword 1", "keyword 2", "keyword 3", "keyword 4"\n'
+            "   ]\n"
+            "}"
+        ),
+    ),
+    "Summary Writer": dict(
+        description=PromptTemplate(
+            "Read the resume below (delimited by < >) and write a concise 3-paragraph professional summary.\n"
+            "Resume:\n<{resume_text}>\n\n"
+            "Follow this structure:\n"
+            "Each paragraph should follow a three-sentence structure.\n\n"
+            "Tailor each paragraph to the job.\n\n"
+            "Pick descriptor, role noun, soft skills / traits, missions, and impacts from the predefined lists below that align with their most recent job.\n\n"
+            "Resume:\n<{resume_text}>"
+            "Paragraph 1 – Experience & Impact:\n"
+            "{{Descriptor 1}} and {{Descriptor 2}} {{Role Noun}} offering {{Years}}+ years of experience {{Action 1}}, {{Action 2}}, and {{Action 3}} in {{Industry/Function}}.\n\n"
+            "Paragraph 2 – Influence & Communication:\n"
+            "{{Descriptor 1}} and {{Descriptor 2}} {{Role Noun}} skilled at {{Soft Skill A}}, {{Soft Skill B}}, and {{Outcome}} using {{Trait A}}, {{Trait B}}, and {{Trait C}}.\n\n"
+            "Paragraph 3 – Forward Value & Mission:\n"
+            "{{Descriptor 1}} and {{Descriptor 2}} {{Role Noun}} focused on {{Mission A}}, {{Mission B}}, and {{Mission C}} by {{How they do it}}, delivering {{Impact}}.\n\n"
+            "Use random sampling from the following predefined lists:\n"
+            "- Descriptor examples: strategic, collaborative, detail-oriented, visionary, innovative, adaptable, people-focused, entrepreneurial, composed, solutions-oriented, future-facing\n"
+            "- Nouns (Role) examples: leader, problem solver, collaborator, communicator,expert, strategist, business partner, relationship builder\n"
+            "- Soft Skills / Traits examples: conflict resolution, storytelling ability, cultural awareness, growth mindset, calm under pressure, adaptability, strategic insight, hands-on approach\n"
+            "- Missions examples: improving access, driving sustainability, transforming service delivery\n"
+            "- Impacts examples: global health, community growth, team cohesion, policy change\n\n"
+            "Each paragraph must be exactly one sentence, 25–30 words."
+        ),
+        expected_output=(
+            "Return a JSON object with the following structure:\n\n"
+            "{\n"
+            '  "summaries": [\n'
+            '    "Paragraph 1",\n'
+            '    "Paragraph 2",\n'
+            '    "Paragraph 3"\n'
+            "  ]\n"
+            "}\n\n"
+            "Ensure each paragraph is complete, ATS-friendly, and aligned with modern resume standards."
+        ),
+    ),
+    "Areas of Expertise Writer": dict(
+        description=PromptTemplate(
+            "From the resume below, generate 9 two-word unique 'Areas of Expertise' keyword phrases arranged for visual formatting in 3 columns and 3 rows.\n "
+            "Resume:\n<{resume_text}>\n\n"
+            "Do not repeat the top keywords already used earlier. Keep all keywords concise and resume-appropriate.\n"
+            "All phrases should reflect weekly-used, high-signal competencies.\n"
+            "Maintain balance across technical, strategic, and operational skills.\n"
+            "Only use two-word phrases that would appear in real job descriptions or LinkedIn.\n"
+        ),
+        expected_output=(
+            "Return a JSON object like this:\n"
+            '{\n'
+            '  "expertise_keywords": [\n'
+            '    "Keyword 1", "Keyword 2", "Keyword 3",\n'
+            '    "Keyword 4", "Keyword 5", "Keyword 6",\n'
+            '    "Keyword 7", "Keyword 8", "Keyword 9"\n'
+            '  ]\n'
+            '}\n\n'
+            "Only include keyword phrases. No explanations, no formatting, no column titles."
+        ),
+    ),
+    "Achievements Writer": dict(
+        description=PromptTemplate(
+            "Using the resume content below (delimited by < >), write 3–5 bullet points "
+            "describing notable professional achievements.\n\n"
+            "❗ STRICT RULES ❗\n"
+            "- Each achievement must include the company or organization where it occurred, as mentioned in the resume. "
+            "- If no company can be determined, do not mention the company.\n"
+            "- Do not invent, infer, or estimate any metrics, outcomes, or achievements.\n"
+            "- Only use information explicitly present in the resume text.\n"
+            "- If no numeric data is provided, describe impact qualitatively (e.g., 'enhanced efficiency', 'streamlined workflow').\n"
+            "- Each bullet must be exactly one sentence, no more than 30 words, impactful, and written in active voice.\n"
+            "- Begin with a strong action verb (e.g., Spearheaded, Delivered, Improved).\n"
+            "- Avoid pronouns, filler words, adverbs, and passive constructions.\n"
+            "- Limit 'and' to two uses per bullet (use 'as well as' or 'in addition to' if needed).\n\n"
+            "Resume:\n<{resume_text}>\n\n"
+            "Tailor each bullet precisely to the resume’s content and role."
+        ),
+        expected_output=(
+            "Return a JSON object with this structure:\n"
+            "{\n"
+            '  "notable_achievements": [\n'
+            '        {"text": "Improved lead generation by 150% across nine websites through the deployment of AI and A/B testing tools, resulting in four successful campaign implementations within six months at Ingersoll Rand."},\n'
+            '        {"text": "Identified inefficiencies within support team workflows and proposed process improvements that increased resolution speed, reduced errors, and strengthened team performance across multiple community support functions."}\n'
+            '        {"text": "Increased prospects and customers database from 100,000 to 800,000 within one year by utilizing both external and internal channels, significantly boosting marketing outreach and engagement."}\n'
+            "  ]\n"
+            "}\n\n"
+            "Only return the JSON. Do not include commentary, headers, or formatting."
+        ),
+    ),
+    "Job Description Writer": dict(
+        description=PromptTemplate(
+            "Use the resume below (delimited by < >) to write structured job descriptions for the 3 most recent roles.\n"
+            "Resume:\n<{resume_text}>\n"
+            "Notable achievements already covered by another agent are provided below. "
+            "DO NOT repeat, rephrase, or reword any of them.\n\n"
+            "Previously listed achievements:\n<{achievement_output_text}>\n\n"
+            "For each role, return:\n"
+            "• Company name\n"
+            "• Location (City, State or Country)\n"
+            "• Title\n"
+            "• Dates of employment\n"
+            "• 3-sentence paragraph (≤50 words) describing ONLY responsibilities — factual, recurring duties, no metrics or achievements\n"
+            "• 1–4 achievement bullet points using this structure:\n"
+            "    {{\"label\": \"Verb\", \"text\": \"achievement text with measurable or qualitative outcome\"}}\n\n"
+            "DESCRIPTION RULES:\n"
+            "• Begin with a high-level task summary\n"
+            "• Next two sentences describe recurring responsibilities using action verbs\n"
+            "ACHIEVEMENT RULES:\n"
+            "• 1–4 bullets per role\n"
+            "• Each bullet starts with a label verb (e.g., \"Led\", \"Supervised\", \"Directed\", \"Oversaw\", \"Managed\", \"Orchestrated\", \"Held full accountability\", \"Delivered\",  \"Drove\" )\n"
+            "• Use short, strong phrasing\n"
+            "• Do NOT invent, infer, or estimate any metrics or accomplishments.\n"
+            "• Do NOT copy or paraphrase achievements listed earlier.\n"
+            "• If the resume lacks quantifiable results, describe the impact qualitatively.\n"
+            "• Avoid generic filler (e.g., 'responsible for', 'various duties').\n"
+            "• Use strong action verbs, concise phrasing, and clear structure.\n"
+            "• Keep tone factual, not promotional.\n"
+        ),
+        expected_output=(
+            "Return a JSON object with the following structure:\n\n"
+            "{\n"
+            '  "experience": [\n'
+            "    {\n"
+            '      "company": "Company Name",\n'
+            '      "location": "City, State",\n'
+            '      "title": "Job Title",\n'
+            '      "dates": "Start Year-End Year or Present",\n'
+            '      "description": "Three-sentence responsibility paragraph here (≤50 words).",\n'
+            '      "achievements": [\n'
+            '        {"label": "Led", "text": "achievement with metric or qualitative outcome."},\n'
+            '        ...\n'
+            '      ]\n'
+            "    },\n"
+            "    ...\n"
+            "  ]\n"
+            "}"
+        ),
+    ),
+    "Additional Experience Writer": dict(
+        description=PromptTemplate(
+            "From the resume below (delimited by < >), extract earlier/older work experience entries (not among the most recent 3 roles). "
+            "If resume has only 3 roles, leave this section blank. Do not make up any information. "
+            "For each job, return:\n"
+            "- Company name\n"
+            "- Location (City, State)\n"
+            "- Job Title\n"
+            "- Dates of Employment\n\n"
+            "Resume:\n<{resume_text}>"
+        ),
+        expected_output=(
+            "Return a JSON object in the following structure:\n\n"
+            "{\n"
+            '  "earlier_experience": [\n'
+            "    {\n"
+            '      "company": "Duke University",\n'
+            '      "location": "Durham, North Carolina",\n'
+            '      "title": "Project Coordinator (Time-Limited Grant)",\n'
+            '      "dates": "Jan 2011 – Jan 2012"\n'
+            "    },\n"
+            "    ...\n"
+            "  ]\n"
+            "}\n\n"
+            "Do not include responsibilities, bullet points, or extra commentary — just the structured entries."
+        ),
+    ),
+    "Education Writer": dict(
+        description=PromptTemplate(
+            "From the resume below (delimited by < >), extract all education and all professional certifications entries. "
+            "For each entry, return:\n"
+            "- Institution name\n"
+            "- Credential (e.g. degree, diploma)\n\n"
+            "Resume:\n<{resume_text}>"
+        ),
+        expected_output=(
+            "Return a JSON object with this structure:\n\n"
+            "{\n"
+            '  "education": [\n'
+            "    {\n"
+            '      "institution": "Harvard University",\n'
+            '      "credential": "Master of Business Administration"\n'
+            "    },\n"
+            "    ...\n"
+            "  ]\n"
+            "}"
+        ),
+    ),
+    "Resume Writer": dict(
+        description=PromptTemplate(
+            "Read the resume below (delimited by < >) and write every section of an ATS-optimized resume in one JSON object.\n\n"
+            "Resume:\n<{resume_text}>\n\n"
+            "{keyword_guidance}"
+            "SECTIONS:\n"
+            "1. Personal information: full name, location (City, State), phone number, email address and LinkedIn URL (omit https://www.).\n"
+            "2. top_keywords: exactly four two-word ATS keywords. No soft skills or personal traits. Use ampersands (&) only when standard (e.g., Risk & Compliance).\n"
+            "3. summaries: three paragraphs, each exactly one sentence of 25–30 words:\n"
+            "   - Experience & Impact: {{Descriptor 1}} and {{Descriptor 2}} {{Role Noun}} offering {{Years}}+ years of experience {{Action 1}}, {{Action 2}}, and {{Action 3}} in {{Industry/Function}}.\n"
+            "   - Influence & Communication: {{Descriptor 1}} and {{Descriptor 2}} {{Role Noun}} skilled at {{Soft Skill A}}, {{Soft Skill B}}, and {{Outcome}} using {{Trait A}}, {{Trait B}}, and {{Trait C}}.\n"
+            "   - Forward Value & Mission: {{Descriptor 1}} and {{Descriptor 2}} {{Role Noun}} focused on {{Mission A}}, {{Mission B}}, and {{Mission C}} by {{How they do it}}, delivering {{Impact}}.\n"
+            "4. expertise_keywords: nine two-word 'Areas of Expertise' phrases that do not repeat top_keywords, balanced across technical, strategic, and operational skills.\n"
+            "5. notable_achievements: 3–5 bullets, each one sentence of no more than 30 words in active voice, beginning with a strong action verb "
+            "and naming the company where it occurred when the resume states it.\n"
+            "6. experience: the 3 most recent roles with company, location, title, dates, a description of ONLY responsibilities (≤50 words, no metrics) "
+            "and 1–4 achievements as {{\"label\": \"Verb\", \"text\": \"...\"}}. Do NOT repeat or paraphrase notable_achievements.\n"
+            "7. earlier_experience: older roles beyond the 3 most recent with company, location, title and dates only. Use an empty list if there are none.\n"
+            "8. education: all education and professional certification entries with institution and credential.\n\n"
+            "RULES:\n"
+            "- Do not invent, infer, or estimate any metrics, outcomes, or achievements.\n"
+            "- Only use information explicitly present in the resume text.\n"
+            "- If no numeric data is provided, describe impact qualitatively.\n"
+            "- Keep tone factual, not promotional."
+        ),
+        expected_output=(
+            "Return a JSON object with this structure:\n"
+            "{\n"
+            '  "full_name": "Jasmine Taylor",\n'
+            '  "location": "New York, NY",\n'
+            '  "phone": "555-123-4567",\n'
+            '  "email": "jasmine@example.com",\n'
+            '  "LinkedIn": "linkedin.com/in/jasminetaylor",\n'
+            '  "top_keywords": ["keyword 1", "keyword 2", "keyword 3", "keyword 4"],\n'
+            '  "summaries": ["Paragraph 1", "Paragraph 2", "Paragraph 3"],\n'
+            '  "expertise_keywords": ["Keyword 1", "Keyword 2", "Keyword 3", "Keyword 4", "Keyword 5", "Keyword 6", "Keyword 7", "Keyword 8", "Keyword 9"],\n'
+            '  "notable_achievements": [{"text": "Achievement sentence."}],\n'
+            '  "experience": [\n'
+            "    {\n"
+            '      "company": "Company Name",\n'
+            '      "location": "City, State",\n'
+            '      "title": "Job Title",\n'
+            '      "dates": "Start Year-End Year or Present",\n'
+            '      "description": "Responsibility paragraph.",\n'
+            '      "achievements": [{"label": "Led", "text": "achievement with metric or qualitative outcome."}]\n'
+            "    }\n"
+            "  ],\n"
+            '  "earlier_experience": [{"company": "Company", "location": "City, State", "title": "Job Title", "dates": "Jan 2011 – Jan 2012"}],\n'
+            '  "education": [{"institution": "Harvard University", "credential": "Master of Business Administration"}]\n'
+            "}\n\n"
+            "Only return the JSON. Do not include commentary, headers, or formatting."
+        ),
+    ),
+}
+
+# Keyword sections of a job with a target posting: they choose from the ranked
+# shortlist instead of reading the resume
+TAILORED_SECTION_PROMPTS = {
+    "Keyword Generator": dict(
+        description=PromptTemplate(
+            "Choose the top four (4) two-word keywords optimized for Applicant Tracking Systems (ATS) for a resume tailored to a job posting.\n"
+            "The phrases below (delimited by < >) come from the candidate's resume, ranked by how well they match both the resume and the posting, best first.\n"
+            "Shortlist:\n<{keyword_shortlist}>\n\n"
+            "OUTPUT RULES:\n"
+            "• Only use phrases from the shortlist, spelled as they appear there. Prefer higher-ranked phrases.\n"
+            "• No repeated concepts, soft skills, or personal traits.\n"
+            "• Use ampersands (&) only when standard (e.g., Risk & Compliance)."
+        ),
+        expected_output=SECTION_PROMPTS["Keyword Generator"]["expected_output"],
+    ),
+    "Areas of Expertise Writer": dict(
+        description=PromptTemplate(
+            "From the shortlist below, choose 9 two-word unique 'Areas of Expertise' keyword phrases arranged for visual formatting in 3 columns and 3 rows.\n"
+            "The phrases (delimited by < >) come from the candidate's resume, ranked by how well they match both the resume and a job posting, best first.\n"
+            "Shortlist:\n<{keyword_shortlist}>\n\n"
+            "Do not repeat the top keywords already used earlier. Only use phrases from the shortlist, spelled as they appear there.\n"
+            "Maintain balance across technical, strategic, and operational skills, preferring higher-ranked phrases.\n"
+        ),
+        expected_output=SECTION_PROMPTS["Areas of Expertise Writer"]["expected_output"],
+    ),
+}
+
+# Added to the single-pass prompt of a job with a target posting
+KEYWORD_GUIDANCE = PromptTemplate(
+    "Target job keywords from the resume, ranked by how well they match both the resume and the job posting, best first:\n"
+    "{keyword_shortlist}\n"
+    "Choose top_keywords and expertise_keywords only from these phrases, spelled as they appear.\n\n"
+)
+
+# Added to the positioning sections of a variant written for one target role
+TARGET_ROLE_GUIDANCE = PromptTemplate(
+    "\n\nTARGET ROLE: {target_role}\n"
+    "Position this section for a {target_role} role: lead with the experience, skills and results most relevant to it. "
+    "Do not invent anything the resume does not state."
+)
+
+# Sections that only need the resume text; the Job Description Writer also
+# needs the achievements and runs after them
+INDEPENDENT_SECTIONS = [
+    "Name Generator",
+    "Keyword Generator",
+    "Summary Writer",
+    "Areas of Expertise Writer",
+    "Additional Experience Writer",
+    "Education Writer",
+]
+
+# Sections that read facts off the resume and are shared by all variants of it,
+# and the sections that position the candidate and are written per variant
+EXTRACTION_SECTIONS = ["Name Generator", "Additional Experience Writer", "Education Writer"]
+POSITIONING_SECTIONS = [
+    "Keyword Generator",
+    "Summary Writer",
+    "Areas of Expertise Writer",
+    "Achievements Writer",
+    "Job Description Writer",
+]
+
+# Reorder tasks so Achievements come after Areas of Expertise
+SECTION_SORT_ORDER = {
+    "Name Generator": 1,
+    "Keyword Generator": 2,
+    "Summary Writer": 3,
+    "Areas of Expertise Writer": 4,
+    "Achievements Writer": 5,          # 👈 place it right after expertise
+    "Job Description Writer": 6,
+    "Additional Experience Writer": 7,
+    "Education Writer": 8,
+    "Certifications Writer": 9
+}
@@ -0,0 +1,191 @@
+"""DOCX templates parsed once and reused for every render, and the PDF version of the TraditionalFormat layout."""
+import copy
+import logging
+import os
+import threading
+
+from docxtpl import DocxTemplate
+from jinja2 import Environment
+try:
+    from fpdf import FPDF
+except Exception:
+    FPDF = None
+
+logger = logging.getLogger(__name__)
+
+
+def pad_list(lst, length, filler=""):
+    """Pad or truncate list to the desired length."""
+    return lst + [filler] * (length - len(lst)) if len(lst) < length else lst[:length]
+
+
+class CachingEnvironment(Environment):
+    """Jinja environment that compiles each distinct template source only once."""
+
+    def __init__(self, **options):
+        super().__init__(**options)
+        self._compiled = {}
+        self._lock = threading.Lock()
+
+    def from_string(self, source, globals=None, template_class=None):
+        template = self._compiled.get(source)
+        if template is None:
+            template = super().from_string(source, globals, template_class)
+            with self._lock:
+                self._compiled[source] = template
+        return template
+
+
+class PrecompiledDocxTemplate(DocxTemplate):
+    """DocxTemplate that starts from an already parsed document and patched body XML."""
+
+    def __init__(self, template_file, docx, body_xml, jinja_env):
+        super().__init__(template_file)
+        self.docx = docx
+        self.body_xml = body_xml
+        self.jinja_env = jinja_env
+
+    def build_xml(self, context, jinja_env=None):
+        return self.render_xml_part(self.body_xml, self.docx._part, context, jinja_env)
+
+    def render(self, context, jinja_env=None, autoescape=False):
+        super().render(context, jinja_env or self.jinja_env, autoescape)
+
+
+class TemplateCache:
+    """Parsed DOCX templates by file name, reloaded when the file changes on disk."""
+
+    def __init__(self, directory):
+        self.directory = directory
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    def _load(self, path, mtime):
+        template = DocxTemplate(path)
+        template.init_docx()
+        return {
+            "mtime": mtime,
+            "docx": template.docx,
+            "body_xml": template.patch_xml(template.get_xml()),
+            "jinja_env": CachingEnvironment(),
+        }
+
+    def get(self, name):
+        """Return a fresh, render-ready copy of the named template."""
+        path = os.path.join(self.directory, name)
+        mtime = os.stat(path).st_mtime_ns
+        with self._lock:
+            entry = self._entries.get(name)
+            if entry is None or entry["mtime"] != mtime:
+                logger.debug("Loading template: %s", path)
+                entry = self._entries[name] = self._load(path, mtime)
+        return PrecompiledDocxTemplate(path, copy.deepcopy(entry["docx"]), entry["body_xml"], entry["jinja_env"])
+
+
+# Colours of the TraditionalFormat template
+PDF_BLACK = (0, 0, 0)
+PDF_BLUE = (79, 129, 189)
+
+
+def render_pdf(context):
+    """Lay a resume context out like the TraditionalFormat template and return the PDF bytes.
+
+    This draws the template's layout directly with fpdf2, so no office
+    process is needed; the text uses the PDF core Times font.
+    """
+    if FPDF is None:
+        raise RuntimeError("fpdf2 is not installed. Please add fpdf2 to requirements.txt and reinstall.")
+    pdf = FPDF(unit="pt", format="letter")
+    pdf.core_fonts_encoding = "windows-1252"
+    pdf.set_margins(36, 36, 36)
+    pdf.set_auto_page_break(True, margin=36)
+    pdf.add_page()
+    left = pdf.l_margin
+
+    def text(value):
+        # Core fonts only cover Windows-1252; anything else becomes "?"
+        return str(value or "").encode("windows-1252", "replace").decode("windows-1252")
+
+    def line(runs, size=11, align="L", after=2.0, indent=0):
+        """Write one paragraph made of (text, style, colour) runs."""
+        pdf.set_left_margin(left + indent)
+        pdf.set_x(left + indent)
+        if align == "C":
+            pdf.set_font("Times", runs[0][1], size)
+            pdf.set_text_color(*runs[0][2])
+            pdf.multi_cell(0, size * 1.2, text("".join(run[0] for run in runs)), align="C")
+        else:
+            for value, style, color in runs:
+                pdf.set_font("Times", style, size)
+                pdf.set_text_color(*color)
+                pdf.write(size * 1.2, text(value))
+            pdf.ln(size * 1.2)
+        pdf.set_left_margin(left)
+        pdf.ln(after)
+
+    def bullet(runs):
+        pdf.set_font("Times", "", 11)
+        pdf.set_text_color(*PDF_BLACK)
+        pdf.set_xy(left + 6, pdf.get_y())
+        pdf.cell(12, 13.2, text("•"))
+        line(runs, indent=18, after=1)
+
+    def heading(title):
+        pdf.ln(6)
+        line([(title, "B", PDF_BLACK)], size=12.5, after=0)
+        pdf.set_draw_color(*PDF_BLACK)
+        pdf.line(left, pdf.get_y(), pdf.w - pdf.r_margin, pdf.get_y())
+        pdf.ln(4)
+
+    line([(context.get("full_name"), "", PDF_BLACK)], size=18, after=0)
+    contact = " • ".join(str(context.get(key) or "") for key in ["location", "phone", "email", "LinkedIn"])
+    line([(contact, "", PDF_BLACK)], after=0)
+    pdf.line(left, pdf.get_y(), pdf.w - pdf.r_margin, pdf.get_y())
+    pdf.ln(6)
+
+    experience = context.get("experience") or []
+    if experience:
+        line([(experience[0].get("title"), "B", PDF_BLUE)], size=17, align="C", after=3)
+    line([(" • ".join(map(str, context.get("top_keywords") or [])), "B", PDF_BLACK)], size=12, align="C", after=4)
+    for summary in context.get("summaries") or []:
+        line([(summary, "", PDF_BLACK)], after=4)
+
+    heading("Areas of Expertise")
+    keywords = pad_list(list(context.get("expertise_keywords") or [])[:9], 9)
+    pdf.set_font("Times", "", 11)
+    pdf.set_text_color(*PDF_BLACK)
+    for row in range(0, 9, 3):
+        for keyword in keywords[row:row + 3]:
+            pdf.cell(pdf.epw / 3, 13.2, text(f"•  {keyword}" if keyword else ""))
+        pdf.ln(13.2)
+
+    heading("Notable Achievements")
+    for achievement in context.get("notable_achievements") or []:
+        bullet([(achievement.get("text"), "", PDF_BLACK)])
+
+    heading("Professional Experience")
+    for job in experience:
+        line([(f"{job.get('company') or ''} – ", "B", PDF_BLACK), (job.get("location"), "", PDF_BLACK)], after=0)
+        line([(job.get("title"), "B", PDF_BLUE), (" • ", "B", PDF_BLACK), (job.get("dates"), "", PDF_BLACK)], after=0)
+        line([(job.get("description"), "", PDF_BLACK)], after=1)
+        for achievement in job.get("achievements") or []:
+            label, body = achievement.get("label") or "", achievement.get("text") or ""
+            if label or body:
+                bullet([(f"{label} " if label and body else label, "B", PDF_BLACK), (body, "", PDF_BLACK)])
+        pdf.ln(6)
+
+    heading("Earlier Experience")
+    for job in context.get("earlier_experience") or []:
+        line([
+            (job.get("company"), "B", PDF_BLACK), (" • ", "", PDF_BLACK), (job.get("title"), "B", PDF_BLUE),
+            (" • ", "", PDF_BLACK), (job.get("dates"), "", PDF_BLACK),
+        ])
+
+    heading("Education • Qualifications")
+    for entry in (context.get("education") or []) + (context.get("certifications") or []):
+        line([
+            (entry.get("institution"), "B", PDF_BLACK), ("  • ", "", PDF_BLACK),
+            (entry.get("credential"), "B", PDF_BLUE),
+        ])
+
+    return bytes(pdf.output())
@@ -0,0 +1,270 @@
+"""Rule-based extraction: contact details and education usually follow a few fixed
+patterns, so they are read straight from the resume text. Each extractor
+returns its section data and a confidence from 0 to 1; below
+RULES_MIN_CONFIDENCE the section is left to its LLM agent.
+"""
+import re
+
+from config import SECTION_KEYS
+
+
+US_STATES = (
+    "AL|AK|AZ|AR|CA|CO|CT|DE|DC|FL|GA|HI|ID|IL|IN|IA|KS|KY|LA|ME|MD|MA|MI|MN|MS|MO|MT|NE|NV|NH|NJ|NM|NY|"
+    "NC|ND|OH|OK|OR|PA|RI|SC|SD|TN|TX|UT|VT|VA|WA|WV|WI|WY"
+)
+EMAIL_RE = re.compile(r"[A-Za-z0-9._%+-]+@[A-Za-z0-9-]+(?:\.[A-Za-z0-9-]+)*\.[A-Za-z]{2,}")
+PHONE_RE = re.compile(r"(?<![\d-])(?:\+?1[\s.-]?)?\(?(\d{3})\)?[\s.-]?(\d{3})[\s.-]?(\d{4})(?![\d-])")
+INTL_PHONE_RE = re.compile(r"(?<!\w)\+\d{1,3}(?:[\s.-]?\(?\d{1,4}\)?){2,5}(?!\d)")
+LINKEDIN_RE = re.compile(r"(?:https?://)?(?:[a-z]{2,3}\.)?linkedin\.com/in/[A-Za-z0-9_%-]+", re.IGNORECASE)
+LOCATION_RE = re.compile(rf"\b([A-Z][A-Za-z.'-]*(?:[ -][A-Z][A-Za-z.'-]*){{0,3}}),[ \t]*({US_STATES})\b")
+NAME_WORD_RE = re.compile(r"[A-Z][A-Za-z'’-]*\.?|[A-Z]\.")
+STATE_SUFFIX_RE = re.compile(rf",\s*(?:{US_STATES})\b(?:\s+\d{{5}}(?:-\d{{4}})?)?")
+FIELD_SEPARATOR_RE = re.compile(r"\s*(?:[|•·●▪;\t]|\s[-–—]\s|\s{3,})\s*")
+
+# Lines at the top of a resume searched for the name and location
+HEADER_LINES = 10
+NOT_NAME_WORDS = {
+    "resume", "curriculum", "vitae", "cv", "summary", "profile", "objective", "experience", "education",
+    "skills", "contact", "phone", "email", "linkedin", "address", "page", "senior", "junior", "lead",
+    "manager", "engineer", "developer", "director", "analyst", "consultant", "specialist", "designer",
+    "officer", "coordinator", "executive", "president", "associate", "assistant",
+}
+
+EDUCATION_HEADING_RE = re.compile(
+    r"(?:education(?:al background)?|academic (?:background|history|credentials)|"
+    r"(?:professional )?(?:certifications?|licenses?|credentials)|"
+    r"(?:education|certifications?|licenses?)(?: (?:and|&) (?:training|certifications?|licenses?|"
+    r"professional development))+)",
+    re.IGNORECASE,
+)
+OTHER_HEADING_RE = re.compile(
+    r"(?:(?:professional |work |relevant |career |additional |other |volunteer |leadership )?"
+    r"(?:experience|employment(?: history)?|work history|career history)|summary|professional summary|"
+    r"profile|objective|(?:technical |core |key )?(?:skills|competencies)|areas of expertise|expertise|"
+    r"projects|awards|honors(?: (?:and|&) awards)?|achievements|publications|volunteer(?:ing)?|"
+    r"interests|languages|references|affiliations|memberships|activities|training)",
+    re.IGNORECASE,
+)
+DEGREE_RE = re.compile(
+    r"\b(?:Bachelor|Master|Doctor|Doctorate|Associate|Diploma|Degree|Certificate|Certification|Certified|"
+    r"License|Licensed|Licensure)\b|"
+    r"(?<![\w.])(?:B\.?A|B\.?S|B\.?Sc|B\.?B\.?A|B\.?Eng|B\.?F\.?A|M\.?A|M\.?S|M\.?Sc|M\.?B\.?A|M\.?Eng|M\.?F\.?A|"
+    r"M\.?P\.?H|M\.?P\.?A|Ph\.?D|J\.?D|M\.?D|Ed\.?D|A\.?A|A\.?S|GED|CPA|PMP|CFA)\.?(?![\w])"
+)
+INSTITUTION_RE = re.compile(
+    r"\b(?:University|College|Institute|School|Academy|Polytechnic|Conservatory|Seminary)\b|"
+    r"\b(?:Universidad|Université|Universität|Universit[àa])\b",
+    re.IGNORECASE,
+)
+DATE_RE = re.compile(
+    r"\b(?:(?:Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sep|Sept|Oct|Nov|Dec)[a-z]*\.?\s+)?(?:19|20)\d{2}\b"
+    r"(?:\s*[-–—to]+\s*(?:(?:(?:Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sep|Sept|Oct|Nov|Dec)[a-z]*\.?\s+)?"
+    r"(?:19|20)\d{2}|present|current))?|\b(?:expected|anticipated|graduated|present|current)\b",
+    re.IGNORECASE,
+)
+# Detail lines under an education entry that carry no institution or credential
+EDUCATION_DETAIL_RE = re.compile(
+    r"^(?:gpa|cgpa|relevant coursework|coursework|courses|honors|minor|concentration|thesis|dissertation|"
+    r"dean'?s list|summa|magna|cum laude|graduated|activities|awards|focus|specialization)\b",
+    re.IGNORECASE,
+)
+
+
+def resume_lines(resume_text):
+    """Non-empty lines of the resume with bullets and surrounding space removed."""
+    lines = []
+    for line in resume_text.splitlines():
+        line = line.strip().lstrip("•·●▪*-–— \t").strip()
+        if line:
+            lines.append(line)
+    return lines
+
+
+def is_heading(line, pattern):
+    return pattern.fullmatch(line.rstrip(":").strip()) is not None
+
+
+def looks_like_name(text):
+    """True if text reads like a person's name: two to four capitalised words and nothing else."""
+    words = text.split()
+    if not 2 <= len(words) <= 4 or any(word.lower().strip(".") in NOT_NAME_WORDS for word in words):
+        return False
+    return all(NAME_WORD_RE.fullmatch(word) for word in words)
+
+
+def looks_like_place(text):
+    """True if text could be a town name: one to three capitalised words."""
+    words = text.split()
+    return 1 <= len(words) <= 3 and all(NAME_WORD_RE.fullmatch(word) for word in words)
+
+
+def extract_contact(resume_text):
+    """Read name, location, phone, email and LinkedIn URL from the resume text.
+
+    Confidence is the product of one factor per field: 1 when the field was
+    found, less when it is missing, by how often a resume really leaves it out.
+    """
+    lines = resume_lines(resume_text)
+    header = lines[:HEADER_LINES]
+    data = dict.fromkeys(SECTION_KEYS["Name Generator"], "")
+    confidence = 1.0
+
+    for line in header:
+        cities = {match.group(1) for match in LOCATION_RE.finditer(line)}
+        parts = [part.strip() for field in FIELD_SEPARATOR_RE.split(line) for part in field.split(",")]
+        name = next((part for part in parts if looks_like_name(part) and part not in cities), None)
+        if name:
+            data["full_name"] = name
+            break
+    else:
+        confidence = 0.0
+
+    for line in header:
+        for match in LOCATION_RE.finditer(line):
+            if match.group(1) != data["full_name"]:
+                data["location"] = f"{match.group(1)}, {match.group(2)}"
+                break
+        if data["location"]:
+            break
+    else:
+        confidence *= 0.8
+
+    emails = list(dict.fromkeys(match.group(0) for match in EMAIL_RE.finditer(resume_text)))
+    if emails:
+        data["email"] = emails[0]
+        # Several addresses (e.g. a referee's) leave some doubt about which is the candidate's
+        confidence *= 1.0 if len(emails) == 1 else 0.9
+    else:
+        confidence *= 0.7
+
+    match = PHONE_RE.search(resume_text)
+    if match:
+        data["phone"] = "-".join(match.groups())
+    else:
+        match = INTL_PHONE_RE.search(resume_text)
+        if match:
+            data["phone"] = match.group(0).strip()
+            confidence *= 0.9
+        else:
+            confidence *= 0.8
+
+    match = LINKEDIN_RE.search(resume_text)
+    if match:
+        data["LinkedIn"] = re.sub(r"^(?:https?://)?(?:www\.)?", "", match.group(0), flags=re.IGNORECASE)
+    elif "linkedin" in resume_text.lower():
+        # Mentioned but not as a readable URL, e.g. a hyperlinked word
+        confidence *= 0.5
+    return data, confidence
+
+
+def education_sections(lines):
+    """Yield the lines of every education or certifications section of the resume."""
+    section = None
+    for line in lines:
+        if is_heading(line, EDUCATION_HEADING_RE):
+            if section:
+                yield section
+            section = []
+        elif section is not None:
+            if is_heading(line, OTHER_HEADING_RE):
+                yield section
+                section = None
+            else:
+                section.append(line)
+    if section:
+        yield section
+
+
+def strip_field(field):
+    """Trim spaces, dots and colons from a field, and the brackets the split left unbalanced.
+
+    "(CPA)" keeps its brackets; "(CPA" from "Accountant (CPA, AICPA)" loses its "(".
+    """
+    field = re.sub(r"\(\s*\)", " ", field)
+    while True:
+        stripped = field.strip(" .:")
+        if stripped.endswith(")") and stripped.count(")") > stripped.count("("):
+            stripped = stripped[:-1]
+        elif stripped.startswith("(") and stripped.count("(") > stripped.count(")"):
+            stripped = stripped[1:]
+        if stripped == field:
+            return field
+        field = stripped
+
+
+def extract_education(resume_text):
+    """Read institution/credential entries from the education and certifications sections.
+
+    Every line is split into fields once dates and locations are removed; each
+    field is an institution, a credential or unknown. Confidence is the share
+    of lines that could be read and drops when an entry has no credential.
+    """
+    lines = resume_lines(resume_text)
+    sections = list(education_sections(lines))
+    if not sections:
+        # No section to read: fine if the resume never mentions a degree, otherwise let the LLM look
+        mentioned = any(DEGREE_RE.search(line) or INSTITUTION_RE.search(line) for line in lines)
+        return {"education": []}, 0.0 if mentioned else 0.9
+
+    entries, entry = [], {}
+    read_lines = total_lines = 0
+
+    def flush():
+        if entry:
+            entries.append({"institution": entry.get("institution", ""), "credential": entry.get("credential", "")})
+            entry.clear()
+
+    for line in (line for section in sections for line in section):
+        if EDUCATION_DETAIL_RE.match(line):
+            continue
+        total_lines += 1
+        fields = []
+        for field in FIELD_SEPARATOR_RE.split(DATE_RE.sub(" ", line)):
+            # Drop "City, ST" fields, and a state glued to the end of a school's name
+            if LOCATION_RE.fullmatch(field.strip()) and not INSTITUTION_RE.search(field):
+                continue
+            fields.extend(STATE_SUFFIX_RE.sub("", field).split(","))
+        fields = [strip_field(field) for field in fields]
+        fields = [field for field in fields if re.search(r"[A-Za-z]", field)]
+        # A bracket the split cut through leaves text that should not reach the resume as it is
+        if any(field.count("(") != field.count(")") for field in fields):
+            continue
+        institutions = [field for field in fields if INSTITUTION_RE.search(field) and not DEGREE_RE.search(field)]
+        credentials = [field for field in fields if DEGREE_RE.search(field) and not INSTITUTION_RE.search(field)]
+        unknown = [field for field in fields if field not in institutions and field not in credentials]
+        if len(institutions) > 1 or len(credentials) > 1:
+            continue
+        # "Credential, Issuer": a certification's issuer rarely names itself a school
+        if credentials and not institutions and len(unknown) == 1:
+            institutions, unknown = unknown, []
+        # "School, City": the town a school is in
+        if institutions and not credentials and len(unknown) == 1 and looks_like_place(unknown[0]):
+            unknown = []
+        if unknown or not fields:
+            continue
+        read_lines += 1
+        if institutions and credentials:
+            # A whole entry on one line stands alone
+            flush()
+        for key, values in (("institution", institutions), ("credential", credentials)):
+            if values:
+                if key in entry:
+                    flush()
+                entry[key] = values[0]
+    flush()
+
+    if not entries:
+        return {"education": []}, 0.0
+    # Repeated lines (e.g. a two-column layout read twice) give one entry
+    entries = [dict(items) for items in dict.fromkeys(tuple(entry.items()) for entry in entries)]
+    confidence = read_lines / total_lines
+    if any(not entry["credential"] for entry in entries):
+        confidence *= 0.7
+    return {"education": entries}, confidence
+
+
+# Sections with a rule-based extractor, tried before their LLM agent
+RULE_EXTRACTORS = {
+    "Name Generator": extract_contact,
+    "Education Writer": extract_education,
+}
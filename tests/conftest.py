@@ -0,0 +1,56 @@
+import base64
+import os
+import sys
+import tempfile
+
+# app reads its settings at import time, so they are set before any test imports it
+os.environ.update({
+    "OPENAI_API_KEY": "sk-test",
+    "AUTH_USERNAME": "user",
+    "AUTH_PASSWORD": "secret",
+    "OUTPUT_DIR": tempfile.mkdtemp(prefix="resume-tests-"),
+    "JOB_DB_PATH": "",
+    "SECTION_CACHE_PATH": "",
+    "LLM_RATE_LIMIT_PATH": "",
+    "CREW_VERBOSE": "0",
+})
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest  # noqa: E402
+
+
+@pytest.fixture
+def client():
+    import app
+    return app.app.test_client()
+
+
+@pytest.fixture
+def auth_headers():
+    return {"Authorization": "Basic " + base64.b64encode(b"user:secret").decode()}
+
+
+# Valid output for every section role, as its agent would return it
+SECTIONS = {
+    "Name Generator": {
+        "full_name": "Jane Doe", "location": "Austin, TX", "phone": "555-123-4567",
+        "email": "jane@example.com", "LinkedIn": "linkedin.com/in/janedoe",
+    },
+    "Keyword Generator": {"top_keywords": ["Data Analysis", "Risk & Compliance", "Team Leadership"]},
+    "Summary Writer": {"summaries": ["First summary.", "Second summary.", "Third summary."]},
+    "Areas of Expertise Writer": {"expertise_keywords": [f"Skill {i}" for i in range(9)]},
+    "Achievements Writer": {"notable_achievements": [{"text": "Cut month-end close from ten days to four."}]},
+    "Job Description Writer": {"experience": [{
+        "company": "Acme", "location": "Austin, TX", "title": "Lead Analyst", "dates": "2020-Present",
+        "description": "Led the finance analytics team.", "achievements": [{"label": "Led", "text": "a team of six."}],
+    }]},
+    "Additional Experience Writer": {"earlier_experience": [
+        {"company": "Old Co", "location": "Dallas, TX", "title": "Analyst", "dates": "2015-2020"},
+    ]},
+    "Education Writer": {"education": [{"institution": "University of Texas", "credential": "BBA, Finance"}]},
+}
+
+
+@pytest.fixture
+def sections():
+    return {role: dict(data) for role, data in SECTIONS.items()}
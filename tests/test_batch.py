@@ -0,0 +1,86 @@
+import io
+import zipfile
+
+import pytest
+from werkzeug.datastructures import FileStorage
+
+import app
+
+
+def make_zip(members):
+    data = io.BytesIO()
+    with zipfile.ZipFile(data, "w", zipfile.ZIP_DEFLATED) as archive:
+        for name, content in members.items():
+            archive.writestr(name, content)
+    data.seek(0)
+    return data
+
+
+def post_batch(client, auth_headers, files):
+    return client.post("/batch", data={"files": files}, headers=auth_headers, content_type="multipart/form-data")
+
+
+@pytest.fixture
+def spooled(monkeypatch):
+    """Record every file batch_items copies out of the request."""
+    calls = []
+    spool = app.spool
+
+    def record(source):
+        calls.append(source)
+        return spool(source)
+
+    monkeypatch.setattr(app, "spool", record)
+    return calls
+
+
+def test_batch_items_unpacks_zips_in_upload_order(spooled):
+    archive = make_zip({
+        "a/one.docx": b"1", "two.PDF": b"2", "notes.txt": b"x", "__MACOSX/._one.docx": b"x", ".hidden.docx": b"x",
+    })
+    uploads = [
+        FileStorage(io.BytesIO(b"0"), "first.pdf"),
+        FileStorage(archive, "batch.zip"),
+    ]
+    items = app.batch_items(uploads)
+    assert [(name, data.read()) for name, data in items] == [
+        ("first.pdf", b"0"), ("a/one.docx", b"1"), ("two.PDF", b"2"),
+    ]
+
+
+def test_many_member_zip_is_rejected_before_extraction(client, auth_headers, spooled):
+    members = {f"resume{i}.docx": b"x" for i in range(app.BATCH_MAX_FILES + 1)}
+    response = post_batch(client, auth_headers, [(make_zip(members), "batch.zip")])
+    assert response.status_code == 413
+    assert str(app.BATCH_MAX_FILES) in response.get_json()["error"]
+    assert spooled == []
+
+
+def test_members_are_counted_across_uploads(client, auth_headers, monkeypatch, spooled):
+    monkeypatch.setattr(app, "BATCH_MAX_FILES", 3)
+    files = [
+        (make_zip({"a.docx": b"x", "b.docx": b"x"}), "first.zip"),
+        (make_zip({"c.docx": b"x", "d.docx": b"x"}), "second.zip"),
+    ]
+    response = post_batch(client, auth_headers, files)
+    assert response.status_code == 413
+    assert spooled == []
+
+
+def test_uncompressed_total_is_capped(client, auth_headers, monkeypatch, spooled):
+    monkeypatch.setattr(app, "MAX_BATCH_UPLOAD_BYTES", 10_000)
+    # Each member compresses to a few bytes and is under MAX_UPLOAD_BYTES on its own
+    members = {f"resume{i}.docx": b"\0" * 4_000 for i in range(3)}
+    response = post_batch(client, auth_headers, [(make_zip(members), "batch.zip")])
+    assert response.status_code == 413
+    assert "uncompressed" in response.get_json()["error"]
+    assert spooled == []
+
+
+def test_oversized_member_is_rejected(client, auth_headers, monkeypatch, spooled):
+    monkeypatch.setattr(app, "MAX_UPLOAD_BYTES", 1_000)
+    response = post_batch(client, auth_headers, [(make_zip({"big.docx": b"\0" * 5_000}), "batch.zip")])
+    assert response.status_code == 413
+    assert "big.docx" in response.get_json()["error"]
+    assert spooled == []
+
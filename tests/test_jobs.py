@@ -0,0 +1,87 @@
+import threading
+import uuid
+
+import pytest
+
+import app
+from jobs import JobQueue, MemoryJobStore
+
+
+class FailingStore(MemoryJobStore):
+    def __init__(self):
+        super().__init__()
+        self.fail = True
+
+    def create(self, job_id, inputs=None):
+        if self.fail:
+            raise OSError("disk full")
+        super().create(job_id, inputs)
+
+    def set_owner(self, job_id, owner):
+        if self.fail:
+            raise OSError("disk full")
+
+
+def test_submit_releases_its_slot_when_the_store_fails():
+    store = FailingStore()
+    queue = JobQueue(store, workers=1, queue_size=0)
+    with pytest.raises(OSError):
+        queue.submit(lambda job_id: "first")
+    store.fail = False
+    job_id = queue.submit(lambda job_id: "second")
+    assert job_id is not None
+
+
+def test_requeue_releases_its_slot_when_the_store_fails():
+    store = FailingStore()
+    queue = JobQueue(store, workers=1, queue_size=0)
+    store.fail = False
+    finished = threading.Event()
+    job_id = queue.submit(lambda job_id: finished.set())
+    assert finished.wait(5)
+    queue._executor.submit(lambda: None).result(5)
+
+    store.fail = True
+    with pytest.raises(OSError):
+        queue.requeue(job_id, lambda job_id: "again")
+    store.fail = False
+    assert queue.requeue(job_id, lambda job_id: "again")
+
+
+@pytest.fixture
+def single_pass(monkeypatch, sections):
+    """Replace the combined LLM call with the canned sections and count its runs."""
+    calls = []
+
+    def run_single_pass(resume_text, usage, shortlist=()):
+        calls.append(resume_text)
+        return [app.section_result(role, data) for role, data in sections.items()]
+
+    monkeypatch.setattr(app, "run_single_pass", run_single_pass)
+    return calls
+
+
+def run_single_job(checkpointed):
+    job_id = uuid.uuid4().hex
+    app.job_queue.store.create(job_id, {"resume_text": "Jane Doe", "mode": "single"})
+    for role, data in checkpointed.items():
+        app.job_queue.store.save_section(job_id, role, data)
+    app.run_resume_pipeline(job_id, "Jane Doe\nAustin, TX", "single")
+    app.docx_renders.wait(job_id)
+    return job_id
+
+
+def test_single_pass_runs_again_after_a_partial_checkpoint(single_pass, sections):
+    partial = {role: sections[role] for role in ("Name Generator", "Summary Writer")}
+    job_id = run_single_job(partial)
+    assert len(single_pass) == 1
+    context = app.load_job_context(job_id)
+    assert app.missing_layout_keys(app.DEFAULT_LAYOUT, context) == []
+    assert set(app.job_queue.store.sections(job_id)) == set(app.SECTION_KEYS)
+
+
+def test_single_pass_is_reused_when_every_section_was_checkpointed(single_pass, sections):
+    job_id = run_single_job(sections)
+    assert single_pass == []
+    assert app.missing_layout_keys(app.DEFAULT_LAYOUT, app.load_job_context(job_id)) == []
+
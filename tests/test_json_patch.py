@@ -0,0 +1,170 @@
+import uuid
+
+import pytest
+
+import app
+from jobs import JOB_DONE, JOB_RUNNING
+from json_patch import apply_json_patch, parse_json_pointer
+
+DOCUMENT = {"name": "Jane", "skills": ["a", "b", "c"], "jobs": [{"title": "Analyst"}], "a/b": 1, "m~n": 2}
+
+
+@pytest.mark.parametrize("pointer, tokens", [
+    ("", []),
+    ("/", [""]),
+    ("/skills/0", ["skills", "0"]),
+    ("/a~1b", ["a/b"]),
+    ("/m~0n", ["m~n"]),
+    ("/~01", ["~1"]),
+])
+def test_parse_json_pointer(pointer, tokens):
+    assert parse_json_pointer(pointer) == tokens
+
+
+@pytest.mark.parametrize("pointer", ["skills", None, 3])
+def test_parse_json_pointer_rejects(pointer):
+    with pytest.raises(ValueError):
+        parse_json_pointer(pointer)
+
+
+@pytest.mark.parametrize("operation, expected", [
+    ({"op": "add", "path": "/title", "value": "Lead"}, {"title": "Lead"}),
+    ({"op": "add", "path": "/skills/1", "value": "x"}, {"skills": ["a", "x", "b", "c"]}),
+    ({"op": "add", "path": "/skills/-", "value": "x"}, {"skills": ["a", "b", "c", "x"]}),
+    ({"op": "add", "path": "/skills/3", "value": "x"}, {"skills": ["a", "b", "c", "x"]}),
+    ({"op": "add", "path": "/name", "value": "Janet"}, {"name": "Janet"}),
+    ({"op": "remove", "path": "/skills/0"}, {"skills": ["b", "c"]}),
+    ({"op": "remove", "path": "/a~1b"}, {"a/b": None}),
+    ({"op": "replace", "path": "/skills/2", "value": "z"}, {"skills": ["a", "b", "z"]}),
+    ({"op": "replace", "path": "/m~0n", "value": 3}, {"m~n": 3}),
+    ({"op": "move", "from": "/skills/2", "path": "/skills/0"}, {"skills": ["c", "a", "b"]}),
+    ({"op": "move", "from": "/name", "path": "/jobs/0/name"}, {
+        "name": None, "jobs": [{"title": "Analyst", "name": "Jane"}],
+    }),
+    ({"op": "copy", "from": "/jobs/0", "path": "/jobs/-"}, {"jobs": [{"title": "Analyst"}, {"title": "Analyst"}]}),
+    ({"op": "test", "path": "/skills", "value": ["a", "b", "c"]}, {}),
+])
+def test_apply_json_patch(operation, expected):
+    result = apply_json_patch(DOCUMENT, [operation])
+    for key, value in expected.items():
+        if value is None:
+            assert key not in result
+        else:
+            assert result[key] == value
+    untouched = {key: value for key, value in DOCUMENT.items() if key not in expected}
+    assert {key: result[key] for key in untouched} == untouched
+
+
+def test_apply_json_patch_does_not_change_its_input():
+    document = {"skills": ["a"], "jobs": [{"title": "Analyst"}]}
+    result = apply_json_patch(document, [
+        {"op": "add", "path": "/skills/-", "value": "b"},
+        {"op": "replace", "path": "/jobs/0/title", "value": "Lead"},
+    ])
+    assert document == {"skills": ["a"], "jobs": [{"title": "Analyst"}]}
+    assert result == {"skills": ["a", "b"], "jobs": [{"title": "Lead"}]}
+
+
+def test_copied_values_are_independent():
+    result = apply_json_patch(DOCUMENT, [
+        {"op": "copy", "from": "/jobs/0", "path": "/jobs/-"},
+        {"op": "replace", "path": "/jobs/1/title", "value": "Lead"},
+    ])
+    assert result["jobs"] == [{"title": "Analyst"}, {"title": "Lead"}]
+
+
+def test_replace_the_whole_document():
+    assert apply_json_patch(DOCUMENT, [{"op": "replace", "path": "", "value": {"x": 1}}]) == {"x": 1}
+
+
+@pytest.mark.parametrize("operations, message", [
+    ({"op": "add"}, "must be a JSON list"),
+    (["add"], "needs an op"),
+    ([{"op": "rename", "path": "/name"}], "needs an op"),
+    ([{"op": "add", "path": "/name"}], "a value is required"),
+    ([{"op": "add", "path": "name", "value": 1}], "is not a JSON pointer"),
+    ([{"op": "add", "path": "/skills/4", "value": "x"}], "out of range"),
+    ([{"op": "add", "path": "/skills/01", "value": "x"}], "is not a list index"),
+    ([{"op": "add", "path": "/missing/x", "value": 1}], "there is no 'missing'"),
+    ([{"op": "add", "path": "/name/first", "value": 1}], "cannot look inside str"),
+    ([{"op": "remove", "path": "/skills/3"}], "out of range"),
+    ([{"op": "remove", "path": "/skills/-"}], "is not a list index"),
+    ([{"op": "remove", "path": "/missing"}], "there is no 'missing'"),
+    ([{"op": "remove", "path": ""}], "the whole document cannot be removed"),
+    ([{"op": "replace", "path": "/missing", "value": 1}], "there is no 'missing'"),
+    ([{"op": "move", "from": "/jobs", "path": "/jobs/0/jobs"}], "cannot be moved into itself"),
+    ([{"op": "copy", "from": "/missing", "path": "/x"}], "there is no 'missing'"),
+    ([{"op": "test", "path": "/name", "value": "Janet"}], "the value does not match"),
+    ([{"op": "test", "path": "/skills", "value": ["a", "b"]}], "the value does not match"),
+    ([{"op": "test", "path": "/missing", "value": None}], "there is no 'missing'"),
+])
+def test_apply_json_patch_rejects(operations, message):
+    with pytest.raises(ValueError, match=message):
+        apply_json_patch(DOCUMENT, operations)
+
+
+def test_a_failed_test_operation_applies_nothing():
+    document = {"name": "Jane", "skills": ["a"]}
+    with pytest.raises(ValueError, match="Operation 2"):
+        apply_json_patch(document, [
+            {"op": "replace", "path": "/name", "value": "Janet"},
+            {"op": "test", "path": "/skills/0", "value": "b"},
+        ])
+    assert document == {"name": "Jane", "skills": ["a"]}
+
+
+@pytest.fixture
+def finished_job(sections):
+    job_id = uuid.uuid4().hex
+    app.job_queue.store.create(job_id, {"resume_text": "Jane Doe", "mode": "multi"})
+    app.job_queue.store.update(job_id, status=JOB_DONE)
+    context = app.build_context([app.section_result(role, data) for role, data in sections.items()])
+    app.save_job_context(job_id, context)
+    return job_id
+
+
+def patch_context(client, auth_headers, job_id, operations):
+    return client.patch(f"/jobs/{job_id}/context", json=operations, headers=auth_headers)
+
+
+def test_patch_context_applies_and_saves_the_edit(client, auth_headers, finished_job):
+    response = patch_context(client, auth_headers, finished_job, [
+        {"op": "test", "path": "/full_name", "value": "Jane Doe"},
+        {"op": "replace", "path": "/full_name", "value": "Janet Doe"},
+        {"op": "add", "path": "/summaries/-", "value": "A fourth summary."},
+    ])
+    assert response.status_code == 200, response.get_json()
+    assert "Janet Doe" in response.get_json()["html"]
+    context = app.load_job_context(finished_job)
+    assert context["full_name"] == "Janet Doe"
+    assert context["summaries"][-1] == "A fourth summary."
+
+
+@pytest.mark.parametrize("operations, message", [
+    ({"op": "replace", "path": "/full_name", "value": "x"}, "must be a JSON list"),
+    ([{"op": "test", "path": "/full_name", "value": "Someone Else"}], "the value does not match"),
+    ([{"op": "replace", "path": "/full_name", "value": ["Jane"]}], "context.full_name should be text"),
+    ([{"op": "add", "path": "/experience/0/achievements", "value": "none"}],
+     "context.experience[0].achievements should be a list"),
+    ([{"op": "add", "path": "/education/-", "value": "BS"}], "context.education[1] should be an object"),
+    ([{"op": "remove", "path": "/education"}], "context.education is required by the layout"),
+    ([{"op": "remove", "path": "/certifications"}], "context.certifications is required by the layout"),
+    ([{"op": "replace", "path": "", "value": ["not", "an", "object"]}], "must still be a JSON object"),
+])
+def test_patch_context_rejects_invalid_edits(client, auth_headers, finished_job, operations, message):
+    before = app.load_job_context(finished_job)
+    response = patch_context(client, auth_headers, finished_job, operations)
+    assert response.status_code == 400
+    assert message in response.get_json()["error"]
+    assert app.load_job_context(finished_job) == before
+
+
+def test_patch_context_404_for_an_unknown_job(client, auth_headers):
+    response = patch_context(client, auth_headers, uuid.uuid4().hex, [])
+    assert response.status_code == 404
+
+
+def test_patch_context_409_for_an_unfinished_job(client, auth_headers, finished_job):
+    app.job_queue.store.update(finished_job, status=JOB_RUNNING)
+    response = patch_context(client, auth_headers, finished_job, [])
+    assert response.status_code == 409
@@ -0,0 +1,105 @@
+import json
+
+import pytest
+
+from config import SECTION_SCHEMAS
+from json_repair import clean_json_block, parse_section_output, repair_json, schema_problems
+
+
+@pytest.mark.parametrize("text, expected", [
+    # Missing commas between values
+    ('{"a": 1 "b": 2}', {"a": 1, "b": 2}),
+    ('["A", "B" "C"]', ["A", "B", "C"]),
+    ('[{"text": "a"}\n {"text": "b"}]', [{"text": "a"}, {"text": "b"}]),
+    ('{"x": [1 2 3], "y": {"a": -1.5e3 "b": false}}', {"x": [1, 2, 3], "y": {"a": -1500.0, "b": False}}),
+    ('{"a": "he said \\"hi\\"" "b": 1}', {"a": 'he said "hi"', "b": 1}),
+    # Trailing commas
+    ('{"summaries": ["one", "two",],}', {"summaries": ["one", "two"]}),
+    ('[1, 2, ]', [1, 2]),
+    # Prose around the JSON
+    ('Here you go:\n{"a": [1]} Thanks!', {"a": [1]}),
+    ('Sure! [{"a": 1}] Let me know if you need more.', [{"a": 1}]),
+    # Raw newlines inside strings
+    ('{"description": "line1\nline2"}', {"description": "line1\nline2"}),
+    # Output cut off inside a string, array or object
+    ('{"a": [{"label": "Led", "text": "x', {"a": [{"label": "Led", "text": "x"}]}),
+    ('{"a": [1, 2', {"a": [1, 2]}),
+    ('{"a": 1, ', {"a": 1}),
+    ('{"a":', {"a": None}),
+    # Output cut off inside a literal
+    ('{"a": tr', {"a": True}),
+    ('{"a": fal', {"a": False}),
+    ('{"a": n', {"a": None}),
+    ('[1, 2, 3.5', [1, 2, 3.5]),
+    ('[1, 2, 3.', [1, 2]),
+    ('[1, -', [1]),
+    ('{"a": 1e', {"a": None}),
+])
+def test_repair_json(text, expected):
+    assert json.loads(repair_json(text)) == expected
+
+
+@pytest.mark.parametrize("text", [
+    '{"a": 1, "b": [true, null, "x"]}',
+    '[{"a": "b"}, {"c": -0.5}]',
+])
+def test_repair_json_leaves_valid_json_alone(text):
+    assert json.loads(repair_json(text)) == json.loads(text)
+
+
+def test_repair_json_without_json_returns_the_text():
+    assert repair_json("no json here") == "no json here"
+
+
+def test_clean_json_block_strips_fences_and_control_characters():
+    assert clean_json_block('```json\n{"a": "b\x07"}\n```') == '{"a": "b"}'
+    assert clean_json_block('```\n[1]\n```') == "[1]"
+
+
+@pytest.mark.parametrize("role, raw, expected", [
+    ("Summary Writer", '```json\n{"summaries": ["one", "two"]}\n```', {"summaries": ["one", "two"]}),
+    ("Summary Writer", 'Here:\n{"summaries": ["one" "two",]}', {"summaries": ["one", "two"]}),
+    ("Keyword Generator", '["A", "B", "C"]', {"top_keywords": ["A", "B", "C"]}),
+    ("Achievements Writer", '{"notable_achievements": [{"text": "Cut costs\nby 10%"}', {
+        "notable_achievements": [{"text": "Cut costs\nby 10%"}],
+    }),
+    ("Name Generator", '{"full_name": "Jane", "location": null, "phone": "1", "email": "", "LinkedIn": "x"}', {
+        "full_name": "Jane", "location": None, "phone": "1", "email": "", "LinkedIn": "x",
+    }),
+])
+def test_parse_section_output_accepts(role, raw, expected):
+    data, problems = parse_section_output(role, raw)
+    assert problems == []
+    assert data == expected
+
+
+@pytest.mark.parametrize("role, raw, problem", [
+    ("Summary Writer", '{"summaries": "one"}', "output.summaries should be a list"),
+    ("Summary Writer", '{"summary": ["one"]}', '"summaries" is missing'),
+    ("Summary Writer", '{"summaries": [1, ["x"]]}', "output.summaries[1] should be text"),
+    ("Name Generator", '{"full_name": true, "location": "", "phone": "", "email": "", "LinkedIn": ""}',
+     "output.full_name should be text"),
+    ("Job Description Writer", '{"experience": [{"company": "Acme", "achievements": "none"}]}',
+     "output.experience[0].achievements should be a list"),
+    ("Education Writer", '{"education": ["BS"]}', "output.education[0] should be an object"),
+    ("Summary Writer", '"just text"', "the output should be a JSON object"),
+    ("Summary Writer", "Sorry, I cannot help with that.", "the output is not valid JSON"),
+    ("Summary Writer", None, "the output is not valid JSON"),
+])
+def test_parse_section_output_rejects(role, raw, problem):
+    _, problems = parse_section_output(role, raw)
+    assert any(found.startswith(problem) for found in problems), problems
+
+
+def test_unknown_fields_are_allowed():
+    data, problems = parse_section_output("Education Writer", '{"education": [], "notes": {"any": ["thing"]}}')
+    assert problems == []
+    assert data["notes"] == {"any": ["thing"]}
+
+
+def test_resume_writer_schema_covers_every_section():
+    combined = SECTION_SCHEMAS["Resume Writer"]
+    for role, schema in SECTION_SCHEMAS.items():
+        for key, field in schema.items():
+            assert combined[key] == field, (role, key)
+    assert schema_problems({"summaries": ["a"], "experience": [{"dates": 2020}]}, combined, "output") == []
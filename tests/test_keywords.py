@@ -0,0 +1,70 @@
+import os
+
+import pytest
+
+from keywords import KeywordIndex, keyword_terms
+
+RESUME = "Built financial models and ran variance analysis for the monthly budget."
+POSTING = "We need Financial Modeling, Machine Learning, Variance Analysis and Cloud Security. Cloud Security is key."
+
+
+def write_vocabulary(path, phrases, mtime_ns=None):
+    path.write_text("# Phrases the keyword sections may choose from\n" + "\n".join(phrases) + "\n", encoding="utf-8")
+    if mtime_ns is not None:
+        os.utime(path, ns=(mtime_ns, mtime_ns))
+
+
+@pytest.fixture
+def vocabulary_path(tmp_path):
+    path = tmp_path / "keywords.txt"
+    write_vocabulary(path, ["Financial Modeling", "Variance Analysis", "Machine Learning", "Budget Forecasting"])
+    return path
+
+
+@pytest.mark.parametrize("resume, expected", [
+    (RESUME, ["Financial Modeling", "Variance Analysis"]),
+    # A posting's own phrase is offered once the resume shows both of its words
+    (RESUME + " Led cloud security audits.", ["Cloud Security", "Financial Modeling", "Variance Analysis"]),
+    # "Budget" alone does not ground "Budget Forecasting"
+    ("Owned the budget.", []),
+    ("", []),
+])
+def test_shortlist_only_offers_phrases_the_resume_shows(vocabulary_path, resume, expected):
+    shortlist = KeywordIndex(str(vocabulary_path)).rank(resume, POSTING)
+    assert shortlist == expected
+    shown = keyword_terms(resume)
+    for phrase in shortlist:
+        assert all(term in shown for term in keyword_terms(phrase) if " " not in term), phrase
+
+
+def test_shortlist_without_a_posting_ranks_the_vocabulary(vocabulary_path):
+    assert KeywordIndex(str(vocabulary_path)).rank(RESUME, "") == ["Financial Modeling", "Variance Analysis"]
+
+
+def test_shortlist_respects_its_limit(vocabulary_path):
+    assert KeywordIndex(str(vocabulary_path)).rank(RESUME, POSTING, limit=1) == ["Financial Modeling"]
+
+
+def test_vocabulary_is_rebuilt_only_when_the_file_changes(vocabulary_path):
+    write_vocabulary(vocabulary_path, ["Financial Modeling"], mtime_ns=1_000_000_000)
+    index = KeywordIndex(str(vocabulary_path))
+    built = index.vocabulary()
+    assert built["phrases"] == ["Financial Modeling"]
+    assert index.vocabulary() is built
+
+    write_vocabulary(vocabulary_path, ["Financial Modeling", "Variance Analysis"], mtime_ns=2_000_000_000)
+    rebuilt = index.vocabulary()
+    assert rebuilt is not built
+    assert rebuilt["phrases"] == ["Financial Modeling", "Variance Analysis"]
+    assert index.rank(RESUME, "") == ["Financial Modeling", "Variance Analysis"]
+
+
+def test_vocabulary_is_rebuilt_when_the_file_appears(tmp_path):
+    path = tmp_path / "keywords.txt"
+    index = KeywordIndex(str(path))
+    assert index.vocabulary()["phrases"] == []
+    assert index.rank(RESUME, "") == []
+
+    write_vocabulary(path, ["Variance Analysis"])
+    assert index.vocabulary()["phrases"] == ["Variance Analysis"]
+    assert index.rank(RESUME, "") == ["Variance Analysis"]
@@ -0,0 +1,22 @@
+import uuid
+
+import app
+
+
+def test_layouts_404_when_the_context_file_goes_away(client, auth_headers, monkeypatch, sections):
+    # The context is read, then swept before its modification time is looked up
+    context = app.build_context([app.section_result(role, data) for role, data in sections.items()])
+    monkeypatch.setattr(app, "load_job_context", lambda job_id: context)
+    response = client.post(f"/jobs/{uuid.uuid4().hex}/layouts", headers=auth_headers)
+    assert response.status_code == 404
+    assert "expired" in response.get_json()["error"]
+
+
+def test_layouts_404_for_an_unknown_job(client, auth_headers):
+    response = client.post(f"/jobs/{uuid.uuid4().hex}/layouts", headers=auth_headers)
+    assert response.status_code == 404
+
+
+def test_layouts_rejects_an_unknown_layout(client, auth_headers):
+    response = client.post(f"/jobs/{uuid.uuid4().hex}/layouts?layout=nope", headers=auth_headers)
+    assert response.status_code == 400
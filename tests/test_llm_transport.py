@@ -0,0 +1,59 @@
+import json
+
+import httpx
+import pytest
+
+import llm_transport
+
+
+def completion(content):
+    return {
+        "id": "chatcmpl-test", "object": "chat.completion", "created": 0, "model": "gpt-4.1-mini",
+        "choices": [{"index": 0, "finish_reason": "stop", "message": {"role": "assistant", "content": content}}],
+        "usage": {"prompt_tokens": 3, "completion_tokens": 1, "total_tokens": 4},
+    }
+
+
+@pytest.fixture
+def openai_api(monkeypatch):
+    """Answer requests below the transport layer and record which transport sent them.
+
+    responses lists the status codes to answer with in turn; once they run out
+    every request succeeds.
+    """
+    sent = []
+    responses = []
+
+    def handle_request(self, request):
+        sent.append((type(self), request.url.path, json.loads(request.content)["model"]))
+        status = responses.pop(0) if responses else 200
+        body = completion("hello") if status == 200 else {"error": {"message": "slow down"}}
+        return httpx.Response(status, json=body, request=request)
+
+    monkeypatch.setattr(httpx.HTTPTransport, "handle_request", handle_request)
+    monkeypatch.setattr(llm_transport, "LLM_BACKOFF_BASE", 0.01)
+    return sent, responses
+
+
+def test_llm_requests_go_through_the_pooled_transport(openai_api):
+    sent, _ = openai_api
+    llm = llm_transport.build_llm("gpt-4.1-mini")
+    assert llm.call([{"role": "user", "content": "hi"}]) == "hello"
+    assert sent == [(llm_transport.LLMTransport, "/v1/chat/completions", "gpt-4.1-mini")]
+
+
+def test_throttled_requests_are_retried_by_the_transport(openai_api):
+    sent, responses = openai_api
+    responses.extend([429, 503])
+    llm = llm_transport.build_llm("gpt-4.1-mini")
+    assert llm.call([{"role": "user", "content": "hi"}]) == "hello"
+    assert len(sent) == 3
+    assert all(transport is llm_transport.LLMTransport for transport, _, _ in sent)
+
+
+def test_agents_use_the_pooled_llm(openai_api):
+    import app
+    agent = app.build_agent("Summary Writer", "gpt-4.1")
+    assert isinstance(agent.llm, llm_transport.PooledOpenAICompletion)
+    assert agent.llm.call([{"role": "user", "content": "hi"}]) == "hello"
+    assert openai_api[0][0][0] is llm_transport.LLMTransport
@@ -0,0 +1,107 @@
+import pytest
+
+from preprocess import SECTION_SLICES, clean_resume_text, resume_slice, split_resume_sections, token_counter
+
+CONTACT = ["Jane Doe", "Austin, TX | 555-123-4567 | jane@example.com"]
+EDUCATION = [
+    "Master of Business Administration (MBA), Harvard University, 2010",
+    "Bachelor of Business Administration in Finance and Accounting, University of Texas at Austin, 2006",
+]
+RESUME = "\n".join([
+    *CONTACT,
+    "PROFESSIONAL SUMMARY",
+    "Finance leader with fifteen years of planning, reporting and analysis experience across industries.",
+    "EXPERIENCE",
+    *[
+        line
+        for year in range(2020, 2008, -2)
+        for line in [
+            f"Senior Financial Analyst, Company {year}, {year - 2} - {year}",
+            f"Built the {year} forecasting model used by every business unit for its monthly close and budget.",
+            f"Cut the reporting cycle at Company {year} from ten days to four by automating the reconciliations.",
+        ]
+    ],
+    "EDUCATION",
+    *EDUCATION,
+    "SKILLS",
+    "Excel, SQL, Tableau, Hyperion, SAP, Power BI, Python and variance analysis for large organizations.",
+])
+
+
+def test_compaction_keeps_contact_headings_and_education():
+    budget = token_counter.count(RESUME) // 2
+    compacted = clean_resume_text(RESUME, budget=budget)
+    lines = compacted.splitlines()
+    assert len(lines) < len(RESUME.splitlines())
+    assert token_counter.count(compacted) <= budget
+    for line in [*CONTACT, *EDUCATION, "PROFESSIONAL SUMMARY", "EXPERIENCE", "EDUCATION", "SKILLS"]:
+        assert line in lines
+    # The newest role's first line is kept; the oldest roles' bullets go first
+    assert "Senior Financial Analyst, Company 2020, 2018 - 2020" in lines
+    assert not any("Company 2010" in line and line.startswith("Cut") for line in lines)
+
+
+def test_compaction_keeps_the_first_line_of_every_section_even_over_budget():
+    lines = clean_resume_text(RESUME, budget=1).splitlines()
+    sections = split_resume_sections("\n".join(lines))
+    assert set(sections) == {"contact", "summary", "experience", "education", "other"}
+    assert "Senior Financial Analyst, Company 2020, 2018 - 2020" in lines
+    assert all(line in lines for line in EDUCATION)
+
+
+def test_no_budget_keeps_every_line():
+    assert clean_resume_text(RESUME, budget=0) == RESUME
+
+
+@pytest.mark.parametrize("text, expected", [
+    # Whitespace, column gaps and invisible characters
+    ("Jane\u00a0Doe\u200b\r\nAustin,   TX\t\tjane@example.com\r\n\r\n", "Jane Doe\nAustin, TX | jane@example.com"),
+    # Words and sentences wrapped across PDF lines
+    ("Managed the quarterly close for a portfolio of twelve\nentities in four countries.",
+     "Managed the quarterly close for a portfolio of twelve entities in four countries."),
+    ("Led the finan-\ncial planning team", "Led the financial planning team"),
+    # Page numbers and repeated long lines
+    ("Jane Doe\nPage 1 of 2\nBuilt the forecasting model used by every business unit.\n"
+     "Built the forecasting model used by every business unit.\n- 2 -",
+     "Jane Doe\nBuilt the forecasting model used by every business unit."),
+    # Short lines may repeat, unless they follow themselves
+    ("EXPERIENCE\nAnalyst\nAcme\nAnalyst\nAnalyst", "EXPERIENCE\nAnalyst\nAcme\nAnalyst"),
+])
+def test_clean_resume_text(text, expected):
+    cleaned = clean_resume_text(text, budget=0)
+    assert cleaned == expected
+    assert clean_resume_text(cleaned, budget=0) == cleaned
+
+
+@pytest.mark.parametrize("budget", [0, 1, 200])
+def test_clean_resume_text_is_idempotent(budget):
+    cleaned = clean_resume_text(RESUME, budget=budget)
+    assert clean_resume_text(cleaned, budget=budget) == cleaned
+
+
+@pytest.mark.parametrize("role, first, last", [
+    ("Name Generator", "Jane Doe", CONTACT[-1]),
+    ("Education Writer", "EDUCATION", EDUCATION[-1]),
+    ("Job Description Writer", "EXPERIENCE", "Cut the reporting cycle at Company 2010 from ten days to four by "
+                                             "automating the reconciliations."),
+])
+def test_resume_slice(role, first, last):
+    lines = resume_slice(RESUME, role).splitlines()
+    assert (lines[0], lines[-1]) == (first, last)
+
+
+@pytest.mark.parametrize("role, text", [
+    ("Job Description Writer", "Jane Doe\nEDUCATION\nMBA, Harvard University"),
+    ("Additional Experience Writer", "Jane Doe\nSKILLS\nExcel, SQL"),
+    ("Education Writer", "Jane Doe\nEXPERIENCE\nAnalyst, Acme"),
+    ("Achievements Writer", "Jane Doe\nEDUCATION\nMBA, Harvard University"),
+    # A resume without any headings is all contact header
+    ("Education Writer", "Jane Doe\nAnalyst, Acme\nMBA, Harvard University"),
+])
+def test_resume_slice_falls_back_to_the_whole_text(role, text):
+    assert not set(SECTION_SLICES[role]) & set(split_resume_sections(text))
+    assert resume_slice(text, role) == text
+
+
+def test_resume_slice_reads_everything_for_other_roles():
+    assert resume_slice(RESUME, "Summary Writer") == RESUME
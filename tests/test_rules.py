@@ -0,0 +1,76 @@
+import pytest
+
+from rules import extract_contact, extract_education, strip_field
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("Certified Public Accountant (CPA)", "Certified Public Accountant (CPA)"),
+    (" (CPA)", "(CPA)"),
+    ("MBA (Finance).", "MBA (Finance)"),
+    ("Harvard University ( )", "Harvard University"),
+    ("(Expected", "Expected"),
+    ("AICPA)", "AICPA"),
+    ("B.S.:", "B.S"),
+])
+def test_strip_field(text, expected):
+    assert strip_field(text) == expected
+    assert strip_field(expected) == expected
+
+
+@pytest.mark.parametrize("text, expected, confidence", [
+    ("Jane Doe\nAustin, TX | 555-123-4567 | jane@example.com | linkedin.com/in/janedoe\nSUMMARY\nFinance lead.", {
+        "full_name": "Jane Doe", "location": "Austin, TX", "phone": "555-123-4567",
+        "email": "jane@example.com", "LinkedIn": "linkedin.com/in/janedoe",
+    }, 1.0),
+    ("JANE DOE\nSenior Analyst\njane@example.com\n(555) 123-4567\n"
+     "https://www.linkedin.com/in/jane-doe\nDallas, TX 75201", {
+        "full_name": "JANE DOE", "location": "Dallas, TX", "phone": "555-123-4567",
+        "email": "jane@example.com", "LinkedIn": "linkedin.com/in/jane-doe",
+    }, 1.0),
+    ("Mary-Jane O'Neil\nSan Antonio, TX • 210 555 0101 • mj@ex.co", {
+        "full_name": "Mary-Jane O'Neil", "location": "San Antonio, TX", "phone": "210-555-0101",
+        "email": "mj@ex.co", "LinkedIn": "",
+    }, 1.0),
+])
+def test_extract_contact(text, expected, confidence):
+    assert extract_contact(text) == (expected, confidence)
+
+
+@pytest.mark.parametrize("text, confidence", [
+    # No name: the model has to read the header
+    ("Curriculum Vitae\nSenior Financial Analyst\nAustin, TX\njane@example.com", 0.0),
+    # LinkedIn mentioned without a URL
+    ("Jane Doe\nAustin, TX\n555-123-4567\njane@example.com\nLinkedIn Profile", 0.5),
+    ("Jane Doe\njane@example.com\n555.123.4567", 0.8),
+    ("Jane Doe, Austin, TX\n+44 20 7946 0958\njane@example.com", 0.9),
+    ("Jane Doe\nAustin, TX\njane@example.com, referee@example.com\n555-123-4567\nlinkedin.com/in/jd", 0.9),
+])
+def test_extract_contact_lowers_confidence(text, confidence):
+    assert extract_contact(text)[1] == pytest.approx(confidence)
+
+
+@pytest.mark.parametrize("text, expected, confidence", [
+    ("Jane Doe\nEDUCATION\nCertified Public Accountant (CPA), AICPA\n"
+     "Master of Business Administration (MBA), Harvard University, 2010", [
+         {"institution": "AICPA", "credential": "Certified Public Accountant (CPA)"},
+         {"institution": "Harvard University", "credential": "Master of Business Administration (MBA)"},
+     ], 1.0),
+    ("Jane Doe\nCERTIFICATIONS\nProject Management Professional (PMP), PMI, 2019", [
+        {"institution": "PMI", "credential": "Project Management Professional (PMP)"},
+    ], 1.0),
+    # A missing credential is kept but left for the model to check
+    ("Jane Doe\nEDUCATION\nHarvard University\nYale University", [
+        {"institution": "Harvard University", "credential": ""},
+        {"institution": "Yale University", "credential": ""},
+    ], 0.7),
+    # No education section and no degree mentioned
+    ("Jane Doe\nEXPERIENCE\nAcme Corp\nAnalyst", [], 0.9),
+    # A degree outside any education section
+    ("Jane Doe\nEXPERIENCE\nAcme Corp\nMBA from a good school, University of Texas", [], 0.0),
+    # A comma inside brackets makes the line ambiguous
+    ("Jane Doe\nEDUCATION\nBachelor of Science (Economics, Finance), University of Michigan", [], 0.0),
+])
+def test_extract_education(text, expected, confidence):
+    data, found = extract_education(text)
+    assert data == {"education": expected}
+    assert found == pytest.approx(confidence)